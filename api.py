@@ -0,0 +1,427 @@
+"""
+Headless JSON/Arrow API over the dashboard's derived tables.
+
+Runs on the standard library's threading HTTP server and uses the same pipeline as the
+dashboard: the Parquet partition cache from storage.py and create_season_tables() per
+season, memoized by season content hash, so an update to nba.csv rebuilds only the
+seasons it touched and no Streamlit session is involved.
+
+    python -m api --port 8502
+
+    GET /seasons
+    GET /team-season-stats?season=2023&team=BOS&season_type=Playoffs
+    GET /per-minute?season=2023&player_id=201939
+    GET /players/201939/career
+
+Every data response carries an ETag built from the content hashes its payload was built
+from, and a request with a matching If-None-Match gets an empty 304. Errors are JSON
+objects with an "error" message: 400 for a bad parameter, 404 for an unknown path, season,
+team or player or a missing dataset, 500 for anything else. Add ?format=arrow (or send Accept:
+application/vnd.apache.arrow.stream) for an Arrow IPC stream instead of JSON.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from compute import concat_tables, create_career_stats, create_season_tables, season_label, total_cols
+from instrumentation import stage
+from player_index import PlayerSeasonIndex
+from storage import CACHE_DIR, HAS_PYARROW, dataset_fingerprint, open_partitioned_store
+from team_cube import ALL, TeamSeasonCube
+
+if HAS_PYARROW:
+    import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+
+# Serialized responses kept per server, keyed by ETag
+RESPONSE_CACHE_SIZE = 256
+
+# Values of the season_type parameter of /team-season-stats, ALL sums both
+SEASON_TYPES = ['Regular Season', 'Playoffs', ALL]
+
+
+class StatsService:
+    """
+    Derived tables of the current dataset, rebuilt per season when that season's content changes.
+
+    The dataset fingerprint is checked at most once per refresh_interval seconds; when it
+    changes the partition store is reopened and only seasons with a new content hash are
+    rebuilt on their next request.
+
+    Parameters:
+    csv_path (str): Source CSV, as for the dashboard
+    cache_dir (str): Directory of the Parquet partition cache
+    refresh_interval (float): Seconds between dataset fingerprint checks
+    """
+
+    def __init__(self, csv_path="nba.csv", cache_dir=CACHE_DIR, refresh_interval=1.0):
+        self.csv_path = csv_path
+        self.cache_dir = cache_dir
+        self.refresh_interval = refresh_interval
+        self.fingerprint = None
+        self.store = None
+        self._checked = 0.0
+        self._season_tables = {}
+        self._team_cubes = {}
+        self._player_index = None
+        self._lock = threading.RLock()
+
+    def refresh(self):
+        """Reopens the store if the dataset changed since the last check, returns the fingerprint."""
+        now = time.monotonic()
+        with self._lock:
+            if self.store is not None and now - self._checked < self.refresh_interval:
+                return self.fingerprint
+            self._checked = now
+            fingerprint = dataset_fingerprint(self.csv_path, self.cache_dir)
+            if fingerprint != self.fingerprint:
+                self.store = open_partitioned_store(self.csv_path, self.cache_dir)
+                self.fingerprint = fingerprint
+                self._player_index = None
+                current = {(season, self.store.season_hash(season)) for season in self.store.seasons}
+                self._season_tables = {key: tables for key, tables in self._season_tables.items() if key in current}
+                self._team_cubes = {key: cube for key, cube in self._team_cubes.items() if key in current}
+            return self.fingerprint
+
+    def version(self, season=None):
+        """Content hash a response would depend on now: the season's hash, or the whole dataset's."""
+        self.refresh()
+        with self._lock:
+            if season is None:
+                return self.fingerprint
+            return self.store.season_hash(season) if season in self.store.seasons else f"missing-{season}"
+
+    def snapshot(self):
+        """The current store and its fingerprint, taken together so a payload and its version agree."""
+        self.refresh()
+        with self._lock:
+            return self.store, self.fingerprint
+
+    def _memoized(self, built, season, store, build):
+        # Builds outside the lock, so one slow season doesn't hold up requests for the others;
+        # when two requests build the same season the first one stored wins
+        with self._lock:
+            store = self.store if store is None else store
+            key = (season, store.season_hash(season))
+            value = built.get(key)
+        if value is None:
+            value = build(store)
+            with self._lock:
+                # A store replaced meanwhile was already pruned by refresh(): don't add it back
+                if store is self.store:
+                    value = built.setdefault(key, value)
+        return value
+
+    def season_tables(self, season, store=None):
+        """Returns (rows, per_min, team_stats) of one season, as create_season_tables() builds them."""
+        return self._memoized(self._season_tables, season, store,
+                              lambda store: create_season_tables(store.read(season), total_cols))
+
+    def team_cube(self, season, store=None):
+        """TeamSeasonCube of one season's rows, split by season type."""
+        return self._memoized(self._team_cubes, season, store,
+                              lambda store: TeamSeasonCube(self.season_tables(season, store)[0]))
+
+    def _table(self, store, position, seasons):
+        return concat_tables(self.season_tables(season, store)[position] for season in seasons)
+
+    def _scope(self, season):
+        # Store, seasons and version of a request for one season or every season, None if the season isn't in the data
+        store, fingerprint = self.snapshot()
+        if season is None:
+            return store, store.seasons, fingerprint
+        if season not in store.seasons:
+            return None
+        return store, [season], store.season_hash(season)
+
+    def team_season_stats(self, season=None, team=None, season_type='Regular Season'):
+        """
+        Team totals and metrics of one season type, from the team cube of each season.
+
+        Parameters:
+        season (int): Season start year, every season if None
+        team (str): Team abbreviation, every team if None
+        season_type (str): 'Regular Season', 'Playoffs' or ALL for both summed
+
+        Returns:
+        tuple: (version, frame), None if the season isn't in the data
+        """
+        scope = self._scope(season)
+        if scope is None:
+            return None
+        store, seasons, version = scope
+        frames = []
+        for year in seasons:
+            cube = self.team_cube(year, store)
+            if season_type == ALL or season_type in cube.season_types:
+                frames.append(cube.slice(year, season_type))
+        frame = concat_tables(frames)
+        if team is not None and not frame.empty:
+            frame = frame[frame['TEAM'] == team]
+        return version, frame
+
+    def per_minute(self, season=None, player_id=None):
+        """Returns (version, frame) of the per-minute rows, None if the season isn't in the data."""
+        scope = self._scope(season)
+        if scope is None:
+            return None
+        store, seasons, version = scope
+        frame = self._table(store, 1, seasons)
+        if player_id is not None and not frame.empty:
+            frame = frame[frame['PLAYER_ID'] == player_id]
+        return version, frame
+
+    def player_career(self, player_id):
+        """
+        Per-season sums and per-game columns of one player, as in the career trajectory chart.
+
+        Returns:
+        tuple: (version, frame), None if the player has no rows
+        """
+        store, fingerprint = self.snapshot()
+        with self._lock:
+            if self._player_index is None or self._player_index[0] != fingerprint:
+                self._player_index = (fingerprint, PlayerSeasonIndex(self._table(store, 0, store.seasons)))
+            player_career = self._player_index[1].get_player_career(player_id)
+        if player_career.empty:
+            return None
+        stat_cols = [col for col in total_cols if col in player_career.columns]
+        career_by_season, _ = create_career_stats(player_career, stat_cols)
+        career_by_season.insert(0, 'PLAYER_ID', player_id)
+        career_by_season.insert(1, 'PLAYER', player_career['PLAYER'].iloc[-1])
+        return fingerprint, career_by_season
+
+    def seasons(self):
+        """Returns (version, frame) with every season, its label and content hash."""
+        store, fingerprint = self.snapshot()
+        return fingerprint, pd.DataFrame({
+            'season_start_year': store.seasons,
+            'season': season_label(store.seasons).tolist(),
+            'season_hash': [store.season_hash(season) for season in store.seasons],
+        })
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _int_param(query, name):
+    values = query.get(name)
+    if not values:
+        return None
+    try:
+        return int(values[-1])
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+
+
+def _str_param(query, name):
+    values = query.get(name)
+    return values[-1] if values else None
+
+
+def encode_frame(frame, fmt):
+    """Serializes a frame as a JSON array of records or an Arrow IPC stream, returns (content type, body)."""
+    if fmt == "arrow":
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return ARROW_MIME, sink.getvalue().to_pybytes()
+    return "application/json", frame.to_json(orient='records', double_precision=10).encode()
+
+
+def route(service, path, query):
+    """
+    Resolves a request to the data it asks for.
+
+    Parameters:
+    service (StatsService): Tables to answer from
+    path (str): Request path
+    query (dict): Parsed query string
+
+    Returns:
+    tuple: (name, version, build) where version is the content hash the response depends on now,
+           for a cheap If-None-Match check, and build() returns (version, frame) with the hash the
+           frame was actually built from
+    """
+    parts = [part for part in path.split('/') if part]
+
+    def found(result, message):
+        if result is None:
+            raise ApiError(404, message)
+        return result
+
+    def matching(result, column, value, message):
+        # A filter on an id that matches no row is a 404 too, not an empty list
+        version, frame = result
+        if value is not None and (frame.empty or not (frame[column] == value).any()):
+            raise ApiError(404, message)
+        return result
+
+    if parts == ['seasons']:
+        return 'seasons', service.version(), service.seasons
+
+    if parts == ['team-season-stats']:
+        season, team = _int_param(query, 'season'), _str_param(query, 'team')
+        season_type = _str_param(query, 'season_type') or 'Regular Season'
+        if season_type not in SEASON_TYPES:
+            raise ApiError(400, f"season_type must be one of {', '.join(SEASON_TYPES)}")
+        return 'team_season_stats', service.version(season), \
+            lambda: matching(found(service.team_season_stats(season, team, season_type), f"no season {season}"),
+                             'TEAM', team, f"no team {team}")
+
+    if parts == ['per-minute']:
+        season, player_id = _int_param(query, 'season'), _int_param(query, 'player_id')
+        return 'per_minute', service.version(season), \
+            lambda: matching(found(service.per_minute(season, player_id), f"no season {season}"),
+                             'PLAYER_ID', player_id, f"no rows for player {player_id}")
+
+    if len(parts) == 3 and parts[0] == 'players' and parts[2] == 'career':
+        try:
+            player_id = int(parts[1])
+        except ValueError:
+            raise ApiError(400, "player id must be an integer")
+        return 'player_career', service.version(), \
+            lambda: found(service.player_career(player_id), f"no rows for player {player_id}")
+
+    raise ApiError(404, f"unknown path {path}")
+
+
+class StatsRequestHandler(BaseHTTPRequestHandler):
+    """Request handler bound to a StatsService and a response cache by make_server()."""
+
+    service = None
+    responses = None
+    responses_lock = None
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        try:
+            self._get()
+        except ApiError as e:
+            self._send_error(e.status, str(e))
+        except FileNotFoundError:
+            logger.warning("No dataset to answer %s", self.path)
+            self._send_error(404, "no dataset")
+        except Exception:
+            logger.exception("Failed to answer %s", self.path)
+            self._send_error(500, "internal error")
+
+    @staticmethod
+    def _etag(version, path, query, fmt):
+        canonical = sorted((key, values[-1]) for key, values in query.items())
+        return '"' + hashlib.sha256(f"{version}|{path}|{canonical}|{fmt}".encode()).hexdigest()[:32] + '"'
+
+    def _get(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+
+        if url.path.rstrip('/') == '/health':
+            self._send(200, "application/json", json.dumps({'fingerprint': self.service.refresh()}).encode())
+            return
+
+        fmt = _str_param(query, 'format') or ("arrow" if ARROW_MIME in self.headers.get('Accept', '') else "json")
+        if fmt not in ("json", "arrow"):
+            raise ApiError(400, "format must be json or arrow")
+        if fmt == "arrow" and not HAS_PYARROW:
+            raise ApiError(406, "Arrow output needs pyarrow")
+
+        name, version, build = route(self.service, url.path, query)
+        etag = self._etag(version, url.path, query, fmt)
+
+        if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            self._send(304, None, b"", etag)
+            return
+
+        with self.responses_lock:
+            cached = self.responses.get(etag)
+            if cached is not None:
+                self.responses.move_to_end(etag)
+        if cached is None:
+            with stage(f"api.{name}"):
+                version, frame = build()
+                cached = encode_frame(frame, fmt)
+            # The data may have changed since the check above: the ETag follows what was built
+            etag = self._etag(version, url.path, query, fmt)
+            with self.responses_lock:
+                self.responses[etag] = cached
+                while len(self.responses) > RESPONSE_CACHE_SIZE:
+                    self.responses.popitem(last=False)
+        self._send(200, cached[0], cached[1], etag)
+
+    def _send_error(self, status, message):
+        self._send(status, "application/json", json.dumps({'error': message}).encode())
+
+    def _send(self, status, content_type, body, etag=None):
+        self.send_response(status)
+        if content_type is not None:
+            self.send_header("Content-Type", content_type)
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_HEAD = do_GET
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host="127.0.0.1", port=8502, service=None):
+    """
+    Creates a threading HTTP server answering from one StatsService.
+
+    Parameters:
+    host (str): Interface to bind
+    port (int): Port to bind, 0 picks a free one
+    service (StatsService): Tables to serve, defaults to StatsService() over nba.csv
+
+    Returns:
+    http.server.ThreadingHTTPServer: The server, not yet serving
+    """
+    handler = type("BoundStatsRequestHandler", (StatsRequestHandler,), {
+        'service': service or StatsService(),
+        'responses': OrderedDict(),
+        'responses_lock': threading.Lock(),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the dashboard's derived tables as JSON or Arrow")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--csv", default="nba.csv")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, StatsService(args.csv))
+    print(f"Serving on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
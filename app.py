@@ -1,11 +1,18 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from io import StringIO
-import base64
+import os
+import pickle
+import time
+import weakref
+
+from compute import (MetricDistributions, concat_tables, create_all_season_tables, create_career_stats,
+                     create_league_trends, create_season_tables, load_dataset, season_label, total_cols)
+import instrumentation
+from instrumentation import cached, stage, timed
+from player_index import PlayerSeasonIndex
+from storage import DatasetWatcher, PartitionedStore, dataset_fingerprint, open_partitioned_store
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 # Set page configuration
 st.set_page_config(
@@ -111,17 +118,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-team_colors = {
-    'ATL': '#E03A3E', 'BOS': '#007A33', 'BKN': '#000000', 'CHA': '#1D1160', 
-    'CHI': '#CE1141', 'CLE': '#860038', 'DAL': '#00538C', 'DEN': '#0E2240', 
-    'DET': '#C8102E', 'GSW': '#1D428A', 'HOU': '#CE1141', 'IND': '#002D62', 
-    'LAC': '#C8102E', 'LAL': '#552583', 'MEM': '#5D76A9', 'MIA': '#98002E', 
-    'MIL': '#00471B', 'MIN': '#0C2340', 'NO': '#0C2340', 'NYK': '#006BB6', 
-    'OKC': '#007AC1', 'ORL': '#0077C0', 'PHI': '#006BB6', 'PHX': '#1D1160', 
-    'POR': '#E03A3E', 'SAC': '#5A2D81', 'SAS': '#C4CED4', 'TOR': '#CE1141', 
-    'UTA': '#002B5C', 'WAS': '#002B5C', 'NOH': '#0C2340', 'NOP': '#0C2340'
-}
-
 # def get_table_download_link(df, filename, text):
 #     csv = df.to_csv(index=False)
 #     b64 = base64.b64encode(csv.encode()).decode()
@@ -130,229 +126,298 @@ team_colors = {
 
 # uploaded_file = st.sidebar.file_uploader("Upload NBA data CSV", type="csv")
 
-@st.cache_data
-def load_data():
+DATA_PATH = "nba.csv"
+
+# New CSV files dropped here are appended to DATA_PATH by the dataset watcher
+INCOMING_DIR = os.environ.get("NBA_INCOMING_DIR", "incoming")
+
+# Optional game-level box scores (any layout `python -m ingest` reads), for the rolling form charts
+GAMES_PATH = os.environ.get("NBA_GAMES_PATH", "games.csv")
+
+# Pool the per-season tables are built over: threads by default, the server process is never forked
+BUILD_EXECUTOR = os.environ.get("NBA_BUILD_EXECUTOR", "thread")
+
+# Number of built figures kept across sessions
+FIGURE_CACHE_SIZE = int(os.environ.get("NBA_FIGURE_CACHE_SIZE", "256"))
+
+# Sessions not seen for this long are dropped from the diagnostics session registry
+SESSION_IDLE_SECONDS = 600
+
+# Rows per leaderboard page
+LEADERBOARD_PAGE_SIZES = [25, 50, 100]
+
+# Player search results offered in the comparison multiselect
+PLAYER_SEARCH_LIMIT = 25
+
+def get_data_fingerprint():
+    # Cheap stat/manifest check, used as the cache key for everything derived from the CSV
     try:
-        data = pd.read_csv("nba.csv")
+        return dataset_fingerprint(DATA_PATH)
     except FileNotFoundError:
+        return "sample"
+
+@cached(st.cache_resource, "load_data")
+def load_data(fingerprint=None):
+    if fingerprint == "sample":
         st.warning("Using sample data. Please upload actual NBA data for full functionality.")
-        data = pd.DataFrame({
-            'PLAYER': ['LeBron James', 'Stephen Curry', 'Kevin Durant', 'Giannis Antetokounmpo', 'Nikola Jokic',
-                       'Luka Doncic', 'Damian Lillard', 'Joel Embiid', 'Kawhi Leonard', 'James Harden'],
-            'TEAM': ['LAL', 'GSW', 'BKN', 'MIL', 'DEN', 'DAL', 'POR', 'PHI', 'LAC', 'BKN'],
-            'year': ['2023-24', '2023-24', '2023-24', '2023-24', '2023-24',
-                     '2023-24', '2023-24', '2023-24', '2023-24', '2023-24'],
-            'Season_type': ['Regular Season', 'Regular Season', 'Regular Season', 'Regular Season', 'Regular Season',
-                        'Regular Season', 'Regular Season', 'Regular Season', 'Regular Season', 'Regular Season'],
-            'GP': [60, 74, 58, 73, 79, 70, 68, 69, 52, 72],
-            'MIN': [2100, 2368, 2146, 2482, 2765, 2520, 2312, 2415, 1768, 2520],
-            'PTS': [1740, 2072, 1682, 2336, 2133, 2310, 1768, 2277, 1248, 1728],
-            'FGM': [648, 676, 588, 864, 832, 756, 544, 776, 464, 544],
-            'FGA': [1260, 1480, 1160, 1460, 1580, 1610, 1360, 1480, 928, 1300],
-            'FG3M': [156, 380, 168, 48, 88, 238, 272, 48, 104, 232],
-            'FG3A': [468, 940, 456, 168, 248, 680, 748, 144, 286, 640],
-            'FTM': [288, 340, 328, 560, 380, 560, 408, 676, 216, 408],
-            'FTA': [330, 368, 374, 750, 460, 656, 440, 770, 248, 456],
-            'OREB': [48, 36, 24, 205, 198, 70, 42, 138, 56, 44],
-            'DREB': [414, 325, 372, 708, 774, 520, 238, 660, 282, 412],
-            'REB': [462, 361, 396, 913, 972, 590, 280, 798, 338, 456],
-            'AST': [534, 518, 354, 450, 776, 588, 496, 370, 226, 684],
-            'STL': [78, 81, 64, 94, 110, 116, 74, 70, 82, 104],
-            'BLK': [54, 26, 72, 94, 82, 46, 28, 128, 44, 42],
-            'TOV': [228, 236, 186, 248, 304, 290, 198, 226, 158, 264],
-            'PF': [114, 168, 138, 192, 220, 174, 150, 240, 122, 184]
-        })
-    
-    if 'season_start_year' not in data.columns:
-        data['season_start_year'] = data['year'].str[:4].astype(int)
-    
-    data['TEAM'].replace(to_replace=['NOP', 'NOH'], value='NO', inplace=True)
+    return load_dataset(DATA_PATH)
+
+@cached(st.cache_resource(show_spinner=False, max_entries=2), "partitioned_store")
+def load_partitioned_store(fingerprint):
+    # Shared handle on the (season, season type) partitions, each one is read on first use
+    if fingerprint == "sample":
+        return PartitionedStore.from_frame(load_data(fingerprint))
+    return open_partitioned_store(DATA_PATH)
+
+@st.cache_resource(show_spinner=False)
+def get_prebuilt_tables():
+    # (season, season hash) -> tables built by warm_season_tables(), handed over to the per-season cache
+    return {}
+
+@cached(st.cache_resource(show_spinner=False, max_entries=256), "season_tables")
+def build_season_tables(_store, season, season_hash):
+    """
+    Builds the derived tables for a single season from that season's partitions only.
     
-    rs_df = data[data['Season_type'] == 'Regular Season']
-    playoffs_df = data[data['Season_type'] == 'Playoffs']
+    The cache key is the season's content hash rather than the whole file's, so when new
+    rows land only the seasons they touch are rebuilt. The tables are held once per process
+    and handed to every session as is, so callers must treat them as read-only.
     
-    total_cols = ['MIN', 'FGM', 'FGA', 'FG3M', 'FG3A', 'FTM', 'FTA',
-                  'OREB', 'DREB', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS']
+    Parameters:
+    _store (PartitionedStore): Partitions to read from (not part of the cache key)
+    season (int): Season start year
+    season_hash (str): Content hash of the season's partitions
     
-    return data, rs_df, playoffs_df, total_cols
+    Returns:
+    tuple: season_rows, season_per_min (sorted by player name), season_team_stats
+    """
+    get_built_seasons().add((season, season_hash))
+    prebuilt = get_prebuilt_tables().pop((season, season_hash), None)
+    if prebuilt is not None:
+        return prebuilt
+    return create_season_tables(_store.read(season), total_cols)
 
-# Update this line to call load_data() without arguments
-data, rs_df, playoffs_df, total_cols = load_data()
+def get_season_tables(store, season):
+    return build_season_tables(store, season, store.season_hash(season))
 
-def create_per_min_stats(data, total_cols):
-    # First, ensure 'year' is in the right format
-    if 'season_start_year' in data.columns:
-        data['year'] = data.apply(lambda row: f"{row['season_start_year']}-{str(row['season_start_year']+1)[2:]}", axis=1)
-    
-    # Group by player and year to aggregate stats
-    data_per_min = data.groupby(['PLAYER', 'year'])[total_cols].sum().reset_index()
-    
-    # Filter out players with minimal minutes to avoid division issues
-    data_per_min = data_per_min[data_per_min['MIN'] >= 50]
+@st.cache_resource(show_spinner=False)
+def get_built_seasons():
+    # (season, season hash) pairs build_season_tables() has run for, i.e. held by the season_tables cache
+    return set()
+
+def warm_season_tables(store):
+    """
+    Fills the per-season cache for every season of the store, building the missing seasons
+    over a pool (create_all_season_tables() on BUILD_EXECUTOR, sized by NBA_BUILD_WORKERS).
     
-    # Calculate per-minute stats
-    for col in total_cols:
-        if col != 'MIN':  # Don't normalize minutes by minutes
-            data_per_min[col] = data_per_min[col]/data_per_min['MIN']
+    Tables handed over for a season the cache already holds (built meanwhile by another
+    session) are dropped afterwards, and the built set keeps only the current seasons.
     
-    # Add shooting percentages
-    if all(col in total_cols for col in ['FGM', 'FGA']):
-        data_per_min['FG%'] = data_per_min['FGM']/data_per_min['FGA']
+    Parameters:
+    store (PartitionedStore): Partitions to build from
     
-    if all(col in total_cols for col in ['FG3M', 'FG3A']):
-        data_per_min['3PT%'] = data_per_min['FG3M']/data_per_min['FG3A']
+    Returns:
+    list: The tables of every season, in season order
+    """
+    built = get_built_seasons()
+    keys = [(season, store.season_hash(season)) for season in store.seasons]
+    missing = [season for season, season_hash in keys if (season, season_hash) not in built]
+    handed = []
+    prebuilt = get_prebuilt_tables()
+    if len(missing) > 1:
+        for season, tables in create_all_season_tables(store, missing, executor=BUILD_EXECUTOR).items():
+            prebuilt[(season, store.season_hash(season))] = tables
+            handed.append((season, store.season_hash(season)))
     
-    if all(col in total_cols for col in ['FTM', 'FTA']):
-        data_per_min['FT%'] = data_per_min['FTM']/data_per_min['FTA']
+    try:
+        season_tables = [build_season_tables(store, season, season_hash) for season, season_hash in keys]
+    finally:
+        for key in handed:
+            prebuilt.pop(key, None)
+    built.intersection_update(keys)
+    return season_tables
+
+@cached(st.cache_resource(show_spinner=False, max_entries=256), "season_index")
+def build_season_index(_store, season, season_hash):
+    # Shared, read-only index over one season's per-minute table
+    return PlayerSeasonIndex(build_season_tables(_store, season, season_hash)[1])
+
+@cached(st.cache_resource(show_spinner=False, max_entries=256), "season_leaderboard")
+def build_season_leaderboard(_store, season, season_hash):
+    # Shared, read-only ranking of one season's per-minute table, sort orders kept per metric
+    from leaderboard import SeasonLeaderboard
+    return SeasonLeaderboard(build_season_tables(_store, season, season_hash)[1])
+
+@cached(st.cache_resource(show_spinner=False, max_entries=256), "season_distributions")
+def build_season_distributions(_store, season, season_hash):
+    """
+    League-wide distributions of one season's player (per-minute) and team metrics.
     
-    # Add other advanced metrics
-    if all(col in total_cols for col in ['FG3A', 'FGA']):
-        data_per_min['FG3A%'] = data_per_min['FG3A']/data_per_min['FGA']
+    Parameters:
+    _store (PartitionedStore): Partitions to read from (not part of the cache key)
+    season (int): Season start year
+    season_hash (str): Content hash of the season's partitions
     
-    if all(col in total_cols for col in ['PTS', 'FGA']):
-        data_per_min['PTS/FGA'] = data_per_min['PTS']/data_per_min['FGA']
+    Returns:
+    tuple: player MetricDistributions, team MetricDistributions
+    """
+    _, season_per_min, season_team_stats = build_season_tables(_store, season, season_hash)
+    return MetricDistributions(season_per_min), MetricDistributions(season_team_stats)
+
+@cached(st.cache_resource(show_spinner="Preparing NBA statistics...", max_entries=2), "derived_tables")
+def build_derived_tables(fingerprint):
+    """
+    Builds the full-history tables, once per dataset fingerprint.
     
-    if all(col in total_cols for col in ['FG3M', 'FGM']):
-        data_per_min['FG3M/FGM'] = data_per_min['FG3M']/data_per_min['FGM']
+    Every table is season-local, so they are stitched together from the per-season
+    tables and an update only recomputes the seasons whose content changed. Only the two
+    tables the cross-season indexes are built from are kept (team totals come from the team
+    cube); they hold a second copy of those rows, so that each index built on a data change
+    doesn't concatenate every season again.
     
-    if all(col in total_cols for col in ['FTA', 'FGA']):
-        data_per_min['FTA/FGA'] = data_per_min['FTA']/data_per_min['FGA']
+    Parameters:
+    fingerprint (str): Content hash of the source CSV, used as the cache key
     
-    if all(col in total_cols for col in ['PTS', 'FGA', 'FTA']):
-        data_per_min['TRU%'] = 0.5*data_per_min['PTS']/(data_per_min['FGA']+0.475*data_per_min['FTA'])
+    Returns:
+    tuple: data, data_per_min
+    """
+    store = load_partitioned_store(fingerprint)
+    season_tables = warm_season_tables(store)
     
-    if all(col in total_cols for col in ['AST', 'TOV']):
-        data_per_min['AST_TOV'] = data_per_min['AST']/data_per_min['TOV'].replace(0, 0.001)  # Avoid division by zero
+    data = concat_tables(rows for rows, _, _ in season_tables)
+    data_per_min = concat_tables(per_min for _, per_min, _ in season_tables)
     
-    return data_per_min
+    return data, data_per_min
+
+@cached(st.cache_resource(show_spinner=False, max_entries=2), "team_cube")
+def build_team_cube(fingerprint):
+    # Dense team x season x season type x metric array with roll-ups, sliced by index on every rerun
+    from team_cube import TeamSeasonCube
+    return TeamSeasonCube(build_derived_tables(fingerprint)[0])
+
+@cached(st.cache_resource(show_spinner=False, max_entries=2), "player_explorer")
+def build_player_explorer(fingerprint):
+    # Every player-season of the per-minute table with its main team, metric columns kept as float32 once computed
+    from explorer import PlayerSeasonExplorer
+    data, data_per_min = build_derived_tables(fingerprint)
+    return PlayerSeasonExplorer(data_per_min, data)
+
+@cached(st.cache_resource(show_spinner=False, max_entries=2), "player_index")
+def build_player_index(fingerprint):
+    # Shared, read-only index over the raw player rows of every season, used for careers
+    data = build_derived_tables(fingerprint)[0]
+    return PlayerSeasonIndex(data)
+
+@cached(st.cache_resource(show_spinner=False, max_entries=2), "name_index")
+def build_name_index(fingerprint):
+    # Prefix/trigram name search over every player that has a per-minute row in some season
+    from name_index import PlayerNameIndex
+    data_per_min = build_derived_tables(fingerprint)[1]
+    return PlayerNameIndex(data_per_min)
 
-data_per_min = create_per_min_stats(data, total_cols)
+@cached(st.cache_resource(show_spinner=False, max_entries=2), "similarity_index")
+def build_similarity_index(fingerprint):
+    # Standardized float32 matrix over every player-season of the per-minute table
+    from similarity import PlayerSimilarityIndex
+    data_per_min = build_derived_tables(fingerprint)[1]
+    return PlayerSimilarityIndex(data_per_min)
 
-def preprocess_nba_data(data):
+@cached(st.cache_resource(show_spinner=False, max_entries=2), "league_trends")
+def build_league_trends(fingerprint):
+    data = build_derived_tables(fingerprint)[0]
+    return create_league_trends(data, total_cols)
+
+def get_games_fingerprint():
+    # Size and mtime only: hashing a full league of game logs on every rerun would cost more than the charts
+    try:
+        stat = os.stat(GAMES_PATH)
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+@cached(st.cache_resource(show_spinner="Loading game logs...", max_entries=1), "rolling_form")
+def build_rolling_form(games_fingerprint):
     """
-    Preprocesses NBA data to ensure consistent formatting and handle common issues.
+    Shared, read-only rolling-window indexes over the game logs.
     
     Parameters:
-    data (pandas.DataFrame): The raw NBA data
+    games_fingerprint (str): Size and mtime of the game log file, used as the cache key
     
     Returns:
-    pandas.DataFrame: Cleaned and preprocessed data
+    tuple: player RollingForm, team RollingForm (None when the file has no game identifier)
     """
-    # Create a copy to avoid modifying the original
-    df = data.copy()
-    
-    # Check for column names that need to be standardized
-    column_map = {
-        'PLAYER_NAME': 'PLAYER',
-        'PLAYER ID': 'PLAYER_ID',
-        'TEAM_ABBREVIATION': 'TEAM',
-        'GAMES PLAYED': 'GP',
-        'MINUTES': 'MIN',
-        'POINTS': 'PTS',
-        'FIELD_GOALS_MADE': 'FGM',
-        'FIELD_GOALS_ATTEMPTED': 'FGA',
-        'FIELD_GOAL_PERCENTAGE': 'FG_PCT',
-        'THREE_POINTS_MADE': 'FG3M',
-        'THREE_POINTS_ATTEMPTED': 'FG3A',
-        'THREE_POINT_PERCENTAGE': 'FG3_PCT',
-        'FREE_THROWS_MADE': 'FTM',
-        'FREE_THROWS_ATTEMPTED': 'FTA',
-        'FREE_THROW_PERCENTAGE': 'FT_PCT',
-        'OFFENSIVE_REBOUNDS': 'OREB',
-        'DEFENSIVE_REBOUNDS': 'DREB',
-        'REBOUNDS': 'REB',
-        'ASSISTS': 'AST',
-        'STEALS': 'STL',
-        'BLOCKS': 'BLK',
-        'TURNOVERS': 'TOV',
-        'PERSONAL_FOULS': 'PF',
-    }
-    
-    # Apply the column mapping for columns that exist
-    for old_col, new_col in column_map.items():
-        if old_col in df.columns and new_col not in df.columns:
-            df[new_col] = df[old_col]
-    
-    # Handle season format
-    if 'season_start_year' not in df.columns:
-        if 'year' in df.columns:
-            # Try to extract the season start year from the 'year' column
-            try:
-                df['season_start_year'] = df['year'].astype(str).str.split('-').str[0].astype(int)
-            except:
-                # If that fails, try to handle year in a different format
-                pass
-    
-    # Handle team abbreviations
-    if 'TEAM' in df.columns:
-        # Standardize team abbreviations
-        team_map = {
-            'NOP': 'NO',
-            'NOH': 'NO',
-            'BRK': 'BKN',
-            'PHO': 'PHX',
-            'CHH': 'CHA',
-            'UTH': 'UTA'
-        }
-        
-        df['TEAM'].replace(team_map, inplace=True)
-    
-    # Create a standard year column if needed
-    if 'year' not in df.columns and 'season_start_year' in df.columns:
-        df['year'] = df['season_start_year'].astype(str) + '-' + df['season_start_year'].add(1).astype(str).str[-2:]
-    
-    # Make sure Season_type is standardized
-    if 'Season_type' not in df.columns:
-        if 'SEASON_TYPE' in df.columns:
-            df['Season_type'] = df['SEASON_TYPE']
-        else:
-            # Default to Regular Season if not specified
-            df['Season_type'] = 'Regular Season'
-    
-    return df
+    from game_logs import RollingForm, load_game_logs, team_game_logs
+    games = load_game_logs(GAMES_PATH)
+    team_form = RollingForm(team_game_logs(games), 'TEAM') if games.attrs['game_order'] is not None else None
+    return RollingForm(games, 'PLAYER_ID'), team_form
 
-# Add this line after loading the data
-data = preprocess_nba_data(data)
+def refresh_dataset():
+    # Runs on the watcher thread, outside any script run, so no Streamlit calls: only the Parquet partitions of
+    # the new contents are written. The caches are keyed by content hash, so the next script run sees the new
+    # fingerprint and rebuilds just the seasons whose hash changed
+    if os.path.exists(DATA_PATH):
+        open_partitioned_store(DATA_PATH)
 
-def create_team_season_stats(data, total_cols):
-    team_stats = data.groupby(['TEAM', 'season_start_year'])[total_cols + ['GP']].sum().reset_index()
-    
-    team_stats['POSS_est'] = team_stats['FGA'] - team_stats['OREB'] + team_stats['TOV'] + 0.44 * team_stats['FTA']
-    team_stats['PACE'] = team_stats['POSS_est'] / team_stats['GP'] / 48 * 40  
-    team_stats['ORtg'] = team_stats['PTS'] / team_stats['POSS_est'] * 100  
-    
-    team_stats['AST_ratio'] = team_stats['AST'] / team_stats['FGM']
-    team_stats['FG3_ratio'] = team_stats['FG3A'] / team_stats['FGA']
-    team_stats['FG_PCT'] = team_stats['FGM'] / team_stats['FGA']
-    team_stats['FG3_PCT'] = team_stats['FG3M'] / team_stats['FG3A']
-    team_stats['PTS_per_POSS'] = team_stats['PTS'] / team_stats['POSS_est']
-    
-    return team_stats
+@st.cache_resource(show_spinner=False)
+def start_dataset_watcher():
+    # One polling watcher per process, new data is picked up without a restart
+    return DatasetWatcher(DATA_PATH, on_change=refresh_dataset, incoming_dir=INCOMING_DIR).start()
+
+@st.cache_resource(show_spinner=False)
+def get_session_registry():
+    # session id -> (last run, weak reference to the session's state), for the memory report on the diagnostics page
+    return {}
+
+def register_session():
+    # Only a timestamp and a reference per rerun, the state is measured when the diagnostics page asks for it
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    registry = get_session_registry()
+    now = time.time()
+    registry[ctx.session_id] = (now, weakref.ref(ctx.session_state))
+    for session_id, (last_run, _) in list(registry.items()):
+        if now - last_run > SESSION_IDLE_SECONDS:
+            registry.pop(session_id, None)
 
-team_season_stats = create_team_season_stats(data, total_cols)
+def session_state_bytes(session_state):
+    total = 0
+    for value in list(session_state.filtered_state.values()):
+        try:
+            total += len(pickle.dumps(value))
+        except Exception:
+            pass
+    return total
 
-team_names = {
-    'ATL': 'Atlanta Hawks', 'BOS': 'Boston Celtics', 'BKN': 'Brooklyn Nets', 
-    'CHA': 'Charlotte Hornets', 'CHI': 'Chicago Bulls', 'CLE': 'Cleveland Cavaliers', 
-    'DAL': 'Dallas Mavericks', 'DEN': 'Denver Nuggets', 'DET': 'Detroit Pistons', 
-    'GSW': 'Golden State Warriors', 'HOU': 'Houston Rockets', 'IND': 'Indiana Pacers', 
-    'LAC': 'LA Clippers', 'LAL': 'Los Angeles Lakers', 'MEM': 'Memphis Grizzlies', 
-    'MIA': 'Miami Heat', 'MIL': 'Milwaukee Bucks', 'MIN': 'Minnesota Timberwolves', 
-    'NO': 'New Orleans Pelicans', 'NYK': 'New York Knicks', 'OKC': 'Oklahoma City Thunder', 
-    'ORL': 'Orlando Magic', 'PHI': 'Philadelphia 76ers', 'PHX': 'Phoenix Suns', 
-    'POR': 'Portland Trail Blazers', 'SAC': 'Sacramento Kings', 'SAS': 'San Antonio Spurs', 
-    'TOR': 'Toronto Raptors', 'UTA': 'Utah Jazz', 'WAS': 'Washington Wizards'
-}
+@st.cache_resource(show_spinner=False)
+def get_figure_cache():
+    # Figures are keyed by content hashes, so one process-wide cache never serves stale data
+    from figures import FigureCache
+    return FigureCache(max_entries=FIGURE_CACHE_SIZE)
 
+run_started = time.perf_counter()
+
+data_fingerprint = get_data_fingerprint()
+store = load_partitioned_store(data_fingerprint)
+start_dataset_watcher()
+register_session()
+
+# Images load straight from their CDNs so the browser caches them under the CDNs' headers;
+# Streamlit's static file route sends no Cache-Control
 st.sidebar.image("https://cdn.freebiesupply.com/images/large/2x/nba-logo-transparent.png", width=120)
 st.sidebar.markdown("## NBA Analytics Dashboard")
 st.sidebar.markdown("Explore NBA statistics from 2012-2024 with interactive visualizations and comparisons.")
 
 page = st.sidebar.selectbox(
     "Choose a section",
-    ["Introduction", "League Trends", "Team Analysis", "Player Comparisons", "About the Project"]
+    ["Introduction", "League Trends", "Team Analysis", "Player Comparisons", "Leaderboards", "Player Explorer",
+     "About the Project"]
 )
 
+# Not in the menu, opened with ?diagnostics=1
+if st.query_params.get("diagnostics") == "1":
+    page = "Diagnostics"
+
 st.sidebar.markdown("---")
 st.sidebar.markdown("### Data Abbreviations")
 with st.sidebar.expander("View NBA Statistical Abbreviations"):
@@ -383,101 +448,71 @@ st.sidebar.markdown("---")
 st.sidebar.info("This dashboard is a showcase project for data analysis and visualization skills using NBA data from 2012-2024.")
 st.sidebar.markdown("© 2025 - NBA Analytics Project")
 
-if page == "Introduction":
-    st.markdown('<h1 class="main-header">NBA Analytics: Evolution of the Game (2012-2024)</h1>', unsafe_allow_html=True)
+def remember(key, default, options=None):
+    """
+    Restores a widget's value from session state and returns the widget key to pass to it.
     
-    col1, col2 = st.columns([2, 1])
+    Streamlit drops a widget's state once a run doesn't render it, e.g. after switching pages,
+    so the value is kept under a plain key as well and copied back with store_widget().
     
-    with col1:
-        st.markdown('<h2 class="sub-header">Project Overview</h2>', unsafe_allow_html=True)
+    Parameters:
+    key (str): Session state key holding the value
+    default: Value used the first time, or when the stored one is no longer in options
+    options (list): Valid values, if the widget has a fixed set of them
+    
+    Returns:
+    str: Key for the widget
+    """
+    value = st.session_state.get(key, default)
+    if options is not None and value not in options:
+        value = default
+    st.session_state[key] = value
+    st.session_state[f"_{key}"] = value
+    return f"_{key}"
 
-        st.write("This interactive dashboard explores NBA data from the 2012-2024 seasons, analyzing trends in playing style, team strategies, and player performance. The analysis reveals how the NBA game has evolved, particularly with the rise of three-point shooting and changes in offensive efficiency.")
+def store_widget(key):
+    # on_change callback for widgets set up with remember()
+    st.session_state[key] = st.session_state[f"_{key}"]
 
-        st.markdown('<h3>Key Features:</h3>', unsafe_allow_html=True)
-        st.markdown("""
-        - Track the league-wide evolution of playing styles and strategies
-        - Compare team performance metrics and playing styles
-        - Analyze individual player statistics and career trajectories
-        - Explore the shift toward perimeter shooting and its impact on the game
-        """)
+def store_leaderboard_filter(key):
+    # on_change callback for the leaderboard's sort and filter widgets: a new ordering starts on page 1
+    store_widget(key)
+    st.session_state['leaders_page'] = 1
 
-        st.write("Use the sidebar to navigate between different sections of the analysis.")
-        
-    with col2:
-        st.image("https://cdn.nba.com/manage/2021/08/NBA-Ball-Global-500x500.jpg", width=300)
-    
-    st.markdown('<h2 class="sub-header">Dashboard Highlights</h2>', unsafe_allow_html=True)
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.markdown("""
-        <div class="metric-card">
-            <div class="metric-value">36%</div>
-            <div class="metric-label">Increase in 3-point attempts since 2012</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown("""
-        <div class="metric-card">
-            <div class="metric-value">12%</div>
-            <div class="metric-label">Rise in offensive efficiency (points per 100 possessions)</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown("""
-        <div class="metric-card">
-            <div class="metric-value">30</div>
-            <div class="metric-label">Teams analyzed across 12 seasons of data</div>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("""
-    
-        <h3>Data Collection and Methodology</h3>
-        <p>This dataset was scraped from the official NBA website and includes detailed statistics for all NBA players and teams from the 2012-2013 through 2023-2024 seasons. The data covers both regular season and playoff games.</p>
-            """,unsafe_allow_html=True)
+def store_explorer_filter(key):
+    # on_change callback for the explorer's axis and filter widgets: a zoomed-in range only applies to the chart it was drawn on
+    store_widget(key)
+    st.session_state.pop('explorer_zoom', None)
 
-    st.markdown("""
-    <h3>The analysis includes:</h3>
-    - Advanced statistical metrics like True Shooting Percentage and Possession Estimation
-    - Normalized statistics for fair comparisons across different playing times
-    - Visualization of trends and patterns using interactive charts
-    """,unsafe_allow_html=True)
+def store_explorer_zoom():
+    # on_select callback of the explorer chart: the selected box becomes the plotted range, fetched again at full detail
+    boxes = st.session_state['explorer_chart'].selection.get('box') or []
+    if boxes:
+        st.session_state['explorer_zoom'] = (tuple(sorted(boxes[-1]['x'])), tuple(sorted(boxes[-1]['y'])))
 
+def show_chart(fig):
+    # Streamlit serializes the figure to JSON here, timed apart from building it
+    with stage("chart.render"):
+        st.plotly_chart(fig, width="stretch")
 
-elif page == "League Trends":
-    st.markdown('<h1 class="main-header">NBA League Trends (2012-2024)</h1>', unsafe_allow_html=True)
+@st.fragment
+@timed('section.league_trends')
+def league_trends_section():
+    # Season type changes rerun only this section, not the sidebar or the page header
+    from figures import pace_efficiency_figure, scoring_distribution_figure, three_point_trend_figure
+    league_trends = build_league_trends(data_fingerprint)
+    season_type_options = sorted(league_trends['Season_type'].unique(), key=lambda t: t != 'Regular Season')
+    selected_season_type = st.selectbox("Season type", season_type_options,
+                                        key=remember('season_type', season_type_options[0], season_type_options),
+                                        on_change=store_widget, args=('season_type',))
     
-    st.markdown("""
-        <div class="dashboard-container">
-        <p>This section explores how the NBA game has evolved over the past decade, with particular focus on the rise of three-point shooting, changes in pace of play, and scoring distribution.</p>
-        </div>
-        """, unsafe_allow_html=True)
+    trends = league_trends[league_trends['Season_type'] == selected_season_type]
+    first_season, last_season = trends['season_start_year'].min(), trends['season_start_year'].max()
+    season_range = f"{first_season}-{last_season + 1}"
     
-    st.markdown('<h2 class="sub-header">The Three-Point Revolution</h2>', unsafe_allow_html=True)
+    fig = three_point_trend_figure(trends, season_range)
     
-    seasons = list(range(2012, 2024))
-    three_point_data = pd.DataFrame({
-        'season_start_year': seasons,
-        '3PAr': [0.22, 0.24, 0.26, 0.28, 0.31, 0.34, 0.36, 0.38, 0.39, 0.40, 0.40, 0.41],  # Simulated data
-    })
-    
-    fig = px.line(three_point_data, x='season_start_year', y='3PAr', 
-                title="Evolution of 3-Point Attempt Rate (2012-2024)",
-                markers=True, line_shape='linear')
-    
-    fig.update_layout(
-        xaxis_title="Season",
-        yaxis_title="3-Point Attempt Rate (3PA/FGA)",
-        yaxis=dict(tickformat='.0%'),
-        hovermode="x unified",
-        height=500
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     col1, col2 = st.columns(2)
     
@@ -488,52 +523,9 @@ elif page == "League Trends":
         </div>
         """, unsafe_allow_html=True)
         
-        scoring_data = pd.DataFrame({
-            'season_start_year': seasons,
-            '3PT_pts': [22, 24, 27, 28, 31, 33, 35, 36, 37, 38, 38, 39],  
-            '2PT_pts': [50, 49, 47, 46, 45, 43, 42, 41, 40, 39, 39, 38],
-            'FT_pts': [28, 27, 26, 26, 24, 24, 23, 23, 23, 23, 23, 23]
-        })
-        
-        fig2 = go.Figure()
-        
-        fig2.add_trace(go.Scatter(
-            x=scoring_data['season_start_year'], 
-            y=scoring_data['3PT_pts'],
-            mode='lines',
-            line=dict(width=2, color='rgb(0, 119, 182)'),
-            stackgroup='one',
-            name='Points from 3-pointers'
-        ))
-        
-        fig2.add_trace(go.Scatter(
-            x=scoring_data['season_start_year'], 
-            y=scoring_data['2PT_pts'],
-            mode='lines',
-            line=dict(width=2, color='rgb(223, 42, 42)'),
-            stackgroup='one',
-            name='Points from 2-pointers'
-        ))
+        fig2 = scoring_distribution_figure(trends, season_range)
         
-        fig2.add_trace(go.Scatter(
-            x=scoring_data['season_start_year'], 
-            y=scoring_data['FT_pts'],
-            mode='lines',
-            line=dict(width=2, color='rgb(86, 179, 86)'),
-            stackgroup='one',
-            name='Points from Free Throws'
-        ))
-        
-        fig2.update_layout(
-            title="NBA Scoring Distribution by Point Type (2012-2024)",
-            xaxis_title="Season",
-            yaxis_title="Percentage of Total Points",
-            legend=dict(x=0.01, y=0.99),
-            hovermode="x unified",
-            height=400
-        )
-        
-        st.plotly_chart(fig2, use_container_width=True)
+        show_chart(fig2)
     
         
     with col2:
@@ -543,59 +535,9 @@ elif page == "League Trends":
         </div>
         """, unsafe_allow_html=True)
         
-        pace_data = pd.DataFrame({
-            'season_start_year': seasons,
-            'PACE': [92, 93.5, 93.9, 95.2, 96.5, 97.3, 98.1, 100.2, 99.2, 99.5, 98.8, 100.1],  
-            'ORtg': [105.8, 106.6, 107.9, 108.5, 109.1, 109.3, 110.7, 111.5, 112.8, 113.6, 114.1, 115.2]
-        })
-        
-        fig3 = make_subplots(specs=[[{"secondary_y": True}]])
-        
-        fig3.add_trace(
-            go.Scatter(
-                x=pace_data['season_start_year'],
-                y=pace_data['PACE'],
-                mode='lines+markers',
-                name='Pace (Possessions per 48 min)',
-                marker=dict(color='#17408B')
-            ),
-            secondary_y=False,
-        )
-        
-        fig3.add_trace(
-            go.Scatter(
-                x=pace_data['season_start_year'],
-                y=pace_data['ORtg'],
-                mode='lines+markers',
-                name='Offensive Rating',
-                marker=dict(color='#C9082A')
-            ),
-            secondary_y=True,
-        )
-        
-        fig3.update_layout(
-            title="NBA Game Pace and Offensive Efficiency (2012-2024)",
-            legend=dict(x=0.01, y=0.99),
-            height=400
-        )
-        
-        fig3.update_xaxes(title_text="Season")
+        fig3 = pace_efficiency_figure(trends, season_range)
         
-        fig3.update_yaxes(
-            title_text="Pace (Possessions per 48 min)",
-            title_font=dict(color="#17408B"),
-            tickfont=dict(color="#17408B"),
-            secondary_y=False
-        )
-        
-        fig3.update_yaxes(
-            title_text="Offensive Rating (Points per 100 Possessions)",
-            title_font=dict(color="#C9082A"),
-            tickfont=dict(color="#C9082A"),
-            secondary_y=True
-        )
-        
-        st.plotly_chart(fig3, use_container_width=True)
+        show_chart(fig3)
 
     st.markdown('<h2 class="sub-header">Key Insights from League Trends</h2>', unsafe_allow_html=True)
 
@@ -603,46 +545,68 @@ elif page == "League Trends":
     <div class="dashboard-container">
     """, unsafe_allow_html=True)
     
-    st.markdown("""
-    1. **Three-Point Revolution:** The percentage of field goal attempts from behind the arc has increased by nearly 86% from 2012 to 2024, fundamentally changing offensive strategies.
+    first, last = trends.iloc[0], trends.iloc[-1]
+    ft_trend = "decreased" if last['FT_pts'] < first['FT_pts'] else "increased"
+    st.markdown(f"""
+    1. **Three-Point Revolution:** The percentage of field goal attempts from behind the arc has changed by {last['3PAr'] / first['3PAr'] - 1:.0%} from {first_season} to {last_season}, fundamentally changing offensive strategies.
     
-    2. **Scoring Distribution Shift:** Points from three-pointers now account for approximately 39% of all scoring, up from just 22% in 2012.
+    2. **Scoring Distribution Shift:** Points from three-pointers now account for approximately {last['3PT_pts']:.0f}% of all scoring, compared to {first['3PT_pts']:.0f}% in {first_season}.
     
-    3. **Pace Acceleration:** The average number of possessions per 48 minutes has increased from 92 to over 100, resulting in more opportunities to score.
+    3. **Pace Acceleration:** The estimated number of possessions per 48 minutes went from {first['PACE']:.1f} to {last['PACE']:.1f}, changing the number of opportunities to score.
     
-    4. **Offensive Efficiency Gains:** Teams are scoring more points per 100 possessions than ever before, with the league average offensive rating increasing from 105.8 to 115.2.
+    4. **Offensive Efficiency Gains:** The league average offensive rating moved from {first['ORtg']:.1f} to {last['ORtg']:.1f} points per 100 possessions.
     
-    5. **Free Throw Decline:** The proportion of points from free throws has decreased, suggesting a change in how fouls are called or how players attack defenses.
+    5. **Free Throw Share:** The proportion of points from free throws has {ft_trend} from {first['FT_pts']:.1f}% to {last['FT_pts']:.1f}%, reflecting changes in how fouls are called and how players attack defenses.
     """)
     
     st.markdown("""
     </div>
     """, unsafe_allow_html=True)
-    
-elif page == "Team Analysis":
-    st.markdown('<h1 class="main-header">NBA Team Analysis</h1>', unsafe_allow_html=True)
-    
-    st.markdown("""
-    <div class="dashboard-container">
-        <p>Compare NBA teams based on various performance metrics and playing styles. Select teams and seasons to see detailed comparisons.</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
+
+
+@st.fragment
+@timed('section.team_analysis')
+def team_analysis_section():
+    # Team and season pickers rerun only this section; every table and chart reads slices of the team cube
+    from figures import (league_scatter_figure, team_colors, team_comparison_figure, team_comparison_metrics, team_names,
+                         team_style_labels, team_style_radar_figure, team_trend_figure)
+    from team_cube import ALL
+    figure_cache = get_figure_cache()
+    cube = build_team_cube(data_fingerprint)
     col1, col2 = st.columns(2)
     
-    with col1:
-        team_options = sorted(data['TEAM'].unique())
-        team1 = st.selectbox("Select first team", team_options, index=team_options.index('GSW') if 'GSW' in team_options else 0)
-        team2 = st.selectbox("Select second team", team_options, index=team_options.index('LAL') if 'LAL' in team_options else 1)
-    
     with col2:
-        season_options = sorted(data['season_start_year'].unique())
-        selected_season = st.selectbox("Select season", season_options, index=len(season_options)-1)
+        season_options = cube.seasons
+        selected_season = st.selectbox("Select season", season_options,
+                                       key=remember('team_season', season_options[-1], season_options),
+                                       on_change=store_widget, args=('team_season',))
+        type_options = cube.season_types + [ALL]
+        season_type = st.radio("Season type", type_options, horizontal=True,
+                               key=remember('team_season_type', 'Regular Season' if 'Regular Season' in type_options
+                                            else ALL, type_options),
+                               on_change=store_widget, args=('team_season_type',))
+    
+    season_teams = cube.slice(selected_season, season_type)
+    season_hash = store.season_hash(selected_season)
+    team_options = cube.teams_in(selected_season, season_type)
+    if not team_options:
+        st.info(f"No team played in {season_label(selected_season).iloc[0]} ({season_type}).")
+        return
+    if len(team_options) == 1:
+        st.info(f"Only {team_options[0]} played in {season_label(selected_season).iloc[0]} ({season_type}).")
     
-    team1_data = team_season_stats[(team_season_stats['TEAM'] == team1) & 
-                                  (team_season_stats['season_start_year'] == selected_season)]
-    team2_data = team_season_stats[(team_season_stats['TEAM'] == team2) & 
-                                  (team_season_stats['season_start_year'] == selected_season)]
+    with col1:
+        team1 = st.selectbox("Select first team", team_options,
+                             key=remember('team1', 'GSW' if 'GSW' in team_options else team_options[0], team_options),
+                             on_change=store_widget, args=('team1',))
+        # A slice with a single team compares it with itself
+        second_default = team_options[min(1, len(team_options) - 1)]
+        team2 = st.selectbox("Select second team", team_options,
+                             key=remember('team2', 'LAL' if 'LAL' in team_options else second_default, team_options),
+                             on_change=store_widget, args=('team2',))
+    
+    team1_data = cube.row(team1, selected_season, season_type)
+    team2_data = cube.row(team2, selected_season, season_type)
     
     col1, col2 = st.columns(2)
     
@@ -664,123 +628,36 @@ elif page == "Team Analysis":
     
     # Create comparison visualizations
     if not team1_data.empty and not team2_data.empty:
-        # Define metrics for comparison
-        metrics = ['PTS', 'AST', 'REB', 'STL', 'BLK', 'FG_PCT', 'FG3_PCT', 'AST_ratio']
-        
-        # Prepare data for bar chart
-        teams_data = pd.DataFrame({
-            'Metric': metrics,
-            team1: [team1_data[m].values[0] if not team1_data[m].empty else 0 for m in metrics],
-            team2: [team2_data[m].values[0] if not team2_data[m].empty else 0 for m in metrics]
-        })
-        
-        # Create bar chart comparison
-        fig = px.bar(teams_data, x='Metric', y=[team1, team2], barmode='group',
-                    title=f"Team Comparison: {team1} vs {team2} ({selected_season}-{selected_season+1} Season)",
-                    color_discrete_map={team1: team_colors.get(team1, '#000'), team2: team_colors.get(team2, '#000')})
-        
-        fig.update_layout(
-            xaxis_title="Metric",
-            yaxis_title="Value",
-            legend_title="Team",
-            height=500,
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            )
+        fig = figure_cache.get_or_build(
+            ('team_comparison', season_hash, selected_season, season_type, team1, team2),
+            lambda: team_comparison_figure(team1_data, team2_data, team1, team2, selected_season)
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
         
         # Radar chart comparison for playing style
-        style_metrics = ['PACE', 'ORtg', 'FG3_ratio', 'AST_ratio', 'PTS_per_POSS']
-        style_labels = {
-            'PACE': 'Pace of Play', 
-            'ORtg': 'Offensive Rating', 
-            'FG3_ratio': '3PT Attempt Rate', 
-            'AST_ratio': 'Assist Ratio', 
-            'PTS_per_POSS': 'Scoring Efficiency'
-        }
-        
-        # Normalize values for radar chart
-        max_vals = {}
-        for metric in style_metrics:
-            if metric in team1_data.columns and metric in team2_data.columns:
-                max_vals[metric] = max(
-                    team1_data[metric].values[0] if not team1_data[metric].empty else 0,
-                    team2_data[metric].values[0] if not team2_data[metric].empty else 0
-                ) * 1.1  # Add 10% buffer
-        
-        team1_values = []
-        team2_values = []
-        
-        for metric in style_metrics:
-            if metric in team1_data.columns and metric in team2_data.columns:
-                team1_val = team1_data[metric].values[0] if not team1_data[metric].empty else 0
-                team2_val = team2_data[metric].values[0] if not team2_data[metric].empty else 0
-                
-                # Normalize to 0-1 scale
-                team1_values.append(team1_val / max_vals[metric])
-                team2_values.append(team2_val / max_vals[metric])
-        
-        fig_radar = go.Figure()
-        
-        fig_radar.add_trace(go.Scatterpolar(
-            r=team1_values,
-            theta=[style_labels[m] for m in style_metrics],
-            fill='toself',
-            name=team1,
-            line_color=team_colors.get(team1, '#000')
-        ))
-        
-        fig_radar.add_trace(go.Scatterpolar(
-            r=team2_values,
-            theta=[style_labels[m] for m in style_metrics],
-            fill='toself',
-            name=team2,
-            line_color=team_colors.get(team2, '#000')
-        ))
-        
-        fig_radar.update_layout(
-            polar=dict(
-                radialaxis=dict(
-                    visible=True,
-                    range=[0, 1]
-                )
-            ),
-            title="Team Playing Style Comparison",
-            showlegend=True,
-            height=500
+        style_max = {metric: cube.max(metric, selected_season, season_type) * 1.1 for metric in team_style_labels}
+        fig_radar = figure_cache.get_or_build(
+            ('team_style_radar', season_hash, selected_season, season_type, team1, team2),
+            lambda: team_style_radar_figure(team1_data, team2_data, team1, team2, style_max)
         )
         
-        st.plotly_chart(fig_radar, use_container_width=True)
+        show_chart(fig_radar)
+        
+        st.markdown('<h2 class="sub-header">Recent Form</h2>', unsafe_allow_html=True)
+        rolling_form_section('team', [team1, team2], [team1, team2], selected_season)
         
         # Team efficiency visualization - Pace vs. Offensive Rating for all teams
         st.markdown('<h2 class="sub-header">League-wide Team Performance</h2>', unsafe_allow_html=True)
         
-        # Get all teams for the selected season
-        season_teams = team_season_stats[team_season_stats['season_start_year'] == selected_season]
-        
         # Create scatter plot of pace vs. offensive rating
-        fig_scatter = px.scatter(season_teams, x='PACE', y='ORtg',
-                                text='TEAM', size='PTS',
-                                title=f"Team Pace vs. Offensive Efficiency ({selected_season}-{selected_season+1} Season)",
-                                labels={'PACE': 'Pace (Possessions per 48 min)', 
-                                        'ORtg': 'Offensive Rating (Points per 100 Possessions)'},
-                                color='PTS',
-                                color_continuous_scale='Viridis')
-        
-        fig_scatter.update_traces(textposition='top center', marker=dict(opacity=0.8))
-        fig_scatter.update_layout(
-            height=600,
-            xaxis=dict(range=[min(season_teams['PACE'])*0.98, max(season_teams['PACE'])*1.02]),
-            yaxis=dict(range=[min(season_teams['ORtg'])*0.98, max(season_teams['ORtg'])*1.02])
+        # Only depends on the season, so every team pairing shares one entry
+        fig_scatter = figure_cache.get_or_build(
+            ('league_scatter', season_hash, selected_season, season_type),
+            lambda: league_scatter_figure(season_teams, selected_season)
         )
         
-        st.plotly_chart(fig_scatter, use_container_width=True)
+        show_chart(fig_scatter)
         
         # Add explanation of the chart
         st.markdown("""
@@ -797,34 +674,128 @@ elif page == "Team Analysis":
         </ul>
         </div>
         """, unsafe_allow_html=True)
-    
+
+        # Both teams through every season: one row of the cube each, no filtering of the team table
+        st.markdown('<h2 class="sub-header">Multi-season Trends</h2>', unsafe_allow_html=True)
+        trend_options = list(team_style_labels) + [metric for metric in team_comparison_metrics
+                                                   if metric not in team_style_labels]
+        trend_metric = st.selectbox("Metric", trend_options,
+                                    key=remember('team_trend_metric', 'ORtg', trend_options),
+                                    format_func=lambda metric: team_style_labels.get(metric, metric),
+                                    on_change=store_widget, args=('team_trend_metric',))
+        fig_trend = figure_cache.get_or_build(
+            ('team_trend', data_fingerprint, season_type, trend_metric, team1, team2),
+            lambda: team_trend_figure(cube.seasons, {team: cube.series(team, trend_metric, season_type)
+                                                     for team in (team1, team2)}, trend_metric)
+        )
+
+        show_chart(fig_trend)
+
     else:
         st.warning("No data available for the selected teams and season combination.")
-        
 
 
-# Fixed Player Comparisons Section
-if page == "Player Comparisons":
-    st.markdown('<h1 class="main-header">NBA Player Comparisons</h1>', unsafe_allow_html=True)
-    
-    st.markdown("""
-    <div class="dashboard-container">
-        <p>Compare NBA players' statistics and performance metrics. Select players to visualize their strengths, 
-        weaknesses, and how they stack up against each other.</p>
-    </div>
-    """, unsafe_allow_html=True)
+@timed('section.rolling_form')
+def rolling_form_section(kind, entity_ids, labels, selected_season):
+    # Rolling 5/10/20-game form through one season, for one player or for two teams. A plain function, not a
+    # fragment: it runs inside the team and player sections, whose fragment reruns take its widgets along
+    from figures import rolling_form_figure
+    from game_logs import FORM_METRICS, GAME_ORDER_COLS, ROLLING_WINDOWS
+    games_fingerprint = get_games_fingerprint()
+    if games_fingerprint is None:
+        st.info(f"Add game-level box scores at {GAMES_PATH} (or set NBA_GAMES_PATH) to see rolling form.")
+        return
+    
+    player_form, team_form = build_rolling_form(games_fingerprint)
+    form = player_form if kind == 'player' else team_form
+    if form is None:
+        st.info(f"Team form needs a game identifier in {GAMES_PATH}: one of {', '.join(GAME_ORDER_COLS)}.")
+        return
     
-    # Ensure data_per_min has data before proceeding
-    if data_per_min.empty:
-        st.warning("No player statistics available. Recreating player statistics...")
-        data_per_min = create_per_min_stats(data, total_cols)
-    
-    # Check if we now have data
-    if data_per_min.empty:
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        metric = st.selectbox("Metric", FORM_METRICS, key=remember(f'{kind}_form_metric', 'PTS', FORM_METRICS),
+                              on_change=store_widget, args=(f'{kind}_form_metric',))
+    with col2:
+        season_types = sorted({season_type for entity_id in entity_ids
+                               for season, season_type in form.seasons_of(entity_id) if season == selected_season})
+        if not season_types:
+            st.info(f"No game logs for {season_label(selected_season).iloc[0]}.")
+            return
+        season_type = st.radio("Games", season_types, horizontal=True,
+                               key=remember(f'{kind}_form_type', season_types[-1], season_types),
+                               on_change=store_widget, args=(f'{kind}_form_type',))
+    with col3:
+        # One window per line keeps two teams readable, a single player gets all three
+        if kind == 'player':
+            windows = ROLLING_WINDOWS
+        else:
+            windows = (st.select_slider("Window (games)", ROLLING_WINDOWS,
+                                        key=remember('team_form_window', 10, list(ROLLING_WINDOWS)),
+                                        on_change=store_widget, args=('team_form_window',)),)
+    
+    title = f"{' vs '.join(labels)} Rolling Form, {season_label(selected_season).iloc[0]} {season_type}"
+    fig = get_figure_cache().get_or_build(
+        ('rolling_form', games_fingerprint, kind, entity_ids, selected_season, season_type, metric, windows),
+        lambda: rolling_form_figure({label: form.trajectory(entity_id, selected_season, season_type, windows)
+                                     for entity_id, label in zip(entity_ids, labels)}, metric, title)
+    )
+    show_chart(fig)
+
+@st.fragment
+@timed('section.similar_players')
+def similar_players_section(selected_players, selected_season, player_names):
+    # The similarity picker and slider rerun only this block
+    st.markdown('<h2 class="sub-header">Find Similar Players</h2>', unsafe_allow_html=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        similar_to = st.selectbox(
+            "Find player-seasons similar to",
+            selected_players,
+            format_func=lambda player_id: player_names.get(player_id, str(player_id)),
+            key=remember('similar_to', selected_players[0], selected_players),
+            on_change=store_widget, args=('similar_to',)
+        )
+    with col2:
+        n_similar = st.slider("Number of matches", min_value=5, max_value=25,
+                              key=remember('similar_count', 10, range(5, 26)),
+                              on_change=store_widget, args=('similar_count',))
+
+    # Skip short stints, their per-minute numbers are mostly noise
+    similar = build_similarity_index(data_fingerprint).similar_players(
+        similar_to, selected_season, k=n_similar, min_minutes=500
+    )
+
+    if similar.empty:
+        st.warning(f"No comparable player-seasons found for {player_names.get(similar_to, similar_to)}.")
+    else:
+        similar_df = pd.DataFrame({
+            'Player': similar['PLAYER'].to_numpy(),
+            'Season': similar['year'].to_numpy(),
+            'Minutes': similar['MIN'].to_numpy(),
+            'PTS/36': (similar['PTS'] * 36).round(1).to_numpy(),
+            'REB/36': (similar['REB'] * 36).round(1).to_numpy(),
+            'AST/36': (similar['AST'] * 36).round(1).to_numpy(),
+            'True Shooting %': similar['TRU%'].to_numpy(),
+            'Distance': similar['distance'].round(2).to_numpy(),
+        })
+        st.dataframe(similar_df, width="stretch", hide_index=True,
+                     column_config={'True Shooting %': st.column_config.NumberColumn(format="percent")})
+
+
+@st.fragment
+@timed('section.player_comparisons')
+def player_comparisons_section():
+    # Season, search and player picks rerun only this section; picks and the graphs toggle live in session state.
+    from figures import career_trajectory_figure, player_radar_figure
+    figure_cache = get_figure_cache()
+    # Check that we have data before proceeding
+    if not store.partitions:
         st.error("Unable to generate player statistics. Please check the data format.")
     else:
         # Display available seasons
-        available_seasons = sorted(data['season_start_year'].unique())
+        available_seasons = store.seasons
         if not available_seasons:
             st.error("No seasons found in the data.")
         else:
@@ -832,68 +803,73 @@ if page == "Player Comparisons":
             
             with col1:
                 # Season selection first
-                selected_season = st.selectbox("Select season for comparison", available_seasons, 
-                                              index=len(available_seasons)-1)
+                selected_season = st.selectbox("Select season for comparison", available_seasons,
+                                              key=remember('player_season', available_seasons[-1], available_seasons),
+                                              on_change=store_widget, args=('player_season',))
                 
                 # Convert season to the format used in 'year' column (e.g., 2023 to "2023-24")
                 season_year_str = f"{selected_season}-{str(selected_season+1)[2:]}"
-                
-                # For robustness, also check alternative format if no data is found
-                alternative_season_format = f"{selected_season}-{selected_season+1}"
-                
-                # Display the season format for debugging
-                st.caption(f"Looking for data with season format: {season_year_str} or {alternative_season_format}")
             
-            # First try with the primary format
-            season_data = data_per_min[data_per_min['year'] == season_year_str]
+            # Per-minute rows built from the selected season's partitions only, sorted by name
+            _, season_data, _ = get_season_tables(store, selected_season)
+            season_index = build_season_index(store, selected_season, store.season_hash(selected_season))
+            player_distributions, _ = build_season_distributions(store, selected_season, store.season_hash(selected_season))
             
-            # If no data found, try alternative format
             if season_data.empty:
-                season_data = data_per_min[data_per_min['year'] == alternative_season_format]
-                if not season_data.empty:
-                    season_year_str = alternative_season_format
+                st.error(f"No raw data found for season {selected_season}.")
             
-            # If still no data found, try creating on the fly for this season
-            if season_data.empty:
-                st.warning(f"No pre-calculated stats found for {season_year_str}. Creating them now...")
-                
-                # Filter the raw data for the selected season
-                season_raw_data = data[data['season_start_year'] == selected_season]
-                
-                if not season_raw_data.empty:
-                    # Create per-minute stats just for this season
-                    season_data = create_per_min_stats(season_raw_data, total_cols)
-                    st.success("Successfully created player statistics for the selected season.")
-                else:
-                    st.error(f"No raw data found for season {selected_season}.")
-            
-            # Get players who were active in the selected season
-            active_players = sorted(season_data['PLAYER'].unique()) if not season_data.empty else []
+            # Names of every player across all seasons, keyed by id
+            name_index = build_name_index(data_fingerprint)
+            player_names = name_index.names
+            has_players = not season_data.empty
             
             with col2:
-                # Player selection with only active players from the selected season
-                if active_players:
-                    default_players = active_players[:2] if len(active_players) >= 2 else active_players
+                if has_players:
+                    search_all = st.checkbox("Search all seasons", value=False)
+                    query = st.text_input("Search players by name", placeholder="e.g. curry, jokic, lebrn")
+                    
+                    if query:
+                        matches = name_index.search(query, limit=PLAYER_SEARCH_LIMIT,
+                                                    season=None if search_all else selected_season)
+                    else:
+                        matches = name_index.top_players(selected_season, limit=PLAYER_SEARCH_LIMIT)
+                    
+                    # Picks are kept across seasons, so a player found first can then be looked up season by season
+                    picks_key = remember('compare_players', season_data['PLAYER_ID'].iloc[:2].tolist())
+                    
+                    # Only the current picks and the top matches are sent to the browser
+                    options = list(dict.fromkeys(st.session_state['compare_players'] + matches))
                     selected_players = st.multiselect(
                         "Select players to compare (2-5 recommended)",
-                        active_players,
-                        default=default_players
+                        options,
+                        key=picks_key,
+                        on_change=store_widget,
+                        args=('compare_players',),
+                        format_func=name_index.label if search_all else lambda player_id: player_names.get(player_id, str(player_id))
                     )
                     
-                    st.success(f"{len(active_players)} players found for {season_year_str}")
+                    st.success(f"{len(season_data)} players found for {season_year_str}")
+                    
+                    for player_id in selected_players:
+                        played = name_index.seasons_played(player_id)
+                        if selected_season not in played:
+                            st.caption(f"{player_names.get(player_id, player_id)} played in: "
+                                       + ", ".join(f"{season}-{str(season + 1)[2:]}" for season in played))
                 else:
                     st.warning(f"No player data available for the {season_year_str} season.")
                     selected_players = []
             
-            # Add a show graphs button
+            # A toggle rather than a button, so the graphs stay up across later interactions
             show_graphs = False
             if len(selected_players) > 0:
-                if st.button("Show Player Comparison Graphs", type="primary"):
-                    show_graphs = True
+                show_graphs = st.toggle("Show Player Comparison Graphs", key=remember('show_player_graphs', False),
+                                        on_change=store_widget, args=('show_player_graphs',))
             
             if show_graphs and len(selected_players) > 0:
                 # Get player data for selected season
-                selected_player_data = season_data[season_data['PLAYER'].isin(selected_players)]
+                selected_player_data = pd.concat(
+                    [season_index.get_player_season(player_id, selected_season) for player_id in selected_players]
+                )
                 
                 if not selected_player_data.empty:
                     with st.spinner("Generating player comparison visualizations..."):
@@ -909,52 +885,22 @@ if page == "Player Comparisons":
                         if not radar_metrics:
                             st.warning("No metrics available for radar chart visualization.")
                         else:
-                            # Create the radar chart
-                            fig_radar = go.Figure()
-                            
-                            # Get max values for each metric across all players for normalization
+                            # League-wide max for each metric in the season, for normalization
                             max_values = {}
                             for metric in radar_metrics:
                                 # For percentages, the max should be 1 (100%)
                                 if metric in available_pct_metrics:
                                     max_values[metric] = 1
                                 else:
-                                    max_values[metric] = season_data[metric].max() * 1.1  # Add buffer
+                                    max_values[metric] = player_distributions.max[metric] * 1.1  # Add buffer
                             
-                            # Add each player as a trace
-                            for player in selected_player_data['PLAYER'].unique():
-                                player_data = selected_player_data[selected_player_data['PLAYER'] == player]
-                                
-                                # Get values and normalize them (0-1 range)
-                                values = []
-                                for metric in radar_metrics:
-                                    if metric in player_data.columns and metric in max_values:
-                                        val = player_data[metric].values[0]
-                                        # Normalize value based on max for that metric
-                                        normalized_val = val / max_values[metric]
-                                        values.append(normalized_val)
-                                
-                                # Add trace for this player
-                                fig_radar.add_trace(go.Scatterpolar(
-                                    r=values,
-                                    theta=radar_metrics,
-                                    fill='toself',
-                                    name=player
-                                ))
-                            
-                            fig_radar.update_layout(
-                                polar=dict(
-                                    radialaxis=dict(
-                                        visible=True,
-                                        range=[0, 1]
-                                    )
-                                ),
-                                title=f"Player Comparison - {season_year_str} Season",
-                                showlegend=True,
-                                height=600
+                            # Create the radar chart
+                            fig_radar = figure_cache.get_or_build(
+                                ('player_radar', store.season_hash(selected_season), selected_season, selected_players),
+                                lambda: player_radar_figure(selected_player_data, max_values, radar_metrics, season_year_str)
                             )
                             
-                            st.plotly_chart(fig_radar, use_container_width=True)
+                            show_chart(fig_radar)
                         
                         # Display detailed player statistics table
                         st.markdown('<h2 class="sub-header">Detailed Player Statistics</h2>', unsafe_allow_html=True)
@@ -969,24 +915,11 @@ if page == "Player Comparisons":
                         # Combine all available columns
                         display_cols = base_cols + stat_cols + pct_cols
                         
-                        # Create display dataframe
+                        # Create display dataframe, per-minute stats as per 36 minutes for better readability
                         display_df = selected_player_data[display_cols].copy()
+                        display_df[stat_cols] = display_df[stat_cols] * 36
                         
-                        # Convert per-minute stats to per-36 minutes for better readability
-                        for col in stat_cols:
-                            display_df[col] = display_df[col] * 36
-                        
-                        # Format percentage columns
-                        for col in ['FG%', '3PT%', 'FT%', 'TRU%']:
-                            if col in display_df.columns:
-                                display_df[col] = display_df[col].apply(lambda x: f"{x:.1%}" if not pd.isna(x) else "N/A")
-                        
-                        # Format other numerical columns
-                        for col in stat_cols + ['AST_TOV']:
-                            if col in display_df.columns:
-                                display_df[col] = display_df[col].apply(lambda x: f"{x:.1f}" if not pd.isna(x) else "N/A")
-                        
-                        # Rename columns for display
+                        # Column headers for display
                         column_names = {
                             'PLAYER': 'Player',
                             'MIN': 'Minutes',
@@ -1002,18 +935,32 @@ if page == "Player Comparisons":
                             'AST_TOV': 'AST/TO Ratio'
                         }
                         
-                        # Only rename columns that exist in the DataFrame
-                        rename_dict = {col: column_names[col] for col in display_df.columns if col in column_names}
-                        display_df = display_df.rename(columns=rename_dict)
+                        # Values stay numeric, the column config only formats how they are shown
+                        column_config = {'PLAYER': st.column_config.TextColumn(column_names['PLAYER']),
+                                         'MIN': st.column_config.NumberColumn(column_names['MIN'], format="%d")}
+                        for col in stat_cols + pct_cols:
+                            column_format = "percent" if col in ['FG%', '3PT%', 'FT%', 'TRU%'] else "%.1f"
+                            column_config[col] = st.column_config.NumberColumn(column_names.get(col, col), format=column_format)
+                        
+                        st.dataframe(display_df, column_config=column_config, hide_index=True, width="stretch")
                         
-                        st.dataframe(display_df.set_index('Player'), use_container_width=True)
+                        # Where each player ranks among everyone who played that season
+                        st.markdown('<h2 class="sub-header">Season Percentile Ranks</h2>', unsafe_allow_html=True)
+                        
+                        percentile_df = pd.DataFrame({'PLAYER': selected_player_data['PLAYER'].to_numpy()})
+                        percentile_config = {'PLAYER': column_config['PLAYER']}
+                        for col in stat_cols + pct_cols:
+                            percentile_df[col] = player_distributions.percentile(col, selected_player_data[col].to_numpy())
+                            percentile_config[col] = st.column_config.NumberColumn(column_names.get(col, col), format="%.0f")
+                        
+                        st.dataframe(percentile_df, column_config=percentile_config, hide_index=True, width="stretch")
                         
                         # Career trajectory visualization - only for single player selection
                         if len(selected_players) == 1:
                             st.markdown('<h2 class="sub-header">Career Trajectory</h2>', unsafe_allow_html=True)
                             
-                            player_name = selected_players[0]
-                            player_career = data[data['PLAYER'] == player_name]
+                            player_name = player_names[selected_players[0]]
+                            player_career = build_player_index(data_fingerprint).get_player_career(selected_players[0])
                             
                             if not player_career.empty:
                                 # Check if we can create career stats
@@ -1022,36 +969,15 @@ if page == "Player Comparisons":
                                     valid_stat_cols = [col for col in total_cols if col in player_career.columns]
                                     
                                     if valid_stat_cols:
-                                        career_by_season = player_career.groupby('season_start_year')[valid_stat_cols + ['GP']].sum().reset_index()
-                                        
-                                        # Calculate per-game statistics
-                                        career_stats = ['PTS', 'REB', 'AST', 'STL', 'BLK']
-                                        per_game_cols = [col for col in career_stats if col in valid_stat_cols]
-                                        
-                                        for col in per_game_cols:
-                                            career_by_season[f'{col}_per_game'] = career_by_season[col] / career_by_season['GP']
-                                        
                                         # Create a line chart of career trajectory
-                                        fig_career = go.Figure()
-                                        
-                                        for col in per_game_cols:
-                                            fig_career.add_trace(go.Scatter(
-                                                x=career_by_season['season_start_year'],
-                                                y=career_by_season[f'{col}_per_game'],
-                                                mode='lines+markers',
-                                                name=f'{col} per Game'
-                                            ))
-                                        
-                                        fig_career.update_layout(
-                                            title=f"{player_name} Career Trajectory",
-                                            xaxis_title="Season",
-                                            yaxis_title="Statistics per Game",
-                                            legend=dict(x=0.01, y=0.99),
-                                            hovermode="x unified",
-                                            height=500
+                                        fig_career = figure_cache.get_or_build(
+                                            ('career_trajectory', data_fingerprint, selected_players[0]),
+                                            lambda: career_trajectory_figure(
+                                                *create_career_stats(player_career, valid_stat_cols), player_name
+                                            )
                                         )
                                         
-                                        st.plotly_chart(fig_career, use_container_width=True)
+                                        show_chart(fig_career)
                                         
                                         # Career highlights
                                         st.markdown(f"""
@@ -1067,13 +993,343 @@ if page == "Player Comparisons":
                                     st.warning("Required columns for career trajectory not found in data.")
                             else:
                                 st.warning(f"No career data available for {player_name}.")
+                            
+                            st.markdown('<h2 class="sub-header">Recent Form</h2>', unsafe_allow_html=True)
+                            rolling_form_section('player', [selected_players[0]], [player_name], selected_season)
                 else:
                     st.warning(f"No data available for the selected players in the {season_year_str} season.")
             elif len(selected_players) > 0 and not show_graphs:
-                st.info("Click 'Show Player Comparison Graphs' to view the comparison visualizations.")
-            elif selected_players == [] and active_players:
+                st.info("Turn on 'Show Player Comparison Graphs' to view the comparison visualizations.")
+            elif selected_players == [] and has_players:
                 st.info("Please select at least one player to compare.")
-                    
+            
+            # Nearest player-seasons across the whole history, by per-minute profile and shooting
+            if selected_players:
+                similar_players_section(selected_players, selected_season, player_names)
+
+
+def leaderboard_column_config(metrics, per36_metrics):
+    # Numbers stay numeric (so sorting in the browser works too); only their display is formatted
+    config = {
+        'RANK': st.column_config.NumberColumn("Rank", format="%d"),
+        'PLAYER': st.column_config.TextColumn("Player"),
+        'MIN': st.column_config.NumberColumn("Minutes", format="%d"),
+    }
+    for metric in metrics:
+        if metric in per36_metrics:
+            config[metric] = st.column_config.NumberColumn(f"{metric}/36", format="%.1f")
+        elif metric.endswith('%'):
+            config[metric] = st.column_config.NumberColumn(metric, format="percent")
+        elif metric != 'MIN':
+            config[metric] = st.column_config.NumberColumn(metric, format="%.2f")
+    return config
+
+@st.fragment
+@timed('section.leaderboard')
+def leaderboard_section():
+    # Sorting and paging slice a per-season order kept in a shared cache, the frame itself is never re-sorted
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        season_options = store.seasons
+        selected_season = st.selectbox("Season", season_options,
+                                       key=remember('leaders_season', season_options[-1], season_options),
+                                       on_change=store_leaderboard_filter, args=('leaders_season',))
+    
+    leaderboard = build_season_leaderboard(store, selected_season, store.season_hash(selected_season))
+    metric_options = leaderboard.metrics
+    column_config = leaderboard_column_config(metric_options, leaderboard.per36_metrics)
+    
+    with col2:
+        metric = st.selectbox("Sort by", metric_options, key=remember('leaders_metric', 'PTS', metric_options),
+                              format_func=lambda metric: column_config[metric]['label'],
+                              on_change=store_leaderboard_filter, args=('leaders_metric',))
+    with col3:
+        directions = ["Highest first", "Lowest first"]
+        direction = st.radio("Order", directions, horizontal=True,
+                             key=remember('leaders_direction', directions[0], directions),
+                             on_change=store_leaderboard_filter, args=('leaders_direction',))
+    with col4:
+        min_minutes = st.number_input("Minimum minutes", min_value=0, step=100,
+                                      key=remember('leaders_min_minutes', 500),
+                                      on_change=store_leaderboard_filter, args=('leaders_min_minutes',))
+    
+    ascending = direction == directions[1]
+    qualified = len(leaderboard.ranking(metric, ascending, min_minutes))
+    
+    col1, col2, col3 = st.columns([1, 1, 2])
+    with col1:
+        page_size = st.selectbox("Rows per page", LEADERBOARD_PAGE_SIZES,
+                                 key=remember('leaders_page_size', 50, LEADERBOARD_PAGE_SIZES),
+                                 on_change=store_widget, args=('leaders_page_size',))
+    pages = max(1, -(-qualified // page_size))
+    with col2:
+        page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages,
+                                      key=remember('leaders_page', 1, range(1, pages + 1)),
+                                      on_change=store_widget, args=('leaders_page',))
+    
+    # Only the sort metric and the chosen columns are computed (metrics.MetricTable), the rest never are
+    from leaderboard import DEFAULT_COLUMNS
+    column_options = [col for col in metric_options if col != 'MIN']
+    st.session_state['leaders_columns'] = [col for col in st.session_state.get('leaders_columns', DEFAULT_COLUMNS)
+                                           if col in column_options]
+    shown_metrics = st.multiselect("Columns", column_options, key=remember('leaders_columns', DEFAULT_COLUMNS),
+                                   format_func=lambda metric: column_config[metric]['label'],
+                                   on_change=store_widget, args=('leaders_columns',))
+    
+    rows, _ = leaderboard.page(metric, page_number - 1, page_size, ascending, min_minutes, columns=shown_metrics)
+    with col3:
+        first = (page_number - 1) * page_size
+        st.caption(f"{season_label(selected_season).iloc[0]}: players {first + 1 if qualified else 0}-"
+                   f"{first + len(rows)} of {qualified} with at least {min_minutes} minutes")
+    
+    shown = ['RANK', 'PLAYER', 'MIN', metric] + [col for col in shown_metrics if col != metric]
+    st.dataframe(rows, column_order=shown, column_config=column_config, hide_index=True, width="stretch")
+
+@st.fragment
+@timed('section.player_explorer')
+def player_explorer_section():
+    # Points are thinned on the server to what the browser can draw, and box-selecting an area refetches it in full
+    from figures import player_explorer_figure
+    figure_cache = get_figure_cache()
+    explorer = build_player_explorer(data_fingerprint)
+    column_config = leaderboard_column_config(explorer.metrics, explorer.per36_metrics)
+    metric_label = lambda metric: column_config[metric]['label']
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        x_metric = st.selectbox("X axis", explorer.metrics, format_func=metric_label,
+                                key=remember('explorer_x', 'PTS', explorer.metrics),
+                                on_change=store_explorer_filter, args=('explorer_x',))
+    with col2:
+        y_metric = st.selectbox("Y axis", explorer.metrics, format_func=metric_label,
+                                key=remember('explorer_y', 'TRU%' if 'TRU%' in explorer.metrics else 'MIN', explorer.metrics),
+                                on_change=store_explorer_filter, args=('explorer_y',))
+    with col3:
+        color_labels = {'TEAM': "Team", 'season_start_year': "Season"}
+        color = st.radio("Color by", list(color_labels), format_func=color_labels.get, horizontal=True,
+                         key=remember('explorer_color', 'TEAM', list(color_labels)),
+                         on_change=store_widget, args=('explorer_color',))
+    with col4:
+        min_minutes = st.number_input("Minimum minutes", min_value=0, step=100,
+                                      key=remember('explorer_min_minutes', 500),
+                                      on_change=store_explorer_filter, args=('explorer_min_minutes',))
+    
+    first, last = explorer.seasons[0], explorer.seasons[-1]
+    stored = st.session_state.get('explorer_seasons', (first, last))
+    st.session_state['explorer_seasons'] = (max(first, stored[0]), min(last, stored[1]))
+    seasons = st.slider("Seasons", min_value=first, max_value=max(last, first + 1),
+                        key=remember('explorer_seasons', (first, last)),
+                        on_change=store_explorer_filter, args=('explorer_seasons',))
+    
+    zoom = st.session_state.get('explorer_zoom')
+    x_range, y_range = zoom or (None, None)
+    points = explorer.points(x_metric, y_metric, min_minutes, seasons, x_range, y_range)
+    
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        detail = (f", one point per occupied cell of a {points['grid']}x{points['grid']} grid (larger points stand for more)"
+                  if points['grid'] else "")
+        st.caption(f"{len(points['rows']):,} points for {points['total']:,} player-seasons{detail}. "
+                   f"Drag a box over the chart to zoom in at full detail.")
+    with col2:
+        if zoom is not None:
+            st.button("Reset zoom", on_click=lambda: st.session_state.pop('explorer_zoom', None))
+    
+    fig = figure_cache.get_or_build(
+        ('player_explorer', data_fingerprint, x_metric, y_metric, color, min_minutes, tuple(seasons), zoom),
+        lambda: player_explorer_figure(points, explorer.players, metric_label(x_metric), metric_label(y_metric), color,
+                                       x_pct=x_metric.endswith('%'), y_pct=y_metric.endswith('%'))
+    )
+    with stage("chart.render"):
+        st.plotly_chart(fig, width="stretch", key='explorer_chart', on_select=store_explorer_zoom,
+                        selection_mode='box')
+
+def diagnostics_page():
+    # Process-wide stage timings and cache hit rates, shared by every session
+    st.markdown('<h1 class="main-header">Diagnostics</h1>', unsafe_allow_html=True)
+    if not instrumentation.ENABLED:
+        st.info("Stage timing is off. Start the app with NBA_TIMING=1 to record it.")
+
+    timings = instrumentation.timings
+    st.caption(f"Recording since {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timings.started))}, "
+               f"percentiles over the last {timings.samples} calls of each stage.")
+
+    st.markdown('<h2 class="sub-header">Stages</h2>', unsafe_allow_html=True)
+    stages = pd.DataFrame(timings.stage_summary(),
+                          columns=['stage', 'count', 'total_s', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'])
+    st.dataframe(stages, hide_index=True, width="stretch",
+                 column_config={col: st.column_config.NumberColumn(format="%.2f") for col in stages.columns[2:]})
+
+    st.markdown('<h2 class="sub-header">Caches</h2>', unsafe_allow_html=True)
+    caches = pd.DataFrame(timings.cache_summary(), columns=['cache', 'hits', 'misses', 'hit_rate'])
+    st.dataframe(caches, hide_index=True, width="stretch",
+                 column_config={'hit_rate': st.column_config.NumberColumn(format="%.3f")})
+    figure_stats = get_figure_cache().stats()
+    st.caption(f"Figure cache: {figure_stats['entries']}/{figure_stats['max_entries']} entries, "
+               f"{figure_stats['hits']} hits, {figure_stats['misses']} misses since the process started.")
+
+    st.markdown('<h2 class="sub-header">Memory</h2>', unsafe_allow_html=True)
+    # Sessions that ran in the last SESSION_IDLE_SECONDS, measured now
+    now = time.time()
+    states = [state() for last_run, state in list(get_session_registry().values()) if now - last_run < SESSION_IDLE_SECONDS]
+    active = [session_state_bytes(state) for state in states if state is not None]
+    shared_bytes = instrumentation.frame_bytes(build_derived_tables(data_fingerprint))
+    season_bytes = instrumentation.frame_bytes(
+        frame for season in store.seasons for frame in get_season_tables(store, season))
+    rss = instrumentation.process_rss()
+    memory = pd.DataFrame([
+        ("Process RSS", rss),
+        ("Shared full-history tables", shared_bytes),
+        ("Shared per-season tables", season_bytes),
+        (f"Active sessions (last {SESSION_IDLE_SECONDS // 60} minutes)", len(active)),
+        ("Session state per session (mean)", sum(active) / len(active) if active else 0),
+        ("RSS per active session", rss / len(active) if rss and active else None),
+    ], columns=['measure', 'value'])
+    memory['value'] = [f"{value:,.0f}" if value is not None else "n/a" for value in memory['value']]
+    st.dataframe(memory, hide_index=True, width="stretch")
+    st.caption("Byte counts except for the session count. Tables are shared by every session, "
+               "so only session state grows with the number of users.")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button("Export JSON lines", timings.to_jsonl(), file_name="nba_timings.jsonl",
+                           mime="application/x-ndjson")
+    with col2:
+        st.download_button("Export Prometheus text", timings.to_prometheus(), file_name="nba_timings.prom",
+                           mime="text/plain")
+    with col3:
+        if st.button("Reset"):
+            timings.reset()
+            st.rerun()
+
+
+if page == "Introduction":
+    st.markdown('<h1 class="main-header">NBA Analytics: Evolution of the Game (2012-2024)</h1>', unsafe_allow_html=True)
+    
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        st.markdown('<h2 class="sub-header">Project Overview</h2>', unsafe_allow_html=True)
+
+        st.write("This interactive dashboard explores NBA data from the 2012-2024 seasons, analyzing trends in playing style, team strategies, and player performance. The analysis reveals how the NBA game has evolved, particularly with the rise of three-point shooting and changes in offensive efficiency.")
+
+        st.markdown('<h3>Key Features:</h3>', unsafe_allow_html=True)
+        st.markdown("""
+        - Track the league-wide evolution of playing styles and strategies
+        - Compare team performance metrics and playing styles
+        - Analyze individual player statistics and career trajectories
+        - Explore the shift toward perimeter shooting and its impact on the game
+        """)
+
+        st.write("Use the sidebar to navigate between different sections of the analysis.")
+        
+    with col2:
+        st.image("https://cdn.nba.com/manage/2021/08/NBA-Ball-Global-500x500.jpg", width=300)
+    
+    st.markdown('<h2 class="sub-header">Dashboard Highlights</h2>', unsafe_allow_html=True)
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.markdown("""
+        <div class="metric-card">
+            <div class="metric-value">36%</div>
+            <div class="metric-label">Increase in 3-point attempts since 2012</div>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown("""
+        <div class="metric-card">
+            <div class="metric-value">12%</div>
+            <div class="metric-label">Rise in offensive efficiency (points per 100 possessions)</div>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col3:
+        st.markdown("""
+        <div class="metric-card">
+            <div class="metric-value">30</div>
+            <div class="metric-label">Teams analyzed across 12 seasons of data</div>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    st.markdown("""
+    
+        <h3>Data Collection and Methodology</h3>
+        <p>This dataset was scraped from the official NBA website and includes detailed statistics for all NBA players and teams from the 2012-2013 through 2023-2024 seasons. The data covers both regular season and playoff games.</p>
+            """,unsafe_allow_html=True)
+
+    st.markdown("""
+    <h3>The analysis includes:</h3>
+    - Advanced statistical metrics like True Shooting Percentage and Possession Estimation
+    - Normalized statistics for fair comparisons across different playing times
+    - Visualization of trends and patterns using interactive charts
+    """,unsafe_allow_html=True)
+
+
+elif page == "League Trends":
+    st.markdown('<h1 class="main-header">NBA League Trends (2012-2024)</h1>', unsafe_allow_html=True)
+    
+    st.markdown("""
+        <div class="dashboard-container">
+        <p>This section explores how the NBA game has evolved over the past decade, with particular focus on the rise of three-point shooting, changes in pace of play, and scoring distribution.</p>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    st.markdown('<h2 class="sub-header">The Three-Point Revolution</h2>', unsafe_allow_html=True)
+    
+    league_trends_section()
+
+elif page == "Team Analysis":
+    st.markdown('<h1 class="main-header">NBA Team Analysis</h1>', unsafe_allow_html=True)
+    
+    st.markdown("""
+    <div class="dashboard-container">
+        <p>Compare NBA teams based on various performance metrics and playing styles. Select teams and seasons to see detailed comparisons.</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    team_analysis_section()
+
+
+# Fixed Player Comparisons Section
+if page == "Player Comparisons":
+    st.markdown('<h1 class="main-header">NBA Player Comparisons</h1>', unsafe_allow_html=True)
+    
+    st.markdown("""
+    <div class="dashboard-container">
+        <p>Compare NBA players' statistics and performance metrics. Select players to visualize their strengths, 
+        weaknesses, and how they stack up against each other.</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    player_comparisons_section()
+
+elif page == "Leaderboards":
+    st.markdown('<h1 class="main-header">NBA Season Leaderboards</h1>', unsafe_allow_html=True)
+    
+    st.markdown("""
+    <div class="dashboard-container">
+        <p>Every player of a season ranked by any per-36 stat or shooting ratio. Raise the minimum minutes
+        to leave out small samples.</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    leaderboard_section()
+    
+elif page == "Player Explorer":
+    st.markdown('<h1 class="main-header">Player Explorer</h1>', unsafe_allow_html=True)
+    
+    st.markdown("""
+    <div class="dashboard-container">
+        <p>Every player-season on any two per-36 stats or ratios. Large selections are drawn with WebGL and thinned
+        on the server so the chart stays responsive; drag a box over an area to see all of its player-seasons.</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    player_explorer_section()
+    
 elif page == "About the Project":
     st.markdown('<h1 class="main-header">About the NBA Analytics Project</h1>', unsafe_allow_html=True)
     
@@ -1140,4 +1396,9 @@ elif page == "About the Project":
     <p>Email: shivamksi42@gmail.com</p>
     """, unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
-    
\ No newline at end of file
+    
+
+elif page == "Diagnostics":
+    diagnostics_page()
+
+instrumentation.record("script_run", time.perf_counter() - run_started)
@@ -0,0 +1,186 @@
+"""
+Per-stage timings of the compute pipeline on synthetic datasets.
+
+Run from the repository root:
+
+    pytest benchmarks/bench_pipeline.py
+    pytest benchmarks/bench_pipeline.py --update-baseline
+"""
+import os
+
+import pytest
+
+from compute import (MetricDistributions, create_career_stats, create_league_trends, create_per_min_stats,
+                     create_season_tables, create_team_season_stats, preprocess_nba_data, total_cols)
+from figures import (career_trajectory_figure, league_scatter_figure, pace_efficiency_figure,
+                     scoring_distribution_figure, team_comparison_figure, three_point_trend_figure)
+from explorer import PlayerSeasonExplorer
+from game_logs import RollingForm, load_game_logs
+from leaderboard import SeasonLeaderboard
+from name_index import PlayerNameIndex
+from player_index import PlayerSeasonIndex
+from similarity import PlayerSimilarityIndex
+from storage import parse_nba_csv
+from team_cube import TeamSeasonCube
+from benchmarks.synthetic import write_synthetic_csv, write_synthetic_games
+
+
+@pytest.fixture(scope="module")
+def csv_path(tmp_path_factory, scale):
+    return write_synthetic_csv("nba.csv", scale, tmp_path_factory.mktemp("data") / f"nba_{scale}x.csv")
+
+
+@pytest.fixture(scope="module")
+def preprocessed(dataset):
+    return preprocess_nba_data(dataset)
+
+
+@pytest.fixture(scope="module")
+def team_stats(preprocessed):
+    return create_team_season_stats(preprocessed, total_cols)
+
+
+@pytest.fixture(scope="module")
+def league_trends(preprocessed):
+    trends = create_league_trends(preprocessed, total_cols)
+    return trends[trends['Season_type'] == 'Regular Season']
+
+
+def test_parse_csv(stage, csv_path):
+    stage(parse_nba_csv, csv_path)
+
+
+def test_preprocess(stage, dataset):
+    stage(preprocess_nba_data, dataset)
+
+
+def test_per_min_stats(stage, preprocessed):
+    stage(create_per_min_stats, preprocessed, total_cols)
+
+
+def test_team_season_stats(stage, preprocessed):
+    stage(create_team_season_stats, preprocessed, total_cols)
+
+
+def test_league_trends(stage, preprocessed):
+    stage(create_league_trends, preprocessed, total_cols)
+
+
+def test_season_tables(stage, dataset):
+    season_rows = dataset[dataset['season_start_year'] == dataset['season_start_year'].max()]
+    stage(create_season_tables, season_rows, total_cols)
+
+
+def test_player_index(stage, preprocessed):
+    stage(PlayerSeasonIndex, preprocessed)
+
+
+def test_team_cube(stage, preprocessed):
+    stage(TeamSeasonCube, preprocessed)
+
+
+def test_team_cube_lookup(stage, preprocessed):
+    # What a Team Analysis rerun reads: two teams' cells, the season's teams and one multi-season series
+    cube = TeamSeasonCube(preprocessed)
+    season, (team1, team2) = cube.seasons[-1], cube.teams[:2]
+    stage(lambda: (cube.row(team1, season, 'Regular Season'), cube.row(team2, season, 'Regular Season'),
+                   cube.slice(season, 'Regular Season'), cube.series(team1, 'ORtg', 'Regular Season')))
+
+
+def test_career_lookup(stage, preprocessed):
+    index = PlayerSeasonIndex(preprocessed)
+    player_id = preprocessed['PLAYER_ID'].iloc[0]
+    stat_cols = [col for col in total_cols if col in preprocessed.columns]
+    stage(lambda: create_career_stats(index.get_player_career(player_id), stat_cols))
+
+
+def test_league_trend_figures(stage, league_trends):
+    def build():
+        three_point_trend_figure(league_trends, "all")
+        scoring_distribution_figure(league_trends, "all")
+        pace_efficiency_figure(league_trends, "all")
+    stage(build)
+
+
+def test_team_figures(stage, team_stats):
+    season = team_stats['season_start_year'].max()
+    season_teams = team_stats[team_stats['season_start_year'] == season]
+    team1, team2 = season_teams[season_teams['TEAM'] == 'GSW'], season_teams[season_teams['TEAM'] == 'LAL']
+
+    def build():
+        team_comparison_figure(team1, team2, 'GSW', 'LAL', season)
+        league_scatter_figure(season_teams, season)
+    stage(build)
+
+
+def test_career_figure(stage, preprocessed):
+    index = PlayerSeasonIndex(preprocessed)
+    player_id = preprocessed['PLAYER_ID'].iloc[0]
+    stat_cols = [col for col in total_cols if col in preprocessed.columns]
+    career_by_season, per_game_cols = create_career_stats(index.get_player_career(player_id), stat_cols)
+    stage(career_trajectory_figure, career_by_season, per_game_cols, "Player")
+
+
+def test_distributions(stage, dataset):
+    season_rows = dataset[dataset['season_start_year'] == dataset['season_start_year'].max()]
+    _, season_per_min, _ = create_season_tables(season_rows, total_cols)
+    stage(MetricDistributions, season_per_min)
+
+
+@pytest.fixture(scope="module")
+def per_min(preprocessed):
+    return create_per_min_stats(preprocessed, total_cols)
+
+
+def test_similarity_index(stage, per_min):
+    stage(PlayerSimilarityIndex, per_min)
+
+
+def test_similarity_query(stage, per_min):
+    index = PlayerSimilarityIndex(per_min)
+    player_id, season = per_min['PLAYER_ID'].iloc[0], per_min['season_start_year'].iloc[0]
+    stage(index.similar_players, player_id, season, 10, 500)
+
+
+def test_leaderboard_page(stage, per_min):
+    # A fresh season leaderboard and its first page, computing only the shown columns
+    season = per_min[per_min['season_start_year'] == per_min['season_start_year'].max()]
+    stage(lambda: SeasonLeaderboard(season).page('GmSc', columns=['PTS', 'eFG%', 'TRU%']))
+
+
+def test_explorer_points(stage, per_min, preprocessed):
+    # Every player-season on two axes, thinned to a small budget so the grid search runs at every scale
+    explorer = PlayerSeasonExplorer(per_min, preprocessed)
+    stage(explorer.points, 'PTS', 'TRU%', 0, None, None, None, 2000)
+
+
+def test_name_index(stage, per_min):
+    stage(PlayerNameIndex, per_min)
+
+
+def test_name_search(stage, per_min):
+    index = PlayerNameIndex(per_min)
+    stage(lambda: (index.search("curry"), index.search("stphen cury")))
+
+
+# Largest scale the game log stages run at: a game row per player and game is ~3.3M rows at 10x and ~33M
+# (several GB once loaded and sorted) at 100x
+GAMES_MAX_SCALE = int(os.environ.get("NBA_BENCH_GAMES_MAX_SCALE", "10"))
+
+
+@pytest.fixture(scope="module")
+def game_logs(tmp_path_factory, scale):
+    if scale > GAMES_MAX_SCALE:
+        pytest.skip(f"game logs above {GAMES_MAX_SCALE}x, set NBA_BENCH_GAMES_MAX_SCALE to run them")
+    return load_game_logs(write_synthetic_games("nba.csv", scale, tmp_path_factory.mktemp("games") / f"games_{scale}x.csv"))
+
+
+def test_rolling_form(stage, game_logs):
+    stage(lambda: RollingForm(game_logs).window(10))
+
+
+def test_rolling_trajectory(stage, game_logs):
+    form = RollingForm(game_logs)
+    player_id = game_logs['PLAYER_ID'].iloc[0]
+    season = int(game_logs['season_start_year'].iloc[0])
+    stage(form.trajectory, player_id, season)
@@ -0,0 +1,72 @@
+import json
+import os
+
+import pytest
+
+from compute import load_dataset
+from benchmarks.synthetic import scale_dataset
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Allowed slowdown over the stored baseline median before a stage fails, 0.5 = 50% slower
+TOLERANCE = float(os.environ.get("NBA_BENCH_TOLERANCE", "0.5"))
+
+# 1000x is ~9M rows and needs several GB of memory, so it is opt-in: NBA_BENCH_SCALES=1,10,100,1000
+SCALES = [int(scale) for scale in os.environ.get("NBA_BENCH_SCALES", "1,10,100").split(",")]
+
+
+def pytest_addoption(parser):
+    parser.addoption("--update-baseline", action="store_true", default=False,
+                     help="store the measured medians in benchmarks/baseline.json instead of checking them")
+
+
+def pytest_generate_tests(metafunc):
+    if "scale" in metafunc.fixturenames:
+        metafunc.parametrize("scale", SCALES, ids=[f"{scale}x" for scale in SCALES], scope="module")
+
+
+@pytest.fixture(scope="session")
+def baseline(request):
+    try:
+        with open(BASELINE_PATH) as f:
+            stored = json.load(f)
+    except FileNotFoundError:
+        stored = {}
+    measured = {}
+    yield stored, measured
+
+    if request.config.getoption("--update-baseline") and measured:
+        stored.update(measured)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(dict(sorted(stored.items())), f, indent=2)
+            f.write("\n")
+
+
+@pytest.fixture
+def stage(benchmark, baseline, request):
+    """Benchmarks one pipeline stage and fails if its median regressed past the stored baseline."""
+    stored, measured = baseline
+
+    def run(func, *args):
+        result = benchmark(func, *args)
+        name = request.node.name
+        median = benchmark.stats.stats.median
+        measured[name] = round(median, 6)
+        if not request.config.getoption("--update-baseline") and name in stored:
+            limit = stored[name] * (1 + TOLERANCE)
+            if median > limit:
+                pytest.fail(f"{name} regressed: median {median * 1000:.1f} ms, "
+                            f"baseline {stored[name] * 1000:.1f} ms (+{TOLERANCE:.0%} allowed)")
+        return result
+
+    return run
+
+
+@pytest.fixture(scope="session")
+def source_data():
+    return load_dataset("nba.csv")
+
+
+@pytest.fixture(scope="module")
+def dataset(source_data, scale):
+    return scale_dataset(source_data, scale)
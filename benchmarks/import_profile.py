@@ -0,0 +1,83 @@
+"""
+Import-time profile of a cold app start, from `python -X importtime`.
+
+The target is imported in a fresh interpreter, so nothing is warm. `import app` runs the
+script once in bare mode on its default page (Introduction), which is exactly what a new
+worker does before its first paint; pages opened later load their own dependencies.
+The report lists the modules with the largest cumulative import time and the process
+exits non-zero when the total is over the budget.
+
+    python -m benchmarks.import_profile                  # top 25 modules of `import app`
+    python -m benchmarks.import_profile --budget-ms 1500
+    python -m benchmarks.import_profile -m figures       # any other module
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+IMPORT_BUDGET_MS = float(os.environ.get("NBA_IMPORT_BUDGET_MS", "2000"))
+
+_line = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_profile(module="app", cwd=None):
+    """
+    Imports a module in a fresh interpreter with -X importtime.
+
+    Parameters:
+    module (str): Module to import
+    cwd (str): Working directory of the interpreter, defaults to the repository root
+
+    Returns:
+    list: (module, self_ms, cumulative_ms, depth) for every import, in import order
+    """
+    if cwd is None:
+        cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=cwd, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _line.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us) / 1000, int(cumulative_us) / 1000, (len(indent) - 1) // 2))
+    return rows
+
+
+def total_ms(rows):
+    """Total import time, the sum of the top-level imports."""
+    return sum(cumulative for _, _, cumulative, depth in rows if depth == 0)
+
+
+def format_report(rows, top=25):
+    lines = [f"{'cumulative ms':>14} {'self ms':>9}  module"]
+    for name, self_ms, cumulative, depth in sorted(rows, key=lambda row: -row[2])[:top]:
+        lines.append(f"{cumulative:>14.1f} {self_ms:>9.1f}  {'  ' * depth}{name}")
+    lines.append(f"{total_ms(rows):>14.1f} {'':>9}  total ({len(rows)} modules)")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of a cold start")
+    parser.add_argument("-m", "--module", default="app")
+    parser.add_argument("-n", "--top", type=int, default=25)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    args = parser.parse_args()
+
+    rows = import_profile(args.module)
+    print(format_report(rows, top=args.top))
+    total = total_ms(rows)
+    if total > args.budget_ms:
+        print(f"import {args.module} took {total:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+    print(f"import {args.module} took {total:.0f} ms, within the {args.budget_ms:.0f} ms budget")
+
+
+if __name__ == "__main__":
+    main()
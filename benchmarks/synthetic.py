@@ -0,0 +1,139 @@
+"""
+Synthetic copies of nba.csv at larger row counts, for benchmarking.
+
+Every copy of the source gets fresh player ids and names but keeps the seasons, teams
+and season types, so group counts scale with the data the way a longer history or a
+bigger league would. Counting stats are jittered per row with a lognormal factor and
+then re-derived so the rows stay internally consistent (makes <= attempts, REB = OREB +
+DREB, PTS from the shot mix, percentages from the totals).
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from storage import parse_nba_csv
+
+COUNT_COLS = ['GP', 'MIN', 'FGM', 'FGA', 'FG3M', 'FG3A', 'FTM', 'FTA',
+              'OREB', 'DREB', 'AST', 'STL', 'BLK', 'TOV', 'PF']
+
+
+def scale_dataset(data, factor, seed=0):
+    """
+    Replicates player rows `factor` times with per-row noise on the counting stats.
+
+    Parameters:
+    data (pandas.DataFrame): Parsed nba.csv rows
+    factor (int): Number of copies, the first one is the source unchanged
+    seed (int): Seed for the noise, the same seed gives the same dataset
+
+    Returns:
+    pandas.DataFrame: The scaled dataset with the same columns and dtypes
+    """
+    rng = np.random.default_rng(seed)
+    n = len(data)
+    copy = np.repeat(np.arange(factor), n)
+    scaled = data.iloc[np.tile(np.arange(n), factor)].reset_index(drop=True)
+
+    id_stride = int(data['PLAYER_ID'].max()) + 1
+    scaled['PLAYER_ID'] = (scaled['PLAYER_ID'].to_numpy(dtype='int64') + copy * id_stride).astype(data['PLAYER_ID'].dtype)
+    suffix = np.where(copy == 0, '', ' #' + copy.astype(str))
+    scaled['PLAYER'] = scaled['PLAYER'].astype(str) + suffix
+
+    noise = np.where(copy == 0, 1.0, rng.lognormal(0.0, 0.15, size=len(scaled)))
+    stats = {col: np.rint(scaled[col].to_numpy(dtype='float64') * noise) for col in COUNT_COLS}
+    stats['GP'] = np.clip(stats['GP'], 1, 82)
+    stats['FGM'] = np.minimum(stats['FGM'], stats['FGA'])
+    stats['FG3A'] = np.minimum(stats['FG3A'], stats['FGA'])
+    stats['FG3M'] = np.minimum(np.minimum(stats['FG3M'], stats['FG3A']), stats['FGM'])
+    stats['FTM'] = np.minimum(stats['FTM'], stats['FTA'])
+    stats['REB'] = stats['OREB'] + stats['DREB']
+    stats['PTS'] = 2 * stats['FGM'] + stats['FG3M'] + stats['FTM']
+    for col, values in stats.items():
+        if col in scaled.columns:
+            scaled[col] = values.astype(data[col].dtype)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for pct, (made, attempted) in {'FG_PCT': ('FGM', 'FGA'), 'FG3_PCT': ('FG3M', 'FG3A'),
+                                       'FT_PCT': ('FTM', 'FTA')}.items():
+            if pct in scaled.columns:
+                ratio = np.round(np.nan_to_num(stats[made] / stats[attempted]), 3)
+                scaled[pct] = ratio.astype(data[pct].dtype)
+
+    return scaled
+
+
+def write_synthetic_csv(source_path, factor, out_path, seed=0):
+    """Writes a scaled copy of source_path to out_path in the nba.csv layout."""
+    data = scale_dataset(parse_nba_csv(source_path), factor, seed=seed)
+    data = data.drop(columns=['season_start_year'], errors='ignore')
+    data.to_csv(out_path, index=False)
+    return out_path
+
+
+GAME_COLS = ['MIN', 'FGM', 'FGA', 'FG3M', 'FG3A', 'FTM', 'FTA', 'OREB', 'DREB', 'REB',
+             'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS']
+
+
+def split_into_games(data):
+    """
+    Splits season rows into GP game rows each, in the layout of a box score export.
+
+    Every total is spread evenly over the games with the remainder going to the first ones,
+    so summing the games gives back the season row exactly.
+
+    Parameters:
+    data (pandas.DataFrame): Parsed nba.csv rows
+
+    Returns:
+    pandas.DataFrame: SEASON_YEAR, SEASON_TYPE, PLAYER_ID, PLAYER_NAME, TEAM_ID, TEAM_ABBREVIATION,
+                      GAME_NUMBER and the counting stats, one row per game
+    """
+    games_played = np.maximum(data['GP'].to_numpy(dtype='int64'), 1)
+    row = np.repeat(np.arange(len(data)), games_played)
+    starts = np.cumsum(games_played) - games_played
+    game_number = np.arange(len(row)) - starts[row]
+
+    games = pd.DataFrame({
+        'SEASON_YEAR': data['year'].astype(str).to_numpy()[row],
+        'SEASON_TYPE': data['Season_type'].astype(str).to_numpy()[row],
+        'PLAYER_ID': data['PLAYER_ID'].to_numpy(dtype='int64')[row],
+        'PLAYER_NAME': data['PLAYER'].astype(str).to_numpy()[row],
+        'TEAM_ID': data['TEAM_ID'].to_numpy(dtype='int64')[row],
+        'TEAM_ABBREVIATION': data['TEAM'].astype(str).to_numpy()[row],
+        'GAME_NUMBER': game_number + 1,
+    })
+    for col in GAME_COLS:
+        totals = np.rint(data[col].to_numpy(dtype='float64')).astype('int64')
+        per_game, remainder = np.divmod(totals, games_played)
+        games[col] = per_game[row] + (game_number < remainder[row])
+    return games
+
+
+def write_synthetic_games(source_path, factor, out_path, seed=0):
+    """Writes the game rows of a scaled copy of source_path to out_path."""
+    data = scale_dataset(parse_nba_csv(source_path), factor, seed=seed)
+    split_into_games(data).to_csv(out_path, index=False)
+    return out_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic, scaled copy of nba.csv")
+    parser.add_argument("factor", type=int, help="number of copies of the source rows")
+    parser.add_argument("-s", "--source", default="nba.csv")
+    parser.add_argument("-o", "--output", default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--games", action="store_true", help="write one row per game instead of per season")
+    args = parser.parse_args()
+
+    if args.games:
+        out_path = args.output or f"games_{args.factor}x.csv"
+        write_synthetic_games(args.source, args.factor, out_path, seed=args.seed)
+    else:
+        out_path = args.output or f"nba_{args.factor}x.csv"
+        write_synthetic_csv(args.source, args.factor, out_path, seed=args.seed)
+    print(out_path)
+
+
+if __name__ == "__main__":
+    main()
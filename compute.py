@@ -0,0 +1,522 @@
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+from metrics import LEAGUE_METRICS, PLAYER_METRICS, TEAM_METRICS, compute_metrics
+from storage import PartitionedStore, read_nba_csv
+
+total_cols = ['MIN', 'FGM', 'FGA', 'FG3M', 'FG3A', 'FTM', 'FTA',
+              'OREB', 'DREB', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS']
+
+# Pool for create_all_season_tables(): 'process', 'thread' or 'serial', and its size (0 = one per CPU)
+BUILD_EXECUTOR = os.environ.get("NBA_BUILD_EXECUTOR", "process")
+BUILD_WORKERS = int(os.environ.get("NBA_BUILD_WORKERS", "0"))
+
+# Start method of process workers: 'spawn' doesn't fork a parent that may be running threads
+BUILD_START_METHOD = os.environ.get("NBA_BUILD_START_METHOD", "spawn")
+
+
+def sample_data():
+    """Small built-in dataset used when nba.csv is not available."""
+    return pd.DataFrame({
+        'PLAYER': ['LeBron James', 'Stephen Curry', 'Kevin Durant', 'Giannis Antetokounmpo', 'Nikola Jokic',
+                   'Luka Doncic', 'Damian Lillard', 'Joel Embiid', 'Kawhi Leonard', 'James Harden'],
+        'TEAM': ['LAL', 'GSW', 'BKN', 'MIL', 'DEN', 'DAL', 'POR', 'PHI', 'LAC', 'BKN'],
+        'year': ['2023-24', '2023-24', '2023-24', '2023-24', '2023-24',
+                 '2023-24', '2023-24', '2023-24', '2023-24', '2023-24'],
+        'Season_type': ['Regular Season', 'Regular Season', 'Regular Season', 'Regular Season', 'Regular Season',
+                    'Regular Season', 'Regular Season', 'Regular Season', 'Regular Season', 'Regular Season'],
+        'GP': [60, 74, 58, 73, 79, 70, 68, 69, 52, 72],
+        'MIN': [2100, 2368, 2146, 2482, 2765, 2520, 2312, 2415, 1768, 2520],
+        'PTS': [1740, 2072, 1682, 2336, 2133, 2310, 1768, 2277, 1248, 1728],
+        'FGM': [648, 676, 588, 864, 832, 756, 544, 776, 464, 544],
+        'FGA': [1260, 1480, 1160, 1460, 1580, 1610, 1360, 1480, 928, 1300],
+        'FG3M': [156, 380, 168, 48, 88, 238, 272, 48, 104, 232],
+        'FG3A': [468, 940, 456, 168, 248, 680, 748, 144, 286, 640],
+        'FTM': [288, 340, 328, 560, 380, 560, 408, 676, 216, 408],
+        'FTA': [330, 368, 374, 750, 460, 656, 440, 770, 248, 456],
+        'OREB': [48, 36, 24, 205, 198, 70, 42, 138, 56, 44],
+        'DREB': [414, 325, 372, 708, 774, 520, 238, 660, 282, 412],
+        'REB': [462, 361, 396, 913, 972, 590, 280, 798, 338, 456],
+        'AST': [534, 518, 354, 450, 776, 588, 496, 370, 226, 684],
+        'STL': [78, 81, 64, 94, 110, 116, 74, 70, 82, 104],
+        'BLK': [54, 26, 72, 94, 82, 46, 28, 128, 44, 42],
+        'TOV': [228, 236, 186, 248, 304, 290, 198, 226, 158, 264],
+        'PF': [114, 168, 138, 192, 220, 174, 150, 240, 122, 184]
+    })
+
+
+def season_label(season_start_year):
+    """Formats season start years as '2012-13' style labels, one string build per distinct year."""
+    years = pd.Series(season_start_year)
+    labels = {year: f"{year}-{str(year + 1)[2:]}" for year in years.unique()}
+    return years.map(labels)
+
+
+# Ratio metrics (see metrics.PLAYER_METRICS) added to the per-minute table
+PER_MIN_METRICS = ['FG%', '3PT%', 'FT%', 'FG3A%', 'PTS/FGA', 'FG3M/FGM', 'FTA/FGA', 'TRU%', 'AST_TOV']
+
+# Metrics added to the team and league tables (see metrics.TEAM_METRICS and metrics.LEAGUE_METRICS)
+TEAM_SEASON_METRICS = ['POSS_est', 'PACE', 'ORtg', 'AST_ratio', 'FG3_ratio', 'FG_PCT', 'FG3_PCT', 'PTS_per_POSS']
+LEAGUE_TREND_METRICS = ['3PAr', '3PT_pts', '2PT_pts', 'FT_pts', 'POSS_est', 'PACE', 'ORtg']
+
+# Per-game columns of a career table
+CAREER_STATS = ['PTS', 'REB', 'AST', 'STL', 'BLK']
+
+
+@timed('compute.per_min')
+def create_per_min_stats(data, total_cols):
+    """
+    Aggregates player totals per season and converts them to per-minute stats and shooting ratios.
+    
+    The input frame is never modified, so it is safe to pass cached data.
+    
+    Parameters:
+    data (pandas.DataFrame): Player rows with PLAYER (and PLAYER_ID), season_start_year (or year) and the total columns
+    total_cols (list): Counting stat columns to aggregate
+    
+    Returns:
+    pandas.DataFrame: One row per player and season with per-minute stats and ratio columns
+    """
+    # Group on the integer season year when we have it, it's much cheaper than the string label.
+    # Players are grouped by id when available since different players can share a name.
+    season_col = 'season_start_year' if 'season_start_year' in data.columns else 'year'
+    player_col = 'PLAYER_ID' if 'PLAYER_ID' in data.columns else 'PLAYER'
+    grouped = data.groupby([player_col, season_col])
+    totals = grouped[total_cols].sum()
+    
+    # Filter out players with minimal minutes to avoid division issues
+    keep = (totals['MIN'] >= 50).to_numpy()
+    totals = totals[keep]
+    
+    keys = totals.index.to_frame(index=False)
+    if player_col == 'PLAYER_ID':
+        columns = {
+            'PLAYER_ID': keys['PLAYER_ID'].to_numpy(),
+            'PLAYER': grouped['PLAYER'].first().to_numpy()[keep],
+        }
+    else:
+        columns = {'PLAYER': keys['PLAYER'].to_numpy()}
+    if season_col == 'season_start_year':
+        columns['year'] = season_label(keys['season_start_year']).to_numpy()
+        columns['season_start_year'] = keys['season_start_year'].to_numpy()
+    else:
+        columns['year'] = keys['year'].to_numpy()
+    
+    # Per-minute stats for every column at once (minutes themselves stay as totals)
+    minutes = totals['MIN'].to_numpy(dtype='float64')
+    per_min = totals.to_numpy(dtype='float64') / minutes[:, None]
+    per_min_cols = {}
+    for i, col in enumerate(total_cols):
+        per_min_cols[col] = totals['MIN'].to_numpy() if col == 'MIN' else per_min[:, i]
+    columns.update(per_min_cols)
+    
+    # Shooting percentages and other ratios, computed on the per-minute arrays in one pass
+    columns.update(compute_metrics(per_min_cols, PER_MIN_METRICS, PLAYER_METRICS))
+    
+    return pd.DataFrame(columns)
+
+
+@timed('compute.preprocess')
+def preprocess_nba_data(data):
+    """
+    Preprocesses NBA data to ensure consistent formatting and handle common issues.
+    
+    Parameters:
+    data (pandas.DataFrame): The raw NBA data
+    
+    Returns:
+    pandas.DataFrame: Cleaned and preprocessed data
+    """
+    # Shallow copy: with copy-on-write, new or replaced columns never reach the caller's frame
+    df = data.copy(deep=False)
+    
+    # Check for column names that need to be standardized
+    column_map = {
+        'PLAYER_NAME': 'PLAYER',
+        'PLAYER ID': 'PLAYER_ID',
+        'TEAM_ABBREVIATION': 'TEAM',
+        'GAMES PLAYED': 'GP',
+        'MINUTES': 'MIN',
+        'POINTS': 'PTS',
+        'FIELD_GOALS_MADE': 'FGM',
+        'FIELD_GOALS_ATTEMPTED': 'FGA',
+        'FIELD_GOAL_PERCENTAGE': 'FG_PCT',
+        'THREE_POINTS_MADE': 'FG3M',
+        'THREE_POINTS_ATTEMPTED': 'FG3A',
+        'THREE_POINT_PERCENTAGE': 'FG3_PCT',
+        'FREE_THROWS_MADE': 'FTM',
+        'FREE_THROWS_ATTEMPTED': 'FTA',
+        'FREE_THROW_PERCENTAGE': 'FT_PCT',
+        'OFFENSIVE_REBOUNDS': 'OREB',
+        'DEFENSIVE_REBOUNDS': 'DREB',
+        'REBOUNDS': 'REB',
+        'ASSISTS': 'AST',
+        'STEALS': 'STL',
+        'BLOCKS': 'BLK',
+        'TURNOVERS': 'TOV',
+        'PERSONAL_FOULS': 'PF',
+    }
+    
+    # Apply the column mapping for columns that exist
+    for old_col, new_col in column_map.items():
+        if old_col in df.columns and new_col not in df.columns:
+            df[new_col] = df[old_col]
+    
+    # Handle season format
+    if 'season_start_year' not in df.columns:
+        if 'year' in df.columns:
+            # Try to extract the season start year from the 'year' column
+            try:
+                df['season_start_year'] = df['year'].astype(str).str.split('-').str[0].astype(int)
+            except:
+                # If that fails, try to handle year in a different format
+                pass
+    
+    # Handle team abbreviations
+    if 'TEAM' in df.columns:
+        # Standardize team abbreviations
+        team_map = {
+            'NOP': 'NO',
+            'NOH': 'NO',
+            'BRK': 'BKN',
+            'PHO': 'PHX',
+            'CHH': 'CHA',
+            'UTH': 'UTA'
+        }
+        
+        df['TEAM'] = df['TEAM'].replace(team_map)
+    
+    # Create a standard year column if needed
+    if 'year' not in df.columns and 'season_start_year' in df.columns:
+        df['year'] = df['season_start_year'].astype(str) + '-' + df['season_start_year'].add(1).astype(str).str[-2:]
+    
+    # Players are looked up by id, derive one from the name if the source doesn't have it
+    if 'PLAYER_ID' not in df.columns and 'PLAYER' in df.columns:
+        df['PLAYER_ID'] = pd.factorize(df['PLAYER'])[0] + 1
+    
+    # Make sure Season_type is standardized
+    if 'Season_type' not in df.columns:
+        if 'SEASON_TYPE' in df.columns:
+            df['Season_type'] = df['SEASON_TYPE']
+        else:
+            # Default to Regular Season if not specified
+            df['Season_type'] = 'Regular Season'
+    
+    return df
+
+
+@timed('compute.team_stats')
+def create_team_season_stats(data, total_cols):
+    team_stats = data.groupby(['TEAM', 'season_start_year'])[total_cols + ['GP']].sum().reset_index()
+    
+    # Possessions, pace, ratings and shooting ratios as defined in metrics.TEAM_METRICS
+    base = {col: team_stats[col].to_numpy() for col in total_cols + ['GP']}
+    return team_stats.assign(**compute_metrics(base, TEAM_SEASON_METRICS, TEAM_METRICS))
+
+
+@timed('compute.league_trends')
+def create_league_trends(data, total_cols):
+    """
+    Aggregates league-wide shooting, scoring mix, pace and efficiency per season and season type.
+    
+    Parameters:
+    data (pandas.DataFrame): Preprocessed player rows
+    total_cols (list): Counting stat columns to aggregate
+    
+    Returns:
+    pandas.DataFrame: One row per season and season type with the league trend metrics
+    """
+    trends = data.groupby(['season_start_year', 'Season_type'])[total_cols].sum().reset_index()
+    
+    # Scoring mix in percent of points, and pace per 240 player-minutes (one team game), see metrics.LEAGUE_METRICS
+    base = {col: trends[col].to_numpy() for col in total_cols}
+    return trends.assign(**compute_metrics(base, LEAGUE_TREND_METRICS, LEAGUE_METRICS))
+
+
+@timed('compute.load_dataset')
+def load_dataset(csv_path="nba.csv"):
+    """
+    Loads the raw season data, falling back to sample_data() when the CSV is missing.
+
+    Parameters:
+    csv_path (str): Path to the CSV file
+
+    Returns:
+    pandas.DataFrame: Raw player rows with season_start_year
+    """
+    try:
+        data = read_nba_csv(csv_path)
+    except FileNotFoundError:
+        data = sample_data()
+
+    if 'season_start_year' not in data.columns:
+        data['season_start_year'] = data['year'].str[:4].astype(int)
+
+    data['TEAM'] = data['TEAM'].replace(['NOP', 'NOH'], 'NO')
+
+    return data
+
+
+# Label columns stored as categoricals in the shared tables
+CATEGORY_COLS = ['PLAYER', 'TEAM', 'year', 'Season_type']
+
+
+def read_only_frame(columns, index=None):
+    """
+    Builds a frame whose numeric and categorical columns are read-only views of the given arrays.
+
+    Tables are held once per process and handed to every session, so an in-place write
+    (df.loc[...] = ...) to one raises instead of changing what the other sessions see. Frames
+    derived from it (filters, copies, new columns on a copy) are ordinary writable frames.
+
+    Parameters:
+    columns (dict): Column name -> numpy array, Categorical or Series
+    index (pandas.Index): Row index, a RangeIndex by default
+
+    Returns:
+    pandas.DataFrame: A frame sharing the arrays, with the writeable flag off
+    """
+    frozen = {}
+    for col, values in columns.items():
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = pd.Categorical(values)
+            codes = values.codes.view()
+            codes.flags.writeable = False
+            values = pd.Categorical.from_codes(codes, dtype=values.dtype, validate=False)
+        elif isinstance(values.dtype, np.dtype) and values.dtype.kind in 'biuf':
+            values = np.asarray(values).view()
+            values.flags.writeable = False
+        frozen[col] = values
+    return pd.DataFrame(frozen, index=index, copy=False)
+
+
+def compact_frame(frame):
+    """
+    Converts a table to compact dtypes for sharing between sessions.
+
+    Label columns become categoricals, integer columns that fit become int16 or int32 (ids stay as they
+    are), floats become float32. Column values are unchanged apart from float rounding. The
+    result is read-only (see read_only_frame()).
+
+    Parameters:
+    frame (pandas.DataFrame): Table to convert
+
+    Returns:
+    pandas.DataFrame: A new frame with the compact dtypes
+    """
+    # One pass of numpy casts and a single frame build, DataFrame.astype() costs far more per column
+    int16 = np.iinfo('int16')
+    columns = {}
+    for col, dtype in frame.dtypes.items():
+        values = frame[col]
+        if col in CATEGORY_COLS:
+            if not isinstance(dtype, pd.CategoricalDtype):
+                codes, categories = pd.factorize(values, sort=True)
+                values = pd.Categorical.from_codes(codes, categories=categories)
+        elif pd.api.types.is_integer_dtype(dtype) and not col.endswith('_ID') and len(frame):
+            array = values.to_numpy()
+            if array.min() >= int16.min and array.max() <= int16.max:
+                values = array.astype('int16')
+            elif dtype == 'int64' and array.min() >= np.iinfo('int32').min and array.max() <= np.iinfo('int32').max:
+                values = array.astype('int32')
+        elif pd.api.types.is_float_dtype(dtype):
+            values = values.to_numpy().astype('float32', copy=False)
+        columns[col] = values
+    return read_only_frame(columns, index=frame.index)
+
+
+def concat_tables(frames):
+    """
+    Concatenates per-season tables, keeping categorical columns categorical.
+
+    pd.concat falls back to plain strings when categories differ, so every categorical
+    column is first given the union of all the frames' categories (only the codes change).
+    The result is read-only like the tables it is built from (see read_only_frame()).
+    """
+    frames = list(frames)
+    if not frames:
+        return pd.DataFrame()
+    categorical = [col for col, dtype in frames[0].dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+    for col in categorical:
+        categories = sorted(set().union(*(frame[col].cat.categories for frame in frames)))
+        frames = [frame.assign(**{col: frame[col].cat.set_categories(categories)}) for frame in frames]
+    combined = pd.concat(frames, ignore_index=True)
+    return read_only_frame({col: combined[col] for col in combined.columns}, index=combined.index)
+
+
+def create_season_tables(season_rows, total_cols=total_cols):
+    """
+    Builds the derived tables for the rows of a single season.
+
+    Parameters:
+    season_rows (pandas.DataFrame): Raw player rows of one season
+    total_cols (list): Counting stat columns to aggregate
+
+    Returns:
+    tuple: season_rows (preprocessed), season_per_min (sorted by player name), season_team_stats,
+           all with compact dtypes (see compact_frame())
+    """
+    season_rows = preprocess_nba_data(season_rows)
+    season_per_min = create_per_min_stats(season_rows, total_cols).sort_values('PLAYER', kind='stable', ignore_index=True)
+    season_team_stats = create_team_season_stats(season_rows, total_cols)
+    return compact_frame(season_rows), compact_frame(season_per_min), compact_frame(season_team_stats)
+
+
+def create_derived_tables(data, total_cols=total_cols):
+    """
+    Runs the whole pipeline over raw rows in one go.
+
+    Parameters:
+    data (pandas.DataFrame): Raw player rows
+    total_cols (list): Counting stat columns to aggregate
+
+    Returns:
+    tuple: data (preprocessed), data_per_min, team_season_stats
+    """
+    data = preprocess_nba_data(data)
+    return data, create_per_min_stats(data, total_cols), create_team_season_stats(data, total_cols)
+
+
+# Store opened once per pool process by _init_build_worker()
+_build_store = {}
+
+
+def _init_build_worker(path):
+    _build_store['store'] = PartitionedStore.from_parquet(path)
+
+
+def _build_season(season, league_trends, store=None):
+    store = _build_store['store'] if store is None else store
+    tables = create_season_tables(store.read(season), total_cols)
+    return season, tables, create_league_trends(tables[0], total_cols) if league_trends else None
+
+
+@timed('compute.all_season_tables')
+def create_all_season_tables(store, seasons=None, league_trends=False, workers=BUILD_WORKERS, executor=BUILD_EXECUTOR):
+    """
+    Runs create_season_tables() (and optionally the league trends) for many seasons over a pool.
+
+    Every derived table is season-local (per-minute rows and team totals sum over both season
+    types of a season), so seasons are independent units of work. Results are collected by
+    season, not in completion order, so the output is the same as the serial loop whatever
+    the pool. Process workers are started with BUILD_START_METHOD, reopen the store's Parquet
+    file and read only their seasons; in-memory stores can't be shared with processes and use
+    threads instead. Processes suit the command line and benchmarks, the dashboard uses threads.
+
+    Parameters:
+    store (PartitionedStore): Partitions to read from
+    seasons (list): Season start years, defaults to every season of the store
+    league_trends (bool): Also build each season's create_league_trends() rows
+    workers (int): Pool size, 0 for one per CPU; with 1 worker or 1 season everything runs in this process
+    executor (str): 'process', 'thread' or 'serial'
+
+    Returns:
+    dict: season -> (season_rows, season_per_min, season_team_stats), plus the season's league trends
+          as a 4th item when league_trends is set, in season order
+    """
+    seasons = store.seasons if seasons is None else list(seasons)
+    workers = min(workers or os.cpu_count() or 1, len(seasons))
+    if executor == 'process' and store.path is None:
+        executor = 'thread'
+
+    build = functools.partial(_build_season, league_trends=league_trends)
+    if executor == 'serial' or workers <= 1:
+        results = [build(season, store=store) for season in seasons]
+    elif executor == 'process':
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(BUILD_START_METHOD),
+                                 initializer=_init_build_worker, initargs=(store.path,)) as pool:
+            results = list(pool.map(build, seasons))
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(functools.partial(build, store=store), seasons))
+
+    built = {season: tables + (trends,) if league_trends else tables for season, tables, trends in results}
+    return {season: built[season] for season in seasons}
+
+
+@timed('compute.career_stats')
+def create_career_stats(player_career, stat_cols):
+    """
+    Sums a player's rows per season and adds per-game columns for the headline stats.
+
+    Parameters:
+    player_career (pandas.DataFrame): Every row of one player
+    stat_cols (list): Counting stat columns present in the rows
+
+    Returns:
+    tuple: career_by_season, list of stats that got a '<stat>_per_game' column
+    """
+    career_by_season = player_career.groupby('season_start_year')[stat_cols + ['GP']].sum().reset_index()
+
+    per_game_cols = [col for col in CAREER_STATS if col in stat_cols]
+    base = {col: career_by_season[col].to_numpy() for col in per_game_cols + ['GP']}
+    per_game = compute_metrics(base, [f'{col}_per_game' for col in per_game_cols], PLAYER_METRICS)
+    return career_by_season.assign(**per_game), per_game_cols
+
+
+class MetricDistributions:
+    """
+    League-wide distribution of every numeric metric in one table (a season's players or teams).
+
+    Holds the max, mean, standard deviation and the sorted finite values per metric, so
+    charts can normalize against the whole league and percentile ranks are a binary search
+    instead of a rescan of the table.
+
+    Parameters:
+    frame (pandas.DataFrame): One row per player or team
+    metrics (list): Columns to summarize, defaults to every numeric column except ids and the season
+    """
+
+    def __init__(self, frame, metrics=None):
+        if metrics is None:
+            metrics = [col for col in frame.select_dtypes('number').columns
+                       if col not in ('PLAYER_ID', 'season_start_year')]
+
+        self.metrics = list(metrics)
+        self.sorted_values = {}
+        self.max = {}
+        self.mean = {}
+        self.std = {}
+        for metric in self.metrics:
+            values = frame[metric].to_numpy(dtype='float64')
+            values = np.sort(values[np.isfinite(values)])
+            self.sorted_values[metric] = values
+            if len(values):
+                self.max[metric] = values[-1]
+                self.mean[metric] = values.mean()
+                self.std[metric] = values.std()
+            else:
+                self.max[metric] = self.mean[metric] = self.std[metric] = np.nan
+
+    def percentile(self, metric, values):
+        """
+        Percentile ranks (0-100) of values within the league: the share of rows at or below each value.
+
+        Parameters:
+        metric (str): Metric name
+        values (scalar or array-like): Values to rank, NaN stays NaN
+
+        Returns:
+        numpy.ndarray: Percentile rank per value
+        """
+        ranked = self.sorted_values[metric]
+        values = np.asarray(values, dtype='float64')
+        if not len(ranked):
+            return np.full(values.shape, np.nan)
+        ranks = 100.0 * np.searchsorted(ranked, values, side='right') / len(ranked)
+        return np.where(np.isnan(values), np.nan, ranks)
+
+    def table(self):
+        """Summary table with one row per metric."""
+        return pd.DataFrame({
+            'count': [len(self.sorted_values[m]) for m in self.metrics],
+            'max': [self.max[m] for m in self.metrics],
+            'mean': [self.mean[m] for m in self.metrics],
+            'std': [self.std[m] for m in self.metrics],
+        }, index=self.metrics)
@@ -0,0 +1,135 @@
+"""
+Every player-season on two metrics, thinned on the server to what a browser can draw.
+
+Metric columns are float32 (per 36 minutes for counting stats) and computed on first use.
+When more points qualify than POINT_BUDGET, the plot area is cut into a grid and one point
+is kept per occupied cell, with the number of player-seasons it stands for: dense regions
+collapse, while outliers (the points worth hovering over) all stay. The grid is the finest
+whose occupied cells fit the budget, and a zoomed-in range is thinned again at full detail.
+"""
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from metrics import PlayerMetricColumns
+
+# Most points sent to the browser for one chart
+POINT_BUDGET = int(os.environ.get("NBA_SCATTER_BUDGET", "10000"))
+
+# Finest grid tried when thinning, per axis
+MAX_GRID = 4096
+
+
+def main_teams(data):
+    """The team a player logged the most minutes for in each season, as a (PLAYER_ID, season_start_year) -> TEAM frame."""
+    keys = ['PLAYER_ID', 'season_start_year']
+    minutes = data.groupby(keys + ['TEAM'], observed=True, sort=False)['MIN'].sum().reset_index()
+    return minutes.sort_values('MIN', kind='stable').drop_duplicates(keys, keep='last')[keys + ['TEAM']]
+
+
+def thin_to_grid(x, y, budget, x_range, y_range):
+    """
+    One representative per occupied cell of the finest grid with at most `budget` occupied cells.
+
+    Parameters:
+    x, y (numpy.ndarray): Finite coordinates
+    budget (int): Most points to keep
+    x_range, y_range (tuple): Extent of the grid
+
+    Returns:
+    tuple: positions of the kept points, number of points each one stands for, grid size
+    """
+    def cells(size):
+        x_cell = np.clip(((x - x_range[0]) / (x_range[1] - x_range[0] or 1) * size).astype('int64'), 0, size - 1)
+        y_cell = np.clip(((y - y_range[0]) / (y_range[1] - y_range[0] or 1) * size).astype('int64'), 0, size - 1)
+        return np.unique(x_cell * size + y_cell, return_index=True, return_counts=True)
+
+    # A grid of isqrt(budget)^2 cells always fits: double it while it still does, then bisect
+    # between the last size that fit and the first that didn't
+    low, high = max(1, math.isqrt(budget)), None
+    _, keep, counts = cells(low)
+    while high is None and low * 2 <= MAX_GRID:
+        _, finer_keep, finer_counts = cells(low * 2)
+        if len(finer_keep) > budget:
+            high = low * 2
+        else:
+            low, keep, counts = low * 2, finer_keep, finer_counts
+    while high is not None and high - low > max(1, low // 32):
+        middle = (low + high) // 2
+        _, middle_keep, middle_counts = cells(middle)
+        if len(middle_keep) > budget:
+            high = middle
+        else:
+            low, keep, counts = middle, middle_keep, middle_counts
+    order = np.argsort(keep)
+    return keep[order], counts[order].astype('int32'), low
+
+
+class PlayerSeasonExplorer:
+    """
+    Player-seasons of the per-minute table on any two per-36 or ratio metrics.
+
+    Parameters:
+    per_min (pandas.DataFrame): Per-minute table of every season
+    data (pandas.DataFrame): Preprocessed player rows, for each player-season's main team
+    """
+
+    def __init__(self, per_min, data):
+        keys = per_min[['PLAYER_ID', 'season_start_year']]
+        teams = keys.merge(main_teams(data), on=['PLAYER_ID', 'season_start_year'], how='left')['TEAM']
+        self.players = pd.DataFrame({
+            'PLAYER': per_min['PLAYER'].to_numpy(),
+            'TEAM': teams.astype('category').to_numpy(),
+            'season_start_year': per_min['season_start_year'].to_numpy(dtype='int16'),
+        })
+        self.seasons = sorted(int(season) for season in np.unique(self.players['season_start_year']))
+        self._columns = PlayerMetricColumns(per_min)
+        self.metrics = self._columns.metrics
+        self.per36_metrics = self._columns.per36_metrics
+        self._minutes = self._columns.column('MIN')
+
+    def column(self, metric):
+        """float32 values of one metric for every player-season, per 36 minutes for counting stats."""
+        return self._columns.column(metric)
+
+    def points(self, x_metric, y_metric, min_minutes=0, seasons=None, x_range=None, y_range=None,
+               budget=POINT_BUDGET):
+        """
+        The points of one chart, thinned to the budget.
+
+        Parameters:
+        x_metric, y_metric (str): Metrics of self.metrics
+        min_minutes (int): Player-seasons with fewer minutes are left out
+        seasons (tuple): First and last season start year, all seasons when None
+        x_range, y_range (tuple): Only points inside these (low, high) ranges, e.g. a zoomed-in area
+        budget (int): Most points returned
+
+        Returns:
+        dict: x and y (float32), rows (positions into self.players), counts (player-seasons per point),
+              total (qualifying player-seasons) and grid (cells per axis, 0 when nothing was thinned)
+        """
+        x = self.column(x_metric)
+        y = self.column(y_metric)
+        keep = np.isfinite(x) & np.isfinite(y)
+        if min_minutes > 0:
+            keep &= self._minutes >= min_minutes
+        if seasons is not None:
+            season_values = self.players['season_start_year'].to_numpy()
+            keep &= (season_values >= seasons[0]) & (season_values <= seasons[1])
+        if x_range is not None:
+            keep &= (x >= x_range[0]) & (x <= x_range[1])
+        if y_range is not None:
+            keep &= (y >= y_range[0]) & (y <= y_range[1])
+
+        rows = np.flatnonzero(keep)
+        counts = np.ones(len(rows), dtype='int32')
+        grid = 0
+        if len(rows) > budget:
+            x_kept, y_kept = x[rows], y[rows]
+            extent_x = x_range or (float(x_kept.min()), float(x_kept.max()))
+            extent_y = y_range or (float(y_kept.min()), float(y_kept.max()))
+            picked, counts, grid = thin_to_grid(x_kept, y_kept, budget, extent_x, extent_y)
+            rows = rows[picked]
+        return {'x': x[rows], 'y': y[rows], 'rows': rows, 'counts': counts, 'total': int(keep.sum()), 'grid': grid}
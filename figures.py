@@ -0,0 +1,528 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from instrumentation import count_cache, stage
+
+team_colors = {
+    'ATL': '#E03A3E', 'BOS': '#007A33', 'BKN': '#000000', 'CHA': '#1D1160',
+    'CHI': '#CE1141', 'CLE': '#860038', 'DAL': '#00538C', 'DEN': '#0E2240',
+    'DET': '#C8102E', 'GSW': '#1D428A', 'HOU': '#CE1141', 'IND': '#002D62',
+    'LAC': '#C8102E', 'LAL': '#552583', 'MEM': '#5D76A9', 'MIA': '#98002E',
+    'MIL': '#00471B', 'MIN': '#0C2340', 'NO': '#0C2340', 'NYK': '#006BB6',
+    'OKC': '#007AC1', 'ORL': '#0077C0', 'PHI': '#006BB6', 'PHX': '#1D1160',
+    'POR': '#E03A3E', 'SAC': '#5A2D81', 'SAS': '#C4CED4', 'TOR': '#CE1141',
+    'UTA': '#002B5C', 'WAS': '#002B5C', 'NOH': '#0C2340', 'NOP': '#0C2340'
+}
+
+team_names = {
+    'ATL': 'Atlanta Hawks', 'BOS': 'Boston Celtics', 'BKN': 'Brooklyn Nets',
+    'CHA': 'Charlotte Hornets', 'CHI': 'Chicago Bulls', 'CLE': 'Cleveland Cavaliers',
+    'DAL': 'Dallas Mavericks', 'DEN': 'Denver Nuggets', 'DET': 'Detroit Pistons',
+    'GSW': 'Golden State Warriors', 'HOU': 'Houston Rockets', 'IND': 'Indiana Pacers',
+    'LAC': 'LA Clippers', 'LAL': 'Los Angeles Lakers', 'MEM': 'Memphis Grizzlies',
+    'MIA': 'Miami Heat', 'MIL': 'Milwaukee Bucks', 'MIN': 'Minnesota Timberwolves',
+    'NO': 'New Orleans Pelicans', 'NYK': 'New York Knicks', 'OKC': 'Oklahoma City Thunder',
+    'ORL': 'Orlando Magic', 'PHI': 'Philadelphia 76ers', 'PHX': 'Phoenix Suns',
+    'POR': 'Portland Trail Blazers', 'SAC': 'Sacramento Kings', 'SAS': 'San Antonio Spurs',
+    'TOR': 'Toronto Raptors', 'UTA': 'Utah Jazz', 'WAS': 'Washington Wizards'
+}
+
+
+def _normalize_key(value):
+    # numpy scalars and lists coming from widgets hash the same as their plain Python equivalents;
+    # as in any dict, equal numbers (2012 and 2012.0) are the same key
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize_key(item) for item in value)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class FigureCache:
+    """
+    Bounded LRU cache of built figures, shared by every session.
+
+    Entries hold the serialized figure spec (``fig.to_dict()``) rather than the figure
+    object, and every hit returns a fresh ``go.Figure`` built from it without re-running
+    Plotly's property validation, so callers can't change what other sessions get and a
+    hit costs about a millisecond instead of the full px/go build.
+
+    Parameters:
+    max_entries (int): Number of figures kept before the least recently used one is evicted
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._specs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        """
+        Returns the figure cached under key, calling build() to create it on a miss.
+
+        Parameters:
+        key (tuple): Figure name, data fingerprint and the widget selection it depends on
+        build (callable): Zero-argument function returning a plotly Figure
+
+        Returns:
+        plotly.graph_objects.Figure: A new figure object for the cached spec
+        """
+        key = _normalize_key(key)
+        with self._lock:
+            spec = self._specs.get(key)
+            if spec is not None:
+                self._specs.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        count_cache('figures', spec is not None)
+
+        if spec is None:
+            # Built outside the lock so a slow figure doesn't block hits for other sessions
+            with stage(f"figure.{key[0]}"):
+                fig = build()
+            with stage("figure.to_dict"):
+                spec = fig.to_dict()
+            with self._lock:
+                self._specs[key] = spec
+                self._specs.move_to_end(key)
+                while len(self._specs) > self.max_entries:
+                    self._specs.popitem(last=False)
+
+        with stage("figure.from_spec"):
+            return go.Figure(spec, _validate=False)
+
+    def stats(self):
+        """Returns the hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._specs),
+                'max_entries': self.max_entries,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._specs.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Team Analysis metrics
+team_comparison_metrics = ['PTS', 'AST', 'REB', 'STL', 'BLK', 'FG_PCT', 'FG3_PCT', 'AST_ratio']
+
+team_style_labels = {
+    'PACE': 'Pace of Play',
+    'ORtg': 'Offensive Rating',
+    'FG3_ratio': '3PT Attempt Rate',
+    'AST_ratio': 'Assist Ratio',
+    'PTS_per_POSS': 'Scoring Efficiency'
+}
+
+
+def three_point_trend_figure(trends, season_range):
+    fig = px.line(trends, x='season_start_year', y='3PAr',
+                title=f"Evolution of 3-Point Attempt Rate ({season_range})",
+                markers=True, line_shape='linear')
+
+    fig.update_layout(
+        xaxis_title="Season",
+        yaxis_title="3-Point Attempt Rate (3PA/FGA)",
+        yaxis=dict(tickformat='.0%'),
+        hovermode="x unified",
+        height=500
+    )
+    return fig
+
+
+def scoring_distribution_figure(trends, season_range):
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatter(
+        x=trends['season_start_year'],
+        y=trends['3PT_pts'],
+        mode='lines',
+        line=dict(width=2, color='rgb(0, 119, 182)'),
+        stackgroup='one',
+        name='Points from 3-pointers'
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=trends['season_start_year'],
+        y=trends['2PT_pts'],
+        mode='lines',
+        line=dict(width=2, color='rgb(223, 42, 42)'),
+        stackgroup='one',
+        name='Points from 2-pointers'
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=trends['season_start_year'],
+        y=trends['FT_pts'],
+        mode='lines',
+        line=dict(width=2, color='rgb(86, 179, 86)'),
+        stackgroup='one',
+        name='Points from Free Throws'
+    ))
+
+    fig.update_layout(
+        title=f"NBA Scoring Distribution by Point Type ({season_range})",
+        xaxis_title="Season",
+        yaxis_title="Percentage of Total Points",
+        legend=dict(x=0.01, y=0.99),
+        hovermode="x unified",
+        height=400
+    )
+    return fig
+
+
+def pace_efficiency_figure(trends, season_range):
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+
+    fig.add_trace(
+        go.Scatter(
+            x=trends['season_start_year'],
+            y=trends['PACE'],
+            mode='lines+markers',
+            name='Pace (Possessions per 48 min)',
+            marker=dict(color='#17408B')
+        ),
+        secondary_y=False,
+    )
+
+    fig.add_trace(
+        go.Scatter(
+            x=trends['season_start_year'],
+            y=trends['ORtg'],
+            mode='lines+markers',
+            name='Offensive Rating',
+            marker=dict(color='#C9082A')
+        ),
+        secondary_y=True,
+    )
+
+    fig.update_layout(
+        title=f"NBA Game Pace and Offensive Efficiency ({season_range})",
+        legend=dict(x=0.01, y=0.99),
+        height=400
+    )
+
+    fig.update_xaxes(title_text="Season")
+
+    fig.update_yaxes(
+        title_text="Pace (Possessions per 48 min)",
+        title_font=dict(color="#17408B"),
+        tickfont=dict(color="#17408B"),
+        secondary_y=False
+    )
+
+    fig.update_yaxes(
+        title_text="Offensive Rating (Points per 100 Possessions)",
+        title_font=dict(color="#C9082A"),
+        tickfont=dict(color="#C9082A"),
+        secondary_y=True
+    )
+    return fig
+
+
+def team_comparison_figure(team1_data, team2_data, team1, team2, selected_season):
+    metrics = team_comparison_metrics
+
+    # Prepare data for bar chart
+    teams_data = pd.DataFrame({
+        'Metric': metrics,
+        team1: [team1_data[m].values[0] if not team1_data[m].empty else 0 for m in metrics],
+        team2: [team2_data[m].values[0] if not team2_data[m].empty else 0 for m in metrics]
+    })
+
+    # Create bar chart comparison
+    fig = px.bar(teams_data, x='Metric', y=[team1, team2], barmode='group',
+                title=f"Team Comparison: {team1} vs {team2} ({selected_season}-{selected_season+1} Season)",
+                color_discrete_map={team1: team_colors.get(team1, '#000'), team2: team_colors.get(team2, '#000')})
+
+    fig.update_layout(
+        xaxis_title="Metric",
+        yaxis_title="Value",
+        legend_title="Team",
+        height=500,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+    return fig
+
+
+def team_style_radar_figure(team1_data, team2_data, team1, team2, max_values):
+    style_metrics = list(team_style_labels)
+
+    # Normalize to 0-1 against the league-wide max, so the scale doesn't move with the teams picked
+    team1_values = []
+    team2_values = []
+
+    for metric in style_metrics:
+        team1_val = team1_data[metric].values[0] if not team1_data[metric].empty else 0
+        team2_val = team2_data[metric].values[0] if not team2_data[metric].empty else 0
+
+        team1_values.append(team1_val / max_values[metric])
+        team2_values.append(team2_val / max_values[metric])
+
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatterpolar(
+        r=team1_values,
+        theta=[team_style_labels[m] for m in style_metrics],
+        fill='toself',
+        name=team1,
+        line_color=team_colors.get(team1, '#000')
+    ))
+
+    fig.add_trace(go.Scatterpolar(
+        r=team2_values,
+        theta=[team_style_labels[m] for m in style_metrics],
+        fill='toself',
+        name=team2,
+        line_color=team_colors.get(team2, '#000')
+    ))
+
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 1]
+            )
+        ),
+        title="Team Playing Style Comparison",
+        showlegend=True,
+        height=500
+    )
+    return fig
+
+
+def league_scatter_figure(season_teams, selected_season):
+    # Pace vs. offensive rating for every team in the season
+    fig = px.scatter(season_teams, x='PACE', y='ORtg',
+                    text='TEAM', size='PTS',
+                    title=f"Team Pace vs. Offensive Efficiency ({selected_season}-{selected_season+1} Season)",
+                    labels={'PACE': 'Pace (Possessions per 48 min)',
+                            'ORtg': 'Offensive Rating (Points per 100 Possessions)'},
+                    color='PTS',
+                    color_continuous_scale='Viridis')
+
+    fig.update_traces(textposition='top center', marker=dict(opacity=0.8))
+    fig.update_layout(
+        height=600,
+        xaxis=dict(range=[min(season_teams['PACE'])*0.98, max(season_teams['PACE'])*1.02]),
+        yaxis=dict(range=[min(season_teams['ORtg'])*0.98, max(season_teams['ORtg'])*1.02])
+    )
+    return fig
+
+
+def player_radar_figure(selected_player_data, max_values, radar_metrics, season_year_str):
+    fig = go.Figure()
+
+    # Add each player as a trace
+    for _, player_data in selected_player_data.iterrows():
+        player = player_data['PLAYER']
+
+        # Get values and normalize them (0-1 range)
+        values = []
+        for metric in radar_metrics:
+            if metric in max_values:
+                val = player_data[metric]
+                # Normalize value based on max for that metric
+                normalized_val = val / max_values[metric]
+                values.append(normalized_val)
+
+        # Add trace for this player
+        fig.add_trace(go.Scatterpolar(
+            r=values,
+            theta=radar_metrics,
+            fill='toself',
+            name=player
+        ))
+
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 1]
+            )
+        ),
+        title=f"Player Comparison - {season_year_str} Season",
+        showlegend=True,
+        height=600
+    )
+    return fig
+
+
+def career_trajectory_figure(career_by_season, per_game_cols, player_name):
+    fig = go.Figure()
+
+    for col in per_game_cols:
+        fig.add_trace(go.Scatter(
+            x=career_by_season['season_start_year'],
+            y=career_by_season[f'{col}_per_game'],
+            mode='lines+markers',
+            name=f'{col} per Game'
+        ))
+
+    fig.update_layout(
+        title=f"{player_name} Career Trajectory",
+        xaxis_title="Season",
+        yaxis_title="Statistics per Game",
+        legend=dict(x=0.01, y=0.99),
+        hovermode="x unified",
+        height=500
+    )
+    return fig
+
+
+def rolling_form_figure(trajectories, metric, title):
+    """
+    Rolling-window lines through a season, one per (label, window) pair.
+
+    Parameters:
+    trajectories (dict): label -> RollingForm.trajectory() frame
+    metric (str): One of game_logs.FORM_METRICS
+    title (str): Chart title
+    """
+    fig = go.Figure()
+    dashes = ['solid', 'dash', 'dot']
+    is_pct = metric.endswith('%')
+
+    for label, trajectory in trajectories.items():
+        windows = sorted(trajectory['WINDOW'].unique())
+        for i, window in enumerate(windows):
+            rows = trajectory[trajectory['WINDOW'] == window]
+            fig.add_trace(go.Scatter(
+                x=rows['GAME_NUMBER'],
+                y=rows[metric],
+                mode='lines',
+                line=dict(color=team_colors.get(label), dash=dashes[i % len(dashes)]),
+                name=f'{label}, last {window}' if len(trajectories) > 1 else f'Last {window} games',
+                customdata=rows['GAMES'],
+                hovertemplate=(f'%{{y:.1%}}' if is_pct else '%{y:.1f}') + ' over %{customdata} games',
+            ))
+
+    fig.update_layout(
+        title=title,
+        xaxis_title="Game",
+        yaxis_title=metric if is_pct else f"{metric} per 36 Minutes",
+        yaxis_tickformat='.0%' if is_pct else None,
+        legend=dict(x=0.01, y=0.99),
+        hovermode="x unified",
+        height=450
+    )
+    return fig
+
+
+def team_trend_figure(seasons, series, metric):
+    """
+    One team metric through the seasons, a line per team.
+
+    Parameters:
+    seasons (list): Season start years
+    series (dict): team -> a value per season (NaN where the team didn't play)
+    metric (str): Column of the team cube
+    """
+    fig = go.Figure()
+    label = team_style_labels.get(metric, metric)
+    is_pct = metric in ('FG_PCT', 'FG3_PCT', 'FG3_ratio')
+
+    for team, values in series.items():
+        fig.add_trace(go.Scatter(
+            x=seasons,
+            y=values,
+            mode='lines+markers',
+            line=dict(color=team_colors.get(team)),
+            name=team,
+            connectgaps=False,
+        ))
+
+    fig.update_layout(
+        title=f"{label} by Season",
+        xaxis_title="Season Start Year",
+        yaxis_title=label,
+        yaxis_tickformat='.0%' if is_pct else None,
+        legend=dict(x=0.01, y=0.99),
+        hovermode="x unified",
+        height=450
+    )
+    return fig
+
+
+# Above this many points scatter charts are drawn with WebGL (Scattergl) instead of SVG
+WEBGL_THRESHOLD = 1000
+
+
+def player_explorer_figure(points, players, x_label, y_label, color, x_pct=False, y_pct=False):
+    """
+    Player-season scatter from PlayerSeasonExplorer.points(), with WebGL traces for large point counts.
+
+    Coordinates, seasons and counts go to the browser as typed (base64) arrays; only the player
+    names are strings. Points standing for several player-seasons (after thinning) are drawn
+    larger, and their hover text says how many.
+
+    Parameters:
+    points (dict): Output of PlayerSeasonExplorer.points()
+    players (pandas.DataFrame): PlayerSeasonExplorer.players
+    x_label, y_label (str): Axis titles
+    color (str): 'TEAM' (a trace per team) or 'season_start_year' (a color scale)
+    x_pct, y_pct (bool): Format the axis as percentages
+    """
+    rows = points['rows']
+    counts = points['counts']
+    shown = players.take(rows)
+    names = shown['PLAYER'].astype(str).to_numpy(dtype=object)
+    seasons = shown['season_start_year'].to_numpy(dtype='int32')
+    # Start year and the last two digits of the end year, for a '2015-16' label in the hover template,
+    # plus how many more player-seasons a point stands for once thinned
+    thinned = bool(points['grid'])
+    columns = [seasons, (seasons + 1) % 100] + ([counts - 1] if thinned else [])
+    customdata = np.column_stack(columns).astype('int16' if counts.max(initial=0) < 2 ** 15 else 'int32')
+    hovertemplate = ("%{text} (%{customdata[0]}-%{customdata[1]:02d})<br>" + x_label + ": %{x:.3~g}<br>"
+                     + y_label + ": %{y:.3~g}" + ("<br>and %{customdata[2]:,} more like it" if thinned else ""))
+    sizes = (5 + 2 * np.log2(counts)).astype('float32') if thinned else 6
+
+    trace = go.Scattergl if len(rows) > WEBGL_THRESHOLD else go.Scatter
+    fig = go.Figure()
+    if color == 'TEAM':
+        teams = shown['TEAM'].astype(object).fillna('').to_numpy()
+        for team in sorted(set(teams)):
+            mask = teams == team
+            fig.add_trace(trace(
+                x=points['x'][mask], y=points['y'][mask], mode='markers', name=team or 'Unknown',
+                marker=dict(color=team_colors.get(team), size=sizes[mask] if thinned else sizes, opacity=0.7),
+                text=names[mask], customdata=customdata[mask], hovertemplate=hovertemplate,
+            ))
+    else:
+        fig.add_trace(trace(
+            x=points['x'], y=points['y'], mode='markers', showlegend=False, name="",
+            marker=dict(color=seasons, colorscale='Viridis', size=sizes, opacity=0.7, colorbar=dict(title="Season")),
+            text=names, customdata=customdata, hovertemplate=hovertemplate,
+        ))
+
+    fig.update_layout(
+        xaxis_title=x_label,
+        yaxis_title=y_label,
+        xaxis_tickformat='.0%' if x_pct else None,
+        yaxis_tickformat='.0%' if y_pct else None,
+        dragmode='select',
+        height=650
+    )
+    return fig
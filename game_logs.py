@@ -0,0 +1,211 @@
+"""
+Game logs and rolling-window form.
+
+Game rows are sorted once by (player or team, season, season type, game) and one running
+total per counting stat is taken with a single cumulative sum over the whole table. The sum of
+any window of consecutive games is then the difference of two running totals, so rolling
+5/10/20-game stats for every player come out of one vectorized pass with no per-player loop. Windows do not cross seasons
+or season types; the first games of a season average over the games played so far.
+"""
+import numpy as np
+import pandas as pd
+
+from compute import total_cols
+from ingest import normalize_game_chunk
+from instrumentation import timed
+from player_index import SEASON_BITS, TYPE_BITS, encode_keys
+
+ROLLING_WINDOWS = (5, 10, 20)
+
+# Counting stats shown per 36 minutes over each window
+PER36_STATS = ['PTS', 'REB', 'AST', 'STL', 'BLK', 'TOV']
+
+# Shooting percentages over each window: name -> (numerator, denominator), named as in the per-minute table
+SHOOTING_RATIOS = {
+    'FG%': ('FGM', 'FGA'),
+    '3PT%': ('FG3M', 'FG3A'),
+    'FT%': ('FTM', 'FTA'),
+}
+
+FORM_METRICS = PER36_STATS + list(SHOOTING_RATIOS) + ['TRU%']
+
+# Columns identifying one game, in order of preference, for ordering games and summing teams
+GAME_ORDER_COLS = ['GAME_DATE', 'GAME_ID', 'GAME_NUMBER']
+
+
+@timed('game_logs.load')
+def load_game_logs(csv_path, chunksize=250_000):
+    """
+    Reads a game-level CSV (any layout ingest.py accepts) into a compact frame.
+
+    Games are ordered by GAME_DATE, GAME_ID or GAME_NUMBER, whichever the file has, and
+    by file order otherwise. The column used is kept in the frame's attrs['game_order'],
+    None for file order: player form works either way, team form needs a game identifier.
+    An empty file, with or without a header, gives an empty frame with the same columns.
+
+    Parameters:
+    csv_path (str): Game-level CSV
+    chunksize (int): Rows parsed at a time
+
+    Returns:
+    pandas.DataFrame: season_start_year, Season_type, PLAYER_ID, PLAYER, TEAM, GAME and the
+                      counting stats, one row per player and game
+    """
+    chunks = []
+    offset = 0
+    order_col = None
+    try:
+        reader = pd.read_csv(csv_path, chunksize=chunksize, dtype={'SEASON_YEAR': str, 'year': str})
+    except pd.errors.EmptyDataError:
+        reader = [pd.DataFrame(columns=['year', 'PLAYER_ID', 'TEAM'] + total_cols)]
+    for chunk in reader:
+        games = normalize_game_chunk(chunk)
+        order_col = next((col for col in GAME_ORDER_COLS if col in chunk.columns), None)
+        if order_col == 'GAME_DATE':
+            games['GAME'] = pd.to_datetime(chunk['GAME_DATE']).to_numpy().astype('int64')
+        elif order_col is not None:
+            games['GAME'] = chunk[order_col].to_numpy(dtype='int64')
+        else:
+            games['GAME'] = np.arange(offset, offset + len(chunk), dtype='int64')
+        offset += len(chunk)
+        chunks.append(games)
+
+    games = pd.concat(chunks, ignore_index=True)
+    games['season_start_year'] = games['year'].str[:4].astype('int64')
+    for col in ['PLAYER', 'TEAM', 'Season_type']:
+        games[col] = games[col].astype('category')
+    for col in total_cols:
+        games[col] = games[col].astype('float32')
+    games = games.drop(columns=['year', 'TEAM_ID'])
+    games.attrs['game_order'] = order_col
+    return games
+
+
+def team_game_logs(games):
+    """
+    Sums player game rows into one row per team and game.
+
+    Teammates' rows of one game are matched on GAME, so it must identify the game: with file
+    order (no GAME_DATE, GAME_ID or GAME_NUMBER column) every row would count as its own game.
+
+    Raises:
+    ValueError: If the game logs were loaded without a game identifier
+    """
+    if games.attrs.get('game_order') is None:
+        raise ValueError(f"team game logs need one of the columns {', '.join(GAME_ORDER_COLS)}")
+    keys = ['season_start_year', 'Season_type', 'TEAM', 'GAME']
+    return games.groupby(keys, observed=True, sort=False)[total_cols].sum().reset_index()
+
+
+class RollingForm:
+    """
+    Rolling-window stats over game logs, per player (or team), season and season type.
+
+    Parameters:
+    games (pandas.DataFrame): Output of load_game_logs() or team_game_logs()
+    entity (str): Column identifying a player or team, 'PLAYER_ID' or 'TEAM'
+    """
+
+    def __init__(self, games, entity='PLAYER_ID'):
+        self.entity = entity
+        entity_codes, self.entities = pd.factorize(games[entity], sort=True)
+        type_codes, self.season_types = pd.factorize(games['Season_type'], sort=True)
+        seasons = games['season_start_year'].to_numpy(dtype='int64')
+
+        group_keys = encode_keys(entity_codes, seasons, type_codes)
+        order = np.lexsort((games['GAME'].to_numpy(), group_keys))
+        self._group_keys = group_keys[order]
+        self.games = games[[entity, 'season_start_year', 'Season_type', 'GAME']].iloc[order].reset_index(drop=True)
+
+        n = len(order)
+        new_group = np.ones(n, dtype=bool)
+        new_group[1:] = self._group_keys[1:] != self._group_keys[:-1]
+        starts = np.flatnonzero(new_group)
+        self._group_start = np.repeat(starts, np.diff(np.append(starts, n)))
+
+        # Running totals since the start of each group: exact in float32 for a season of counts,
+        # half the size of one float64 cumulative sum over the whole table
+        stats = sorted(set(PER36_STATS + ['MIN', 'FGA', 'FTA']).union(*SHOOTING_RATIOS.values()))
+        self._running = {}
+        for col in stats:
+            values = games[col].to_numpy(dtype='float64')[order]
+            cumsum = np.cumsum(values)
+            self._running[col] = (cumsum - (cumsum - values)[self._group_start]).astype('float32')
+        self._windows = {}
+
+    def _metrics(self, rows, window):
+        # Rolling metrics ending at each of `rows` (positions in self.games)
+        group_start = self._group_start[rows]
+        start = np.maximum(rows - window + 1, group_start)
+        before = np.maximum(start - 1, 0)
+        sums = {col: running[rows] - np.where(start > group_start, running[before], 0)
+                for col, running in self._running.items()}
+
+        metrics = {'GAMES': (rows + 1 - start).astype('int16')}
+        minutes = sums['MIN']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for col in PER36_STATS:
+                metrics[col] = np.where(minutes > 0, sums[col] / minutes * 36, np.nan).astype('float32')
+            for name, (made, attempted) in SHOOTING_RATIOS.items():
+                metrics[name] = np.where(sums[attempted] > 0, sums[made] / sums[attempted], np.nan).astype('float32')
+            shots = sums['FGA'] + 0.475 * sums['FTA']
+            metrics['TRU%'] = np.where(shots > 0, 0.5 * sums['PTS'] / shots, np.nan).astype('float32')
+        return metrics
+
+    def window(self, window):
+        """
+        Rolling metrics ending at every game of every player, for one window length.
+
+        Returns:
+        pandas.DataFrame: The game keys, GAME_NUMBER (1-based within the season), GAMES in the window
+                          and the FORM_METRICS columns, in the order of self.games
+        """
+        form = self._windows.get(window)
+        if form is None:
+            rows = np.arange(len(self.games))
+            keys = self.games[[self.entity, 'season_start_year', 'Season_type', 'GAME']]
+            form = keys.assign(GAME_NUMBER=(rows - self._group_start + 1).astype('int16'), **self._metrics(rows, window))
+            self._windows[window] = form
+        return form
+
+    def _group_rows(self, entity_id, season, season_type):
+        if entity_id not in self.entities or season_type not in self.season_types:
+            return np.arange(0)
+        key = encode_keys(self.entities.get_loc(entity_id), season, self.season_types.get_loc(season_type))
+        start, stop = np.searchsorted(self._group_keys, [key, key + 1])
+        return np.arange(start, stop)
+
+    def trajectory(self, entity_id, season, season_type='Regular Season', windows=ROLLING_WINDOWS):
+        """
+        Rolling metrics through one player's (or team's) season, for several window lengths.
+
+        Only the rows of that season are touched, so this stays cheap on a full league of game logs.
+
+        Parameters:
+        entity_id: PLAYER_ID or TEAM
+        season (int): Season start year
+        season_type (str): 'Regular Season' or 'Playoffs'
+        windows (tuple): Window lengths in games
+
+        Returns:
+        pandas.DataFrame: GAME_NUMBER, WINDOW, GAMES and the FORM_METRICS columns, one row per game and window
+        """
+        rows = self._group_rows(entity_id, season, season_type)
+        if len(rows) == 0:
+            return pd.DataFrame(columns=['GAME_NUMBER', 'WINDOW', 'GAMES'] + FORM_METRICS)
+        game_numbers = rows - rows[0] + 1
+        parts = [pd.DataFrame({'GAME_NUMBER': game_numbers, 'WINDOW': window, **self._metrics(rows, window)})
+                 for window in windows]
+        return pd.concat(parts, ignore_index=True)
+
+    def seasons_of(self, entity_id):
+        """(season, season type) pairs with game logs for a player or team."""
+        if entity_id not in self.entities:
+            return []
+        code = self.entities.get_loc(entity_id)
+        low, high = encode_keys(code, 0, 0), encode_keys(code + 1, 0, 0)
+        start, stop = np.searchsorted(self._group_keys, [low, high])
+        groups = np.unique(self._group_keys[start:stop])
+        return [(int(season), self.season_types[type_code])
+                for season, type_code in zip((groups >> TYPE_BITS) & ((1 << SEASON_BITS) - 1),
+                                                  groups & ((1 << TYPE_BITS) - 1))]
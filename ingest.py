@@ -0,0 +1,226 @@
+"""
+Streaming ingest of game-level box score files into the season-level nba.csv layout.
+
+The file is read in chunks. Each chunk is summed per (year, Season_type, PLAYER_ID, TEAM)
+and the partial sums are merged as they pile up, so memory is bounded by the number of
+player-team-seasons rather than the number of games. At the end stints with several teams
+are folded into one row per player, season and season type (the team with the most games
+is kept, as a season row has one TEAM) and the derived columns of nba.csv are filled in.
+
+    python -m ingest games.csv -o incoming/games_2024.csv --chunksize 250000
+
+Writing into the watcher's incoming/ directory appends the rows to nba.csv on the next poll.
+"""
+import argparse
+import time
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from compute import total_cols
+from storage import COLUMN_DTYPES
+
+# Column order of nba.csv
+NBA_CSV_COLUMNS = ['year', 'Season_type', 'PLAYER_ID', 'RANK', 'PLAYER', 'TEAM_ID', 'TEAM', 'GP', 'MIN',
+                   'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT', 'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB',
+                   'REB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS', 'EFF', 'AST_TOV', 'STL_TOV']
+
+STINT_KEY_COLS = ['year', 'Season_type', 'PLAYER_ID', 'TEAM']
+
+# Names used by box score exports for the columns of the season schema
+GAME_COLUMN_MAP = {
+    'SEASON_YEAR': 'year',
+    'SEASON': 'year',
+    'SEASON_TYPE': 'Season_type',
+    'PLAYER_NAME': 'PLAYER',
+    'TEAM_ABBREVIATION': 'TEAM',
+}
+
+def _minutes(values):
+    # Box scores store minutes either as numbers or as 'MM:SS'
+    if pd.api.types.is_numeric_dtype(values.dtype) or not len(values):
+        return values.fillna(0).to_numpy(dtype='float64')
+    parts = values.fillna('0').astype(str).str.split(':', n=1, expand=True)
+    minutes = pd.to_numeric(parts[0], errors='coerce').fillna(0).to_numpy(dtype='float64')
+    if parts.shape[1] > 1:
+        minutes += pd.to_numeric(parts[1], errors='coerce').fillna(0).to_numpy(dtype='float64') / 60
+    return minutes
+
+
+def _season_year_label(dates):
+    # Seasons start in the autumn, so games before August belong to the season that started the year before
+    dates = pd.to_datetime(dates)
+    start = dates.dt.year - (dates.dt.month < 8).astype(int)
+    return start.astype(str) + '-' + (start + 1).astype(str).str[-2:]
+
+
+def normalize_game_chunk(chunk):
+    """
+    Maps one chunk of a box score file onto the season schema's key and stat columns.
+
+    Parameters:
+    chunk (pandas.DataFrame): Game rows with a player id and name, a team, the stat columns and
+                              either a season label (year/SEASON_YEAR) or a GAME_DATE
+
+    Returns:
+    pandas.DataFrame: year, Season_type, PLAYER_ID, PLAYER, TEAM, TEAM_ID and total_cols, one row per game
+    """
+    chunk = chunk.rename(columns={old: new for old, new in GAME_COLUMN_MAP.items()
+                                  if old in chunk.columns and new not in chunk.columns})
+    missing = [col for col in ['PLAYER_ID', 'TEAM'] + total_cols if col not in chunk.columns]
+    if missing:
+        raise ValueError(f"game file is missing columns: {', '.join(missing)}")
+
+    if 'year' in chunk.columns:
+        year = chunk['year'].astype(str)
+    elif 'GAME_DATE' in chunk.columns:
+        year = _season_year_label(chunk['GAME_DATE'])
+    else:
+        raise ValueError("game file needs a season column (year, SEASON_YEAR) or GAME_DATE")
+
+    columns = {
+        'year': year.to_numpy(),
+        'Season_type': chunk['Season_type'].to_numpy() if 'Season_type' in chunk.columns else 'Regular Season',
+        'PLAYER_ID': chunk['PLAYER_ID'].to_numpy(dtype='int64'),
+        'PLAYER': chunk['PLAYER'].to_numpy() if 'PLAYER' in chunk.columns else chunk['PLAYER_ID'].astype(str).to_numpy(),
+        'TEAM': chunk['TEAM'].to_numpy(),
+        'TEAM_ID': chunk['TEAM_ID'].fillna(0).to_numpy(dtype='int64') if 'TEAM_ID' in chunk.columns else 0,
+    }
+    for col in total_cols:
+        columns[col] = _minutes(chunk[col]) if col == 'MIN' else chunk[col].fillna(0).to_numpy(dtype='float64')
+    return pd.DataFrame(columns)
+
+
+def aggregate_stints(games):
+    """
+    Sums game rows (or earlier partial sums) per player, team, season and season type.
+
+    Rows without a GP column count as one game each. PLAYER and TEAM_ID keep the last value seen.
+    """
+    if 'GP' not in games.columns:
+        games = games.assign(GP=1)
+    grouped = games.groupby(STINT_KEY_COLS, sort=False)
+    stints = grouped[total_cols + ['GP']].sum()
+    stints['PLAYER'] = grouped['PLAYER'].last()
+    stints['TEAM_ID'] = grouped['TEAM_ID'].last()
+    return stints.reset_index()
+
+
+def _ratio(numerator, denominator, decimals):
+    # Rounded half up like the scraped file, 0 where the denominator is 0
+    scale = 10 ** decimals
+    ratio = np.divide(numerator, denominator, out=np.zeros(len(numerator)), where=denominator > 0)
+    return np.floor(ratio * scale + 0.5) / scale
+
+
+def season_rows_from_stints(stints):
+    """
+    Folds stints into one nba.csv row per player, season and season type.
+
+    The counting stats are summed over the player's teams, TEAM/TEAM_ID are those of the
+    team with the most games, and the percentage, EFF, ratio and RANK (points rank within
+    the season and season type) columns are derived as in the scraped file.
+
+    Parameters:
+    stints (pandas.DataFrame): Output of aggregate_stints()
+
+    Returns:
+    pandas.DataFrame: Rows in the NBA_CSV_COLUMNS layout
+    """
+    player_keys = ['year', 'Season_type', 'PLAYER_ID']
+    main_team = (stints.sort_values('GP', kind='stable')
+                 .drop_duplicates(player_keys, keep='last')[player_keys + ['TEAM', 'TEAM_ID', 'PLAYER']])
+    rows = stints.groupby(player_keys, sort=False)[total_cols + ['GP']].sum().reset_index()
+    rows = rows.merge(main_team, on=player_keys, how='left')
+
+    counts = {col: np.rint(rows[col].to_numpy(dtype='float64')).astype('int64') for col in total_cols + ['GP']}
+    for col, values in counts.items():
+        rows[col] = values
+
+    for pct, (made, attempted) in {'FG_PCT': ('FGM', 'FGA'), 'FG3_PCT': ('FG3M', 'FG3A'),
+                                   'FT_PCT': ('FTM', 'FTA')}.items():
+        rows[pct] = _ratio(counts[made], counts[attempted], 3)
+    rows['AST_TOV'] = _ratio(counts['AST'], counts['TOV'], 2)
+    rows['STL_TOV'] = _ratio(counts['STL'], counts['TOV'], 2)
+    rows['EFF'] = (counts['PTS'] + counts['REB'] + counts['AST'] + counts['STL'] + counts['BLK']
+                   - (counts['FGA'] - counts['FGM']) - (counts['FTA'] - counts['FTM']) - counts['TOV'])
+    rows['RANK'] = rows.groupby(['year', 'Season_type'])['PTS'].rank(ascending=False, method='min').astype('int64')
+
+    rows = rows.sort_values(['year', 'Season_type', 'RANK', 'PLAYER_ID'], ignore_index=True)
+    return rows[NBA_CSV_COLUMNS]
+
+
+def stream_game_logs(csv_path, chunksize=250_000, log=None):
+    """
+    Aggregates a game-level CSV of any size into season rows, reading it in chunks.
+
+    Partial sums are merged whenever the unmerged ones outgrow the merged table, so each
+    game row is summed O(log n) times at most and memory holds one chunk plus the stints.
+
+    Parameters:
+    csv_path (str): Game-level CSV
+    chunksize (int): Game rows read at a time
+    log (callable): Called with a progress line after every chunk, if given
+
+    Returns:
+    tuple: season rows in the nba.csv layout, dict with rows, chunks, stints, seconds and rows_per_s
+    """
+    started = time.perf_counter()
+    header = pd.read_csv(csv_path, nrows=0).columns
+    dtypes = {col: dtype for col, dtype in COLUMN_DTYPES.items() if col in header and dtype == str}
+    dtypes.update({col: str for col in GAME_COLUMN_MAP if col in header})
+
+    merged = None
+    pending = []
+    pending_rows = 0
+    rows_read = 0
+    chunks = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize, dtype=dtypes):
+        part = aggregate_stints(normalize_game_chunk(chunk))
+        pending.append(part)
+        pending_rows += len(part)
+        rows_read += len(chunk)
+        chunks += 1
+        if merged is None or pending_rows > len(merged):
+            merged = aggregate_stints(pd.concat(([] if merged is None else [merged]) + pending, ignore_index=True))
+            pending, pending_rows = [], 0
+        if log is not None:
+            elapsed = time.perf_counter() - started
+            log(f"{rows_read:,} rows, {len(merged):,} stints, {rows_read / elapsed:,.0f} rows/s")
+
+    if merged is None:
+        raise ValueError(f"{csv_path} has no rows")
+    if pending:
+        merged = aggregate_stints(pd.concat([merged] + pending, ignore_index=True))
+
+    season_rows = season_rows_from_stints(merged)
+    elapsed = time.perf_counter() - started
+    stats = {'rows': rows_read, 'chunks': chunks, 'stints': len(merged), 'season_rows': len(season_rows),
+             'seconds': elapsed, 'rows_per_s': rows_read / elapsed if elapsed else float('inf')}
+    return season_rows, stats
+
+
+def write_season_csv(season_rows, out_path):
+    """Writes season rows like nba.csv, with the season type URL-encoded as in the scraped file."""
+    labels = {season_type: quote(season_type) for season_type in season_rows['Season_type'].unique()}
+    season_rows.assign(Season_type=season_rows['Season_type'].map(labels)).to_csv(out_path, index=False)
+    return out_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate a game-level box score CSV into nba.csv season rows")
+    parser.add_argument("source", help="game-level CSV")
+    parser.add_argument("-o", "--output", required=True, help="season-level CSV to write")
+    parser.add_argument("--chunksize", type=int, default=250_000)
+    parser.add_argument("-q", "--quiet", action="store_true")
+    args = parser.parse_args()
+
+    season_rows, stats = stream_game_logs(args.source, chunksize=args.chunksize, log=None if args.quiet else print)
+    write_season_csv(season_rows, args.output)
+    print(f"{stats['rows']:,} game rows in {stats['chunks']} chunks -> {stats['season_rows']:,} season rows, "
+          f"{stats['seconds']:.1f}s, {stats['rows_per_s']:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Stage timings and cache hit counters for the dashboard.
+
+Timing is off unless NBA_TIMING is set (to anything but 0/false/no), and when it is off
+`timed` returns the function unchanged and `stage` is a shared no-op context manager, so
+the hooks cost nothing in production. When it is on, every stage keeps its call count and
+total time since start plus the most recent NBA_TIMING_SAMPLES durations, from which
+p50/p95/p99 are computed. Everything is process-wide and shared by all sessions.
+"""
+import functools
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+ENABLED = os.environ.get("NBA_TIMING", "").strip().lower() not in ("", "0", "false", "no")
+
+# Recent durations kept per stage for the percentiles
+SAMPLES = int(os.environ.get("NBA_TIMING_SAMPLES", "1024"))
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+_disabled = nullcontext()
+
+
+class StageTimings:
+    """
+    Thread-safe store of per-stage durations and per-cache hit/miss counts.
+
+    Parameters:
+    samples (int): Recent durations kept per stage for the percentiles
+    """
+
+    def __init__(self, samples=SAMPLES):
+        self.samples = samples
+        self.started = time.time()
+        self._durations = {}
+        self._totals = {}
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            recent = self._durations.get(name)
+            if recent is None:
+                recent = self._durations[name] = deque(maxlen=self.samples)
+                self._totals[name] = [0, 0.0]
+            recent.append(seconds)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def count(self, cache, hit):
+        """Counts one lookup of a cache as a hit or a miss."""
+        with self._lock:
+            counts = self._caches.setdefault(cache, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def stage_summary(self):
+        """
+        Per-stage statistics, slowest total first.
+
+        Returns:
+        list: dicts with stage, count, total_s, mean_ms, p50_ms, p95_ms, p99_ms and max_ms
+        """
+        with self._lock:
+            snapshot = {name: (np.array(recent), *self._totals[name]) for name, recent in self._durations.items()}
+
+        rows = []
+        for name, (recent, count, total) in snapshot.items():
+            p50, p95, p99 = np.quantile(recent, QUANTILES) * 1000
+            rows.append({
+                'stage': name,
+                'count': count,
+                'total_s': total,
+                'mean_ms': total / count * 1000,
+                'p50_ms': p50,
+                'p95_ms': p95,
+                'p99_ms': p99,
+                'max_ms': recent.max() * 1000,
+            })
+        return sorted(rows, key=lambda row: -row['total_s'])
+
+    def cache_summary(self):
+        """
+        Per-cache lookup counts.
+
+        Returns:
+        list: dicts with cache, hits, misses and hit_rate
+        """
+        with self._lock:
+            snapshot = {cache: tuple(counts) for cache, counts in self._caches.items()}
+        return [{'cache': cache, 'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses)}
+                for cache, (hits, misses) in sorted(snapshot.items())]
+
+    def to_jsonl(self):
+        """One JSON object per stage and per cache, each stamped with the export time."""
+        now = time.time()
+        lines = [json.dumps({'type': 'stage', 'time': now, **row}) for row in self.stage_summary()]
+        lines += [json.dumps({'type': 'cache', 'time': now, **row}) for row in self.cache_summary()]
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def to_prometheus(self, prefix="nba"):
+        """Prometheus text exposition format: a summary per stage and hit/miss counters per cache."""
+        prefix = _metric_name(prefix)
+        lines = [
+            f"# HELP {prefix}_stage_seconds Time spent in each dashboard stage.",
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        for row in self.stage_summary():
+            label = _label(row['stage'])
+            for quantile in QUANTILES:
+                value = row[f"p{round(quantile * 100)}_ms"] / 1000
+                lines.append(f'{prefix}_stage_seconds{{stage="{label}",quantile="{quantile}"}} {value:.6g}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{label}"}} {row["total_s"]:.6g}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{label}"}} {row["count"]}')
+
+        caches = self.cache_summary()
+        for kind in ('hits', 'misses'):
+            lines.append(f"# HELP {prefix}_cache_{kind}_total Cache lookups that were {kind}.")
+            lines.append(f"# TYPE {prefix}_cache_{kind}_total counter")
+            for row in caches:
+                lines.append(f'{prefix}_cache_{kind}_total{{cache="{_label(row["cache"])}"}} {row[kind]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self._durations.clear()
+            self._totals.clear()
+            self._caches.clear()
+
+
+def _metric_name(value):
+    # Metric names only allow [a-zA-Z_:][a-zA-Z0-9_:]*
+    name = re.sub(r'[^a-zA-Z0-9_:]', '_', str(value))
+    return f"_{name}" if name[:1].isdigit() else name
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+timings = StageTimings()
+
+
+def stage(name):
+    """Context manager timing its block as `name`, a no-op unless timing is enabled."""
+    if not ENABLED:
+        return _disabled
+    return timings.stage(name)
+
+
+def timed(name):
+    """Decorator timing every call of a function as `name`, returns the function itself unless timing is enabled."""
+    def decorate(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timings.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record(name, seconds):
+    if ENABLED:
+        timings.record(name, seconds)
+
+
+def count_cache(cache, hit):
+    if ENABLED:
+        timings.count(cache, hit)
+
+
+def process_rss():
+    """Resident set size of this process in bytes, or None where /proc isn't available."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def frame_bytes(frames):
+    """Memory held by some DataFrames, counting the contents of string and categorical columns."""
+    return int(sum(frame.memory_usage(deep=True).sum() for frame in frames))
+
+
+_building = threading.local()
+
+
+def cached(cache_decorator, name):
+    """
+    Applies a memoizing decorator such as st.cache_data(...) and, when timing is enabled,
+    times the builds as stage 'build.<name>' and counts every lookup as a hit or a miss.
+
+    The timed body only runs on a miss, so a lookup during which it ran is a miss; lookups
+    that nest (one cached builder calling another) are tracked on a per-thread stack.
+
+    Parameters:
+    cache_decorator (callable): Memoizing decorator, e.g. st.cache_resource(max_entries=2)
+    name (str): Cache name
+
+    Returns:
+    callable: Decorator
+    """
+    def decorate(func):
+        if not ENABLED:
+            return cache_decorator(func)
+
+        @functools.wraps(func)
+        def build(*args, **kwargs):
+            stack = getattr(_building, 'stack', None)
+            if stack:
+                stack[-1] = True
+            with timings.stage(f"build.{name}"):
+                return func(*args, **kwargs)
+
+        cached_func = cache_decorator(build)
+
+        @functools.wraps(func)
+        def lookup(*args, **kwargs):
+            stack = _building.__dict__.setdefault('stack', [])
+            stack.append(False)
+            try:
+                return cached_func(*args, **kwargs)
+            finally:
+                timings.count(name, hit=not stack.pop())
+
+        if hasattr(cached_func, 'clear'):
+            lookup.clear = cached_func.clear
+        return lookup
+    return decorate
@@ -0,0 +1,123 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from metrics import EXTRA_METRICS, PER36_METRICS, RATIO_METRICS, PlayerMetricColumns
+
+# Columns shown unless the caller picks others
+DEFAULT_COLUMNS = PER36_METRICS + RATIO_METRICS
+
+
+class SeasonLeaderboard:
+    """
+    Every player of one season ranked by any per-36 or ratio metric.
+
+    Display columns (per-36 values, ratios and the registry metrics of EXTRA_METRICS) come
+    from PlayerMetricColumns over the season's per-minute rows, so each is computed the first
+    time a page shows or sorts by it and kept. The order of each metric in each direction is kept
+    the same way, so sorting or paging is a slice of an index array rather than a sort of the
+    frame. Players without a value (e.g. no three-point attempts for 3PT%) always come last.
+
+    Parameters:
+    season_per_min (pandas.DataFrame): One season of the per-minute table
+    """
+
+    def __init__(self, season_per_min):
+        self.players = pd.DataFrame({
+            'PLAYER_ID': season_per_min['PLAYER_ID'].to_numpy(),
+            'PLAYER': season_per_min['PLAYER'].to_numpy(),
+            'MIN': season_per_min['MIN'].to_numpy(),
+        })
+        self._columns = PlayerMetricColumns(season_per_min)
+        self.metrics = self._columns.metrics
+        self.per36_metrics = self._columns.per36_metrics
+        self._minutes = self.players['MIN'].to_numpy()
+        self._orders = {}
+        self._lock = threading.Lock()
+
+    def column(self, metric):
+        """Display values of one metric (per 36 minutes for counting stats), computed on first use."""
+        return self._columns.column(metric)
+
+    def columns(self, rows, metrics=None):
+        """The players at row positions `rows` with the given metrics (all of self.metrics by default)."""
+        metrics = self.metrics if metrics is None else metrics
+        frame = self.players.take(rows)
+        for metric in metrics:
+            if metric != 'MIN':
+                frame[metric] = self.column(metric)[rows]
+        return frame
+
+    def order(self, metric, ascending=False):
+        """Row positions sorted by metric, highest first unless ascending, with missing values last."""
+        order = self._orders.get((metric, ascending))
+        if order is None:
+            values = self.column(metric).astype('float64')
+            if not ascending:
+                values = -values
+            # Ties keep the name order of the per-minute table
+            order = np.argsort(np.where(np.isfinite(values), values, np.inf), kind='stable')
+            with self._lock:
+                self._orders[(metric, ascending)] = order
+        return order
+
+    def ranking(self, metric, ascending=False, min_minutes=0):
+        """
+        Row positions of the qualifying players in rank order.
+
+        Parameters:
+        metric (str): One of self.metrics
+        ascending (bool): Lowest first instead of highest first
+        min_minutes (int): Players with fewer minutes are left out
+
+        Returns:
+        numpy.ndarray: Positions into self.players
+        """
+        order = self.order(metric, ascending)
+        if min_minutes > 0:
+            order = order[self._minutes[order] >= min_minutes]
+        return order
+
+    def page(self, metric, page=0, page_size=50, ascending=False, min_minutes=0, columns=None):
+        """
+        One page of the leaderboard.
+
+        Only the sort metric and `columns` are computed, so a page showing a few columns
+        doesn't pay for the rest.
+
+        Parameters:
+        metric (str): One of self.metrics to rank by
+        page (int): 0-based page number
+        page_size (int): Rows per page
+        ascending (bool): Lowest first instead of highest first
+        min_minutes (int): Players with fewer minutes are left out
+        columns (list): Metrics shown besides the rank, player and minutes, all of self.metrics by default
+
+        Returns:
+        tuple: page rows (with a RANK column) as a DataFrame, number of qualifying players
+        """
+        if columns is not None and metric not in columns:
+            columns = [metric] + list(columns)
+        order = self.ranking(metric, ascending, min_minutes)
+        start = page * page_size
+        rows = self.columns(order[start:start + page_size], columns)
+        rows.insert(0, 'RANK', np.arange(start + 1, start + 1 + len(rows)))
+        return rows, len(order)
+
+    def top(self, metric, k=10, columns=None):
+        """
+        The k highest values of a metric, found with argpartition instead of a full sort.
+
+        Players tied with the k-th value are taken in name order, so the rows are the first k
+        of order(metric).
+        """
+        values = self.column(metric).astype('float64')
+        values = np.where(np.isfinite(values), values, -np.inf)
+        k = min(k, len(values))
+        if k == 0:
+            return self.columns(np.arange(0), columns)
+        kth = -np.partition(-values, k - 1)[k - 1]
+        above = np.flatnonzero(values > kth)
+        top = np.concatenate([above, np.flatnonzero(values == kth)[:k - len(above)]])
+        return self.columns(top[np.lexsort((top, -values[top]))], columns)
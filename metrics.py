@@ -0,0 +1,411 @@
+"""
+Registry of derived metrics.
+
+Every metric declares the columns it reads (base columns or other metrics) and a vectorized
+formula over them, so a table computes only the dependency closure of the columns a caller
+asks for. There is one registry per kind of table, since the same name can mean different
+things on each (team PACE is per game, league PACE per 240 player-minutes):
+
+    PLAYER_METRICS  player totals or per-minute rows
+    TEAM_METRICS    team totals per season (inherits the player shooting metrics)
+    LEAGUE_METRICS  league totals per season and season type
+
+Divisions go through safe_divide(), which gives NaN rather than inf where the denominator is 0.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Counting stats shown per 36 minutes
+PER36_METRICS = ['PTS', 'REB', 'OREB', 'DREB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'FGM', 'FGA', 'FG3M', 'FG3A', 'FTM', 'FTA']
+
+# Ratio columns of the per-minute table, shown as they are
+RATIO_METRICS = ['FG%', '3PT%', 'FT%', 'TRU%', 'FG3A%', 'PTS/FGA', 'FTA/FGA', 'AST_TOV']
+
+# Registry metrics only computed when a page shows or sorts by them (count metrics per 36)
+EXTRA_METRICS = ['eFG%', 'USG_est', 'EFF', 'GmSc']
+
+
+def safe_divide(numerator, denominator):
+    """Elementwise numerator / denominator as float64, NaN where the denominator is 0 or missing."""
+    numerator = np.asarray(numerator, dtype='float64')
+    denominator = np.asarray(denominator, dtype='float64')
+    out = np.full(np.broadcast_shapes(numerator.shape, denominator.shape), np.nan)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+
+class MetricRegistry:
+    """
+    Named metrics with their inputs and formulas.
+
+    A formula is called with a mapping from each declared input to its values (numpy arrays)
+    and returns the metric's values. `scaling` is 'count' for metrics that add up over games
+    or minutes (so a per-minute value can be shown per 36) and 'ratio' for those that don't.
+
+    Parameters:
+    parent (MetricRegistry): Registry whose metrics are visible here unless redefined
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self._metrics = {}
+        self._version = 0
+        self._available = {}
+
+    def register(self, name, inputs, scaling='ratio', description=""):
+        """Decorator registering `formula(values)` as metric `name`."""
+        def decorate(formula):
+            self._metrics[name] = (tuple(inputs), formula, scaling, description)
+            self._version += 1
+            return formula
+        return decorate
+
+    def get(self, name):
+        """Returns (inputs, formula, scaling, description), raises KeyError for unknown metrics."""
+        registry = self
+        while registry is not None:
+            if name in registry._metrics:
+                return registry._metrics[name]
+            registry = registry.parent
+        raise KeyError(name)
+
+    def __contains__(self, name):
+        try:
+            self.get(name)
+        except KeyError:
+            return False
+        return True
+
+    def names(self):
+        names = list(self.parent.names()) if self.parent is not None else []
+        return names + [name for name in self._metrics if name not in names]
+
+    def scaling(self, name):
+        return self.get(name)[2]
+
+    def plan(self, names, available):
+        """
+        Metrics to compute, in dependency order, to get `names` from the `available` columns.
+
+        Columns already available are never recomputed, even if a metric has the same name.
+
+        Raises:
+        KeyError: A name is neither available nor a registered metric
+        ValueError: The metrics depend on each other in a cycle
+        """
+        available = set(available)
+        order = []
+        done = set()
+        visiting = set()
+
+        def visit(name):
+            if name in available or name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"metric dependency cycle through {name}")
+            visiting.add(name)
+            for dependency in self.get(name)[0]:
+                visit(dependency)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in names:
+            visit(name)
+        return order
+
+    def available(self, columns):
+        """Every metric computable from the given base columns, memoized per set of columns."""
+        columns = frozenset(columns)
+        # Registering a metric here or in a parent changes the key, so stale answers are never served
+        key = (columns, self._versions())
+        computable = self._available.get(key)
+        if computable is None:
+            computable = []
+            for name in self.names():
+                try:
+                    self.plan([name], columns)
+                except KeyError:
+                    continue
+                computable.append(name)
+            computable = self._available.setdefault(key, tuple(computable))
+        return list(computable)
+
+    def _versions(self):
+        versions = []
+        registry = self
+        while registry is not None:
+            versions.append(registry._version)
+            registry = registry.parent
+        return tuple(versions)
+
+
+class MetricTable:
+    """
+    Lazy metric columns over one read-only table.
+
+    A requested metric is computed with its dependency closure on first use and memoized,
+    so every caller sharing the table pays for each metric once and for nothing it doesn't
+    ask for. Base columns of the table take precedence over metrics with the same name.
+
+    Parameters:
+    frame (pandas.DataFrame): Table with the base columns
+    registry (MetricRegistry): Metrics the table can compute
+    """
+
+    def __init__(self, frame, registry):
+        self.frame = frame
+        self.registry = registry
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def values(self, name):
+        """Values of a base column or metric as a numpy array."""
+        if name in self.frame.columns:
+            return self.frame[name].to_numpy()
+        values = self._values.get(name)
+        if values is None:
+            with self._lock:
+                for metric in self.registry.plan([name], set(self.frame.columns) | set(self._values)):
+                    inputs, formula, _, _ = self.registry.get(metric)
+                    self._values[metric] = formula({col: self.values(col) for col in inputs})
+                values = self._values[name]
+        return values
+
+    def columns(self, names, rows=None):
+        """
+        A frame with just the requested base columns and metrics.
+
+        Parameters:
+        names (list): Column and metric names
+        rows (numpy.ndarray): Row positions to take, all rows when None
+
+        Returns:
+        pandas.DataFrame: The columns in the order asked for
+        """
+        columns = {}
+        for name in names:
+            values = self.values(name)
+            columns[name] = values if rows is None else values[rows]
+        index = self.frame.index if rows is None else self.frame.index[rows]
+        return pd.DataFrame(columns, index=index)
+
+
+class PlayerMetricColumns:
+    """
+    Display columns of a per-minute player table: per 36 minutes for counting stats, ratios as they are.
+
+    Columns come from a MetricTable over the table, as float32, computed on first use and
+    kept. Shared by the leaderboards and the player explorer, so both show the same values.
+
+    Parameters:
+    per_min (pandas.DataFrame): Per-minute rows of one or more seasons
+    """
+
+    def __init__(self, per_min):
+        self._source = MetricTable(per_min, PLAYER_METRICS)
+        computable = set(per_min.columns) | set(PLAYER_METRICS.available(per_min.columns))
+        self.metrics = ['MIN'] + [col for col in PER36_METRICS + RATIO_METRICS + EXTRA_METRICS if col in computable]
+        self.per36_metrics = [col for col in self.metrics
+                              if col in PER36_METRICS or (col in EXTRA_METRICS and PLAYER_METRICS.scaling(col) == 'count')]
+        self._columns = {'MIN': per_min['MIN'].to_numpy(dtype='float32')}
+        self._lock = threading.Lock()
+
+    def column(self, metric):
+        """float32 values of one metric for every row, per 36 minutes for counting stats."""
+        values = self._columns.get(metric)
+        if values is None:
+            values = self._source.values(metric).astype('float64')
+            if metric in self.per36_metrics:
+                values = values * 36
+            values = values.astype('float32')
+            with self._lock:
+                self._columns[metric] = values
+        return values
+
+
+def compute_metrics(columns, names, registry):
+    """
+    Computes metrics eagerly from a mapping of base column arrays.
+
+    Parameters:
+    columns (dict): Base column name -> values
+    names (list): Metrics to compute; names whose inputs are missing are skipped
+    registry (MetricRegistry): Metric definitions
+
+    Returns:
+    dict: metric name -> values, only for the requested names, in the order asked for
+    """
+    values = dict(columns)
+    available = set(registry.available(values))
+    computable = [name for name in names if name not in values and name in available]
+    for metric in registry.plan(computable, values):
+        inputs, formula, _, _ = registry.get(metric)
+        values[metric] = formula({col: values[col] for col in inputs})
+    return {name: values[name] for name in computable}
+
+
+PLAYER_METRICS = MetricRegistry()
+player_metric = PLAYER_METRICS.register
+
+
+@player_metric('FG%', ['FGM', 'FGA'], description="Field goal percentage")
+def _fg_pct(s):
+    return safe_divide(s['FGM'], s['FGA'])
+
+
+@player_metric('3PT%', ['FG3M', 'FG3A'], description="Three-point percentage")
+def _fg3_pct(s):
+    return safe_divide(s['FG3M'], s['FG3A'])
+
+
+@player_metric('FT%', ['FTM', 'FTA'], description="Free throw percentage")
+def _ft_pct(s):
+    return safe_divide(s['FTM'], s['FTA'])
+
+
+@player_metric('eFG%', ['FGM', 'FG3M', 'FGA'], description="Effective field goal percentage, a three counts 1.5 field goals")
+def _efg_pct(s):
+    return safe_divide(s['FGM'] + 0.5 * s['FG3M'], s['FGA'])
+
+
+@player_metric('TRU%', ['PTS', 'FGA', 'FTA'], description="True shooting percentage")
+def _true_shooting(s):
+    return safe_divide(0.5 * s['PTS'], s['FGA'] + 0.475 * s['FTA'])
+
+
+@player_metric('FG3A%', ['FG3A', 'FGA'], description="Share of field goal attempts from three")
+def _fg3a_rate(s):
+    return safe_divide(s['FG3A'], s['FGA'])
+
+
+@player_metric('PTS/FGA', ['PTS', 'FGA'], description="Points per field goal attempt")
+def _points_per_shot(s):
+    return safe_divide(s['PTS'], s['FGA'])
+
+
+@player_metric('FG3M/FGM', ['FG3M', 'FGM'], description="Share of made field goals that are threes")
+def _fg3m_share(s):
+    return safe_divide(s['FG3M'], s['FGM'])
+
+
+@player_metric('FTA/FGA', ['FTA', 'FGA'], description="Free throw rate")
+def _ft_rate(s):
+    return safe_divide(s['FTA'], s['FGA'])
+
+
+@player_metric('AST_TOV', ['AST', 'TOV'], description="Assists per turnover")
+def _ast_tov(s):
+    # Players without turnovers get a large finite ratio instead of NaN
+    return safe_divide(s['AST'], np.where(s['TOV'] == 0, 0.001, s['TOV']))
+
+
+@player_metric('USG_est', ['FGA', 'FTA', 'TOV'], scaling='count',
+               description="Possessions used (FGA + 0.44 FTA + TOV), a usage estimate without team totals")
+def _possessions_used(s):
+    return s['FGA'] + 0.44 * s['FTA'] + s['TOV']
+
+
+@player_metric('EFF', ['PTS', 'REB', 'AST', 'STL', 'BLK', 'FGA', 'FGM', 'FTA', 'FTM', 'TOV'], scaling='count',
+               description="NBA efficiency: positive box score stats minus misses and turnovers")
+def _efficiency(s):
+    return (s['PTS'] + s['REB'] + s['AST'] + s['STL'] + s['BLK']
+            - (s['FGA'] - s['FGM']) - (s['FTA'] - s['FTM']) - s['TOV'])
+
+
+@player_metric('GmSc', ['PTS', 'FGM', 'FGA', 'FTA', 'FTM', 'OREB', 'DREB', 'STL', 'AST', 'BLK', 'PF', 'TOV'],
+               scaling='count', description="Hollinger's game score, a PER-style linear composite")
+def _game_score(s):
+    return (s['PTS'] + 0.4 * s['FGM'] - 0.7 * s['FGA'] - 0.4 * (s['FTA'] - s['FTM']) + 0.7 * s['OREB']
+            + 0.3 * s['DREB'] + s['STL'] + 0.7 * s['AST'] + 0.7 * s['BLK'] - 0.4 * s['PF'] - s['TOV'])
+
+
+# Per-game averages of season or career totals
+for _stat in ['PTS', 'REB', 'AST', 'STL', 'BLK']:
+    player_metric(f'{_stat}_per_game', [_stat, 'GP'], scaling='ratio', description=f"{_stat} per game")(
+        lambda s, stat=_stat: safe_divide(s[stat], s['GP']))
+
+
+TEAM_METRICS = MetricRegistry(parent=PLAYER_METRICS)
+team_metric = TEAM_METRICS.register
+
+
+@team_metric('POSS_est', ['FGA', 'OREB', 'TOV', 'FTA'], scaling='count', description="Estimated possessions")
+def _team_possessions(s):
+    return s['FGA'] - s['OREB'] + s['TOV'] + 0.44 * s['FTA']
+
+
+@team_metric('PACE', ['POSS_est', 'GP'], description="Estimated possessions per game, scaled by 40/48")
+def _team_pace(s):
+    return safe_divide(s['POSS_est'], s['GP']) / 48 * 40
+
+
+@team_metric('ORtg', ['PTS', 'POSS_est'], description="Points per 100 possessions")
+def _team_offensive_rating(s):
+    return safe_divide(s['PTS'], s['POSS_est']) * 100
+
+
+@team_metric('AST_ratio', ['AST', 'FGM'], description="Assists per made field goal")
+def _team_assist_ratio(s):
+    return safe_divide(s['AST'], s['FGM'])
+
+
+@team_metric('FG3_ratio', ['FG3A', 'FGA'], description="Share of field goal attempts from three")
+def _team_fg3_rate(s):
+    return safe_divide(s['FG3A'], s['FGA'])
+
+
+@team_metric('FG_PCT', ['FGM', 'FGA'], description="Field goal percentage")
+def _team_fg_pct(s):
+    return safe_divide(s['FGM'], s['FGA'])
+
+
+@team_metric('FG3_PCT', ['FG3M', 'FG3A'], description="Three-point percentage")
+def _team_fg3_pct(s):
+    return safe_divide(s['FG3M'], s['FG3A'])
+
+
+@team_metric('PTS_per_POSS', ['PTS', 'POSS_est'], description="Points per possession")
+def _team_points_per_possession(s):
+    return safe_divide(s['PTS'], s['POSS_est'])
+
+
+LEAGUE_METRICS = MetricRegistry()
+league_metric = LEAGUE_METRICS.register
+
+
+@league_metric('3PAr', ['FG3A', 'FGA'], description="Three-point attempt rate")
+def _league_fg3_rate(s):
+    return safe_divide(s['FG3A'], s['FGA'])
+
+
+@league_metric('3PT_pts', ['FG3M', 'PTS'], description="Share of points from threes, in percent")
+def _league_three_point_share(s):
+    return 100 * safe_divide(3 * s['FG3M'], s['PTS'])
+
+
+@league_metric('2PT_pts', ['FGM', 'FG3M', 'PTS'], description="Share of points from twos, in percent")
+def _league_two_point_share(s):
+    return 100 * safe_divide(2 * (s['FGM'] - s['FG3M']), s['PTS'])
+
+
+@league_metric('FT_pts', ['FTM', 'PTS'], description="Share of points from free throws, in percent")
+def _league_free_throw_share(s):
+    return 100 * safe_divide(s['FTM'], s['PTS'])
+
+
+@league_metric('POSS_est', ['FGA', 'OREB', 'TOV', 'FTA'], scaling='count', description="Estimated possessions")
+def _league_possessions(s):
+    return s['FGA'] - s['OREB'] + s['TOV'] + 0.44 * s['FTA']
+
+
+@league_metric('PACE', ['POSS_est', 'MIN'], description="Possessions per team per 48 minutes (240 player-minutes)")
+def _league_pace(s):
+    return 240 * safe_divide(s['POSS_est'], s['MIN'])
+
+
+@league_metric('ORtg', ['PTS', 'POSS_est'], description="Points per 100 possessions")
+def _league_offensive_rating(s):
+    return safe_divide(s['PTS'], s['POSS_est']) * 100
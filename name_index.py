@@ -0,0 +1,138 @@
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+
+
+def normalize_name(name):
+    """Lowercases, strips accents and punctuation: 'Nikola Jokić' -> 'nikola jokic', "D'Angelo" -> 'dangelo'."""
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii').lower()
+    name = re.sub(r"['.]", '', name)
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', name).split())
+
+
+def name_trigrams(normalized):
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlayerNameIndex:
+    """
+    Search index over every PLAYER/PLAYER_ID pair in the dataset.
+
+    Prefix search runs on a sorted array of every word-start of every normalized name
+    ('stephen curry' and 'curry'), so 'cur' and 'steph' both land with two binary searches.
+    Typo-tolerant search uses trigram postings: each query trigram adds one to the players
+    containing it and the Jaccard overlap of trigram sets ranks the candidates. Ties go to
+    the player with more total minutes. Searches return player ids only.
+
+    Parameters:
+    frame (pandas.DataFrame): Player rows with PLAYER_ID, PLAYER, season_start_year and MIN
+    min_similarity (float): Smallest trigram overlap kept as a fuzzy match
+    """
+
+    def __init__(self, frame, min_similarity=0.3):
+        players = frame.groupby('PLAYER_ID').agg(
+            PLAYER=('PLAYER', 'last'),
+            first_season=('season_start_year', 'min'),
+            last_season=('season_start_year', 'max'),
+            MIN=('MIN', 'sum'),
+        )
+        self.min_similarity = min_similarity
+        self.player_ids = players.index.to_numpy(dtype='int64')
+        self.names = dict(zip(self.player_ids.tolist(), players['PLAYER'].tolist()))
+        self.first_season = players['first_season'].to_numpy()
+        self.last_season = players['last_season'].to_numpy()
+        self.minutes = players['MIN'].to_numpy(dtype='float64')
+
+        prefix_entries = []
+        postings = {}
+        self._trigram_counts = np.zeros(len(players), dtype='int32')
+        for position, name in enumerate(players['PLAYER']):
+            normalized = normalize_name(name)
+            words = normalized.split(' ')
+            for i in range(len(words)):
+                prefix_entries.append((' '.join(words[i:]), position))
+            trigrams = name_trigrams(normalized)
+            self._trigram_counts[position] = len(trigrams)
+            for trigram in trigrams:
+                postings.setdefault(trigram, []).append(position)
+
+        prefix_entries.sort()
+        self._prefix_keys = [key for key, _ in prefix_entries]
+        self._prefix_positions = np.array([position for _, position in prefix_entries], dtype='int64')
+        self._postings = {trigram: np.array(positions, dtype='int64') for trigram, positions in postings.items()}
+
+        # Which players appear in each season, as one boolean row per season
+        self.seasons = np.unique(frame['season_start_year'].to_numpy()).tolist()
+        season_codes = np.searchsorted(self.seasons, frame['season_start_year'].to_numpy())
+        player_codes = np.searchsorted(self.player_ids, frame['PLAYER_ID'].to_numpy(dtype='int64'))
+        self._in_season = np.zeros((len(self.seasons), len(players)), dtype=bool)
+        self._in_season[season_codes, player_codes] = True
+
+    def _prefix_matches(self, normalized):
+        start = bisect.bisect_left(self._prefix_keys, normalized)
+        stop = bisect.bisect_right(self._prefix_keys, normalized + '\uffff')
+        return self._prefix_positions[start:stop]
+
+    def _trigram_scores(self, normalized):
+        trigrams = [t for t in name_trigrams(normalized) if t in self._postings]
+        if not trigrams:
+            return np.zeros(len(self.player_ids))
+        shared = np.bincount(np.concatenate([self._postings[t] for t in trigrams]), minlength=len(self.player_ids))
+        union = len(name_trigrams(normalized)) + self._trigram_counts - shared
+        return shared / union
+
+    def search(self, query, limit=20, season=None):
+        """
+        Finds players by name prefix, falling back to fuzzy matches for typos.
+
+        Parameters:
+        query (str): Any part of a name starting at a word boundary, typos allowed
+        limit (int): Maximum number of ids returned
+        season (int): Only return players active in this season
+
+        Returns:
+        list: Player ids, best match first
+        """
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+
+        scores = self._trigram_scores(normalized)
+        scores[scores < self.min_similarity] = 0.0
+        # Prefix hits always rank above fuzzy ones
+        scores[self._prefix_matches(normalized)] += 1.0
+
+        if season is not None:
+            if season not in self.seasons:
+                return []
+            scores[~self._in_season[self.seasons.index(season)]] = 0.0
+
+        candidates = np.flatnonzero(scores > 0)
+        order = np.lexsort((-self.minutes[candidates], -scores[candidates]))[:limit]
+        return self.player_ids[candidates[order]].tolist()
+
+    def top_players(self, season, limit=20):
+        """Players of a season with the most career minutes, for an empty search box."""
+        if season not in self.seasons:
+            return []
+        candidates = np.flatnonzero(self._in_season[self.seasons.index(season)])
+        order = np.argsort(-self.minutes[candidates], kind='stable')[:limit]
+        return self.player_ids[candidates[order]].tolist()
+
+    def seasons_played(self, player_id):
+        """Seasons a player appears in."""
+        position = np.searchsorted(self.player_ids, player_id)
+        if position >= len(self.player_ids) or self.player_ids[position] != player_id:
+            return []
+        return [season for season, row in zip(self.seasons, self._in_season) if row[position]]
+
+    def label(self, player_id):
+        """Player name with the span of seasons, e.g. 'Stephen Curry (2012-13 to 2023-24)'."""
+        position = np.searchsorted(self.player_ids, player_id)
+        if position >= len(self.player_ids) or self.player_ids[position] != player_id:
+            return str(player_id)
+        first, last = self.first_season[position], self.last_season[position]
+        return f"{self.names[player_id]} ({first}-{str(first + 1)[2:]} to {last}-{str(last + 1)[2:]})"
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+# Layout of the composite int64 row key: PLAYER_ID | season_start_year (12 bits) | season type code (4 bits)
+SEASON_BITS = 12
+TYPE_BITS = 4
+
+
+def encode_keys(player_ids, seasons, type_codes):
+    """Packs (PLAYER_ID, season_start_year, season type code) triples into sortable int64 keys."""
+    player_ids = np.asarray(player_ids, dtype='int64')
+    seasons = np.asarray(seasons, dtype='int64')
+    type_codes = np.asarray(type_codes, dtype='int64')
+    return (player_ids << (SEASON_BITS + TYPE_BITS)) | (seasons << TYPE_BITS) | type_codes
+
+
+class PlayerSeasonIndex:
+    """
+    Sorted integer index over player rows keyed by (PLAYER_ID, season_start_year, Season_type).
+
+    Rows are stored once in key order, so a player's career or a single player-season is a
+    contiguous slice located with a binary search on the int64 key array. A second ordering
+    by (season, season type, player name) answers whole-season queries the same way.
+    Frames without a Season_type column (like the per-minute table) use one shared type code.
+
+    Parameters:
+    frame (pandas.DataFrame): Rows with PLAYER_ID, season_start_year and optionally Season_type and PLAYER
+    """
+
+    def __init__(self, frame):
+        player_ids = frame['PLAYER_ID'].to_numpy(dtype='int64')
+        seasons = frame['season_start_year'].to_numpy(dtype='int64')
+
+        if 'Season_type' in frame.columns:
+            type_codes, self.season_types = pd.factorize(frame['Season_type'], sort=True)
+        else:
+            type_codes, self.season_types = np.zeros(len(frame), dtype='int64'), pd.Index([None])
+
+        keys = encode_keys(player_ids, seasons, type_codes)
+        order = np.argsort(keys, kind='stable')
+        self.rows = frame.iloc[order].reset_index(drop=True)
+        self._keys = keys[order]
+
+        # Whole-season ordering, name-sorted within each (season, season type) block
+        season_keys = (seasons[order] << TYPE_BITS) | np.asarray(type_codes, dtype='int64')[order]
+        if 'PLAYER' in frame.columns:
+            name_codes = pd.factorize(self.rows['PLAYER'], sort=True)[0]
+        else:
+            name_codes = np.zeros(len(frame), dtype='int64')
+        self._season_order = np.lexsort((self._keys, name_codes, season_keys))
+        self._season_keys = season_keys[self._season_order]
+
+        self.seasons = np.unique(seasons).tolist()
+
+    def _type_code(self, season_type):
+        if season_type is None:
+            return None
+        if season_type not in self.season_types:
+            return -1
+        return self.season_types.get_loc(season_type)
+
+    @staticmethod
+    def _range(keys, low, high):
+        return np.searchsorted(keys, low, side='left'), np.searchsorted(keys, high, side='left')
+
+    def get_player_season(self, player_id, season, season_type=None):
+        """Returns the rows for one player-season, optionally limited to one season type."""
+        type_code = self._type_code(season_type)
+        if type_code == -1:
+            return self.rows.iloc[0:0]
+
+        low = encode_keys(player_id, season, 0 if type_code is None else type_code)
+        high = low + (1 << TYPE_BITS) if type_code is None else low + 1
+        start, stop = self._range(self._keys, low, high)
+        return self.rows.iloc[start:stop]
+
+    def get_player_career(self, player_id):
+        """Returns every row for a player, ordered by season and season type."""
+        low = encode_keys(player_id, 0, 0)
+        high = encode_keys(player_id + 1, 0, 0)
+        start, stop = self._range(self._keys, low, high)
+        return self.rows.iloc[start:stop]
+
+    def players_in_season(self, season, season_type=None):
+        """Returns the rows of every player active in a season, sorted by season type and player name."""
+        type_code = self._type_code(season_type)
+        if type_code == -1:
+            return self.rows.iloc[0:0]
+
+        low = (season << TYPE_BITS) | (0 if type_code is None else type_code)
+        high = low + (1 << TYPE_BITS) if type_code is None else low + 1
+        start, stop = self._range(self._season_keys, low, high)
+        return self.rows.take(self._season_order[start:stop])
@@ -0,0 +1,280 @@
+"""
+Batch pre-rendering of every Team Analysis matchup to static reports.
+
+For each season, every pair of teams gets one report with the three Team Analysis charts
+(comparison bars, style radar, league scatter), built with the same figures.py functions
+and the same team cube slice (season and season type) as the dashboard. Work is split into
+chunks of pairs and spread over a process pool; each worker writes its reports as soon as
+they are rendered. A season is skipped when its manifest shows the same season content hash,
+renderer version and output options, so a nightly run after a data update only redoes the
+seasons that changed.
+
+    python -m prerender --out reports                     # HTML, one process per core
+    python -m prerender --out reports --format json --season 2023 --workers 4
+    python -m prerender --out playoff-reports --season-type Playoffs
+"""
+import argparse
+import hashlib
+import html
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from compute import BUILD_START_METHOD, preprocess_nba_data, season_label
+from storage import CACHE_DIR, open_partitioned_store, write_atomic
+from team_cube import ALL, TeamSeasonCube
+
+# Pairs per pool task, small enough to keep every worker busy until the end
+CHUNK_SIZE = 48
+
+MANIFEST_NAME = "manifest.json"
+
+def renderer_version():
+    """Hash of the code that shapes the output, so a change to the charts re-renders every season."""
+    digest = hashlib.sha256()
+    for module_file in ('figures.py', 'compute.py', 'metrics.py', 'team_cube.py', 'prerender.py'):
+        with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), module_file), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _write_text(path, content):
+    # A report missing from disk must not be listed in the manifest, so write errors are raised
+    def write(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    write_atomic(path, write, ignore_errors=False)
+
+
+def report_name(team1, team2, fmt):
+    return f"{team1}-{team2}.{fmt}"
+
+
+# Per-process state, set up by _init_worker()
+_worker = {}
+
+
+def _init_worker(csv_path, cache_dir):
+    _worker['store'] = open_partitioned_store(csv_path, cache_dir)
+    _worker['seasons'] = {}
+
+
+def season_cube(store, season):
+    # Team cube of one season, as the dashboard slices it (its cube holds every season, the slices are the same)
+    return TeamSeasonCube(preprocess_nba_data(store.read(season)))
+
+
+def _season_context(season, season_type):
+    # Team rows, radar scale and the league scatter (the same for every pair) built once per worker
+    context = _worker['seasons'].get((season, season_type))
+    if context is None:
+        from figures import league_scatter_figure, team_style_labels
+
+        cube = season_cube(_worker['store'], season)
+        context = _worker['seasons'][(season, season_type)] = {
+            'teams': {team: cube.row(team, season, season_type) for team in cube.teams_in(season, season_type)},
+            'style_max': {metric: cube.max(metric, season, season_type) * 1.1 for metric in team_style_labels},
+            'league_scatter': league_scatter_figure(cube.slice(season, season_type), season),
+        }
+    return context
+
+
+def _serialize_figure(name, fig, fmt):
+    import plotly.io as pio
+
+    if fmt == "html":
+        return pio.to_html(fig, full_html=False, include_plotlyjs=False, div_id=name)
+    return pio.to_json(fig, validate=False)
+
+
+def _html_report(season, season_type, team1, team2, parts, plotlyjs):
+    if plotlyjs == "inline":
+        from plotly.offline import get_plotlyjs
+        script = f"<script>{get_plotlyjs()}</script>"
+    else:
+        script = '<script src="plotly.min.js"></script>'
+
+    title = html.escape(f"{team1} vs {team2}, {season_label(season).iloc[0]} {season_type}")
+    divs = "\n".join(parts.values())
+    return (f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n<title>{title}</title>\n{script}\n</head>\n"
+            f"<body>\n<h1>{title}</h1>\n{divs}\n</body>\n</html>\n")
+
+
+def _json_report(season, season_type, team1, team2, parts):
+    specs = ", ".join(f'"{name}": {spec}' for name, spec in parts.items())
+    header = json.dumps({'season': season, 'season_type': season_type, 'team1': team1, 'team2': team2})[:-1]
+    return f'{header}, "figures": {{{specs}}}}}\n'
+
+
+def render_chunk(season, season_type, pairs, season_dir, fmt, plotlyjs):
+    """
+    Renders and writes the reports for some pairs of one season, in a pool worker.
+
+    Parameters:
+    season (int): Season start year
+    season_type (str): 'Regular Season', 'Playoffs' or team_cube.ALL for both
+    pairs (list): (team1, team2) tuples
+    season_dir (str): Directory the season's reports go to
+    fmt (str): 'html' or 'json'
+    plotlyjs (str): 'directory' to load plotly.min.js next to the reports, 'inline' to embed it
+
+    Returns:
+    list: File names written
+    """
+    from figures import team_comparison_figure, team_style_radar_figure
+
+    context = _season_context(season, season_type)
+    # The league scatter is the same in every report of the season, so it is serialized once
+    scatter_key = f"league_scatter.{fmt}"
+    if scatter_key not in context:
+        context[scatter_key] = _serialize_figure('league_scatter', context['league_scatter'], fmt)
+
+    written = []
+    for team1, team2 in pairs:
+        team1_data, team2_data = context['teams'][team1], context['teams'][team2]
+        figures = {
+            'team_comparison': team_comparison_figure(team1_data, team2_data, team1, team2, season),
+            'team_style_radar': team_style_radar_figure(team1_data, team2_data, team1, team2, context['style_max']),
+        }
+        parts = {name: _serialize_figure(name, fig, fmt) for name, fig in figures.items()}
+        parts['league_scatter'] = context[scatter_key]
+        if fmt == "html":
+            content = _html_report(season, season_type, team1, team2, parts, plotlyjs)
+        else:
+            content = _json_report(season, season_type, team1, team2, parts)
+        name = report_name(team1, team2, fmt)
+        _write_text(os.path.join(season_dir, name), content)
+        written.append(name)
+    return written
+
+
+def _read_manifest(season_dir):
+    try:
+        with open(os.path.join(season_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _season_teams(store, season, season_type):
+    return season_cube(store, season).teams_in(season, season_type)
+
+
+def prerender(out_dir, csv_path="nba.csv", cache_dir=CACHE_DIR, seasons=None, season_type="Regular Season",
+              fmt="html", plotlyjs="directory", workers=None, force=False, log=print):
+    """
+    Renders every team matchup of the selected seasons, skipping seasons whose output is current.
+
+    Parameters:
+    out_dir (str): Root directory, reports go to <out_dir>/<season>/
+    csv_path (str): Source CSV
+    cache_dir (str): Directory of the Parquet partition cache
+    seasons (list): Season start years, defaults to every season
+    season_type (str): 'Regular Season' (the dashboard's default), 'Playoffs' or team_cube.ALL for both
+    fmt (str): 'html' or 'json'
+    plotlyjs (str): How HTML reports load plotly.js, 'directory' or 'inline'
+    workers (int): Pool size, defaults to the number of CPUs
+    force (bool): Re-render seasons even when their manifest is current
+    log (callable): Progress messages go here
+
+    Returns:
+    dict: Counts of rendered and skipped seasons, reports written and the elapsed seconds
+    """
+    started = time.perf_counter()
+    store = open_partitioned_store(csv_path, cache_dir)
+    version = renderer_version()
+    seasons = store.seasons if seasons is None else [season for season in seasons if season in store.seasons]
+
+    plan = {}
+    skipped = []
+    for season in seasons:
+        season_dir = os.path.join(out_dir, str(season))
+        manifest = {
+            'season': season,
+            'season_hash': store.season_hash(season),
+            'renderer_version': version,
+            'season_type': season_type,
+            'format': fmt,
+            'plotlyjs': plotlyjs if fmt == "html" else None,
+        }
+        previous = _read_manifest(season_dir)
+        if not force and previous is not None and all(previous.get(key) == value for key, value in manifest.items()):
+            skipped.append(season)
+            continue
+        os.makedirs(season_dir, exist_ok=True)
+        if os.path.exists(os.path.join(season_dir, MANIFEST_NAME)):
+            os.remove(os.path.join(season_dir, MANIFEST_NAME))
+        pairs = list(itertools.combinations(_season_teams(store, season, season_type), 2))
+        plan[season] = (season_dir, manifest, pairs)
+
+    if skipped:
+        log(f"Up to date: {', '.join(str(season) for season in skipped)}")
+
+    written = {season: [] for season in plan}
+    remaining = {season: len(pairs) for season, (_, _, pairs) in plan.items()}
+
+    def finish(season):
+        # The manifest goes last, so an interrupted season is redone on the next run
+        season_dir, manifest, pairs = plan[season]
+        manifest['reports'] = sorted(written[season])
+        _write_text(os.path.join(season_dir, MANIFEST_NAME), json.dumps(manifest, indent=1))
+        log(f"{season}: {len(pairs)} matchups")
+
+    # Seasons with fewer than two teams in the slice have nothing to render
+    for season in [season for season, count in remaining.items() if count == 0]:
+        finish(season)
+
+    if any(remaining.values()):
+        if fmt == "html" and plotlyjs == "directory":
+            from plotly.offline import get_plotlyjs
+            plotly_js = get_plotlyjs()
+            for season_dir, _, pairs in plan.values():
+                if pairs:
+                    _write_text(os.path.join(season_dir, "plotly.min.js"), plotly_js)
+
+        # Started like the table build's workers (NBA_BUILD_START_METHOD, default spawn)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(BUILD_START_METHOD),
+                                 initializer=_init_worker, initargs=(csv_path, cache_dir)) as pool:
+            futures = {}
+            for season, (season_dir, _, pairs) in plan.items():
+                for start in range(0, len(pairs), CHUNK_SIZE):
+                    chunk = pairs[start:start + CHUNK_SIZE]
+                    futures[pool.submit(render_chunk, season, season_type, chunk, season_dir, fmt, plotlyjs)] = season
+
+            for future in as_completed(futures):
+                season = futures[future]
+                names = future.result()
+                written[season].extend(names)
+                remaining[season] -= len(names)
+                if remaining[season] == 0:
+                    finish(season)
+
+    elapsed = time.perf_counter() - started
+    reports = sum(len(names) for names in written.values())
+    log(f"Rendered {reports} reports for {len(plan)} seasons, skipped {len(skipped)}, in {elapsed:.1f}s")
+    return {'rendered': sorted(plan), 'skipped': skipped, 'reports': reports, 'seconds': elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render every Team Analysis matchup to static reports")
+    parser.add_argument("-o", "--out", default="reports")
+    parser.add_argument("--csv", default="nba.csv")
+    parser.add_argument("--format", choices=["html", "json"], default="html")
+    parser.add_argument("--plotlyjs", choices=["directory", "inline"], default="directory",
+                        help="load plotly.js from a shared file next to the reports, or embed it in each one")
+    parser.add_argument("--season", type=int, action="append", help="season start year, repeatable")
+    parser.add_argument("--season-type", default="Regular Season", choices=["Regular Season", "Playoffs", ALL],
+                        help="team totals to compare, as picked on the Team Analysis page")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="processes, defaults to the number of CPUs")
+    parser.add_argument("--force", action="store_true", help="re-render seasons that are up to date")
+    args = parser.parse_args()
+
+    prerender(args.out, csv_path=args.csv, seasons=args.season, season_type=args.season_type, fmt=args.format,
+              plotlyjs=args.plotlyjs, workers=args.workers, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+from player_index import encode_keys
+
+# Per-minute counting stats and shooting ratios from create_per_min_stats used as the player profile
+SIMILARITY_FEATURES = ['PTS', 'FGA', 'FG3A', 'FTA', 'OREB', 'DREB', 'AST', 'STL', 'BLK', 'TOV', 'PF',
+                       'FG%', '3PT%', 'FT%', 'FG3A%', 'FTA/FGA', 'TRU%', 'AST_TOV']
+
+
+class PlayerSimilarityIndex:
+    """
+    Nearest-neighbour search over player-seasons of the per-minute table.
+
+    Every feature is standardized to zero mean and unit variance across all seasons and the
+    result is kept as one contiguous float32 matrix together with its squared row norms. A query
+    is a single matrix-vector product (||x||^2 - 2 x.q + ||q||^2) followed by an argpartition,
+    so its cost is one pass of BLAS over the matrix with no per-row Python work. Missing values
+    (e.g. 3PT% for players without attempts) are set to the league mean, i.e. 0 after scaling.
+
+    Parameters:
+    per_min (pandas.DataFrame): Output of create_per_min_stats over any number of seasons
+    features (list): Columns to compare on, defaults to SIMILARITY_FEATURES present in per_min
+    """
+
+    def __init__(self, per_min, features=None):
+        if features is None:
+            features = [col for col in SIMILARITY_FEATURES if col in per_min.columns]
+        self.features = features
+        self.rows = per_min.reset_index(drop=True)
+
+        values = self.rows[features].to_numpy(dtype='float64', copy=True)
+        values[~np.isfinite(values)] = np.nan
+        self.mean = np.nanmean(values, axis=0)
+        self.scale = np.nanstd(values, axis=0)
+        self.scale[~(self.scale > 0)] = 1.0
+
+        matrix = (values - self.mean) / self.scale
+        matrix[np.isnan(matrix)] = 0.0
+        self.matrix = np.ascontiguousarray(matrix, dtype='float32')
+        self.norms = np.einsum('ij,ij->i', self.matrix, self.matrix)
+
+        self.minutes = self.rows['MIN'].to_numpy()
+        self.player_ids = self.rows['PLAYER_ID'].to_numpy(dtype='int64')
+        keys = encode_keys(self.player_ids, self.rows['season_start_year'].to_numpy(), 0)
+        self._order = np.argsort(keys, kind='stable')
+        self._keys = keys[self._order]
+
+    def position(self, player_id, season):
+        """Row position of a player-season, or None if it isn't in the index."""
+        key = encode_keys(player_id, season, 0)
+        i = np.searchsorted(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return int(self._order[i])
+        return None
+
+    def squared_distances(self, vector):
+        """Squared Euclidean distances from a standardized feature vector to every row."""
+        vector = np.asarray(vector, dtype='float32')
+        squared = self.matrix @ vector
+        squared *= -2.0
+        squared += self.norms
+        squared += vector @ vector
+        return np.maximum(squared, 0.0, out=squared)
+
+    def similar_players(self, player_id, season, k=10, min_minutes=0, exclude_self=True):
+        """
+        Returns the k player-seasons closest to one player-season, across all seasons.
+
+        Parameters:
+        player_id (int): Player to match
+        season (int): Season start year of the player's profile
+        k (int): Number of results
+        min_minutes (int): Skip player-seasons with fewer total minutes
+        exclude_self (bool): Leave out every season of the queried player. If False, the player's
+                             other seasons are ranked like anyone else's and only the queried
+                             player-season itself is left out
+
+        Returns:
+        pandas.DataFrame: Matching rows of the per-minute table, closest first, with a 'distance' column
+        """
+        position = self.position(player_id, season)
+        if position is None:
+            return self.rows.iloc[0:0].assign(distance=pd.Series(dtype='float32'))
+
+        squared = self.squared_distances(self.matrix[position])
+        excluded = self.minutes < min_minutes
+        if exclude_self:
+            excluded |= self.player_ids == player_id
+        else:
+            excluded[position] = True
+        squared[excluded] = np.inf
+
+        k = min(k, len(squared) - int(np.count_nonzero(excluded)))
+        if k <= 0:
+            return self.rows.iloc[0:0].assign(distance=pd.Series(dtype='float32'))
+        nearest = np.argpartition(squared, k - 1)[:k]
+        nearest = nearest[np.argsort(squared[nearest], kind='stable')]
+
+        return self.rows.take(nearest).assign(distance=np.sqrt(squared[nearest]))
@@ -0,0 +1,486 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from urllib.parse import unquote
+
+import pandas as pd
+
+from instrumentation import timed
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+CACHE_DIR = os.environ.get("NBA_CACHE_DIR", ".nba_cache")
+
+# Bump this whenever COLUMN_DTYPES or the cache layout changes so old caches get rebuilt
+CACHE_VERSION = 4
+
+PARTITION_COLS = ['season_start_year', 'Season_type']
+
+# Parquet schema metadata key holding the partition -> row group map
+PARTITION_METADATA_KEY = b'nba_partitions'
+
+# A later row for the same player, season and season type replaces the earlier one
+ROW_KEY_COLS = ['PLAYER_ID', 'year', 'Season_type']
+
+logger = logging.getLogger(__name__)
+
+# Explicit types for the nba.csv columns so pandas doesn't have to infer them on every parse
+COLUMN_DTYPES = {
+    'year': str,
+    'Season_type': str,
+    'PLAYER': str,
+    'TEAM': str,
+    'PLAYER_ID': 'int32',
+    'TEAM_ID': 'int32',
+    'RANK': 'int32',
+    'GP': 'int32',
+    'MIN': 'int32',
+    'FGM': 'int32',
+    'FGA': 'int32',
+    'FG3M': 'int32',
+    'FG3A': 'int32',
+    'FTM': 'int32',
+    'FTA': 'int32',
+    'OREB': 'int32',
+    'DREB': 'int32',
+    'REB': 'int32',
+    'AST': 'int32',
+    'STL': 'int32',
+    'BLK': 'int32',
+    'TOV': 'int32',
+    'PF': 'int32',
+    'PTS': 'int32',
+    'EFF': 'int32',
+    'FG_PCT': 'float32',
+    'FG3_PCT': 'float32',
+    'FT_PCT': 'float32',
+    'AST_TOV': 'float32',
+    'STL_TOV': 'float32',
+}
+
+
+def _content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _manifest_path(csv_path, cache_dir):
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(cache_dir, f"{stem}.manifest.json")
+
+
+def _read_manifest(manifest_path):
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_atomic(path, write, ignore_errors=True):
+    """
+    Writes a file through a temp file and a rename, so readers never see it half-written.
+
+    Parameters:
+    path (str): File to write
+    write (callable): Called with the temp file path, writes the content there
+    ignore_errors (bool): Drop the write on OSError (fine for caches) instead of raising it
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        if not ignore_errors:
+            raise
+
+
+def dataset_fingerprint(csv_path, cache_dir=CACHE_DIR):
+    """
+    Returns the content hash of a CSV file, reusing the cached hash when size and mtime are unchanged.
+
+    Parameters:
+    csv_path (str): Path to the CSV file
+    cache_dir (str): Directory holding the cache manifest
+
+    Returns:
+    str: Hex SHA-256 digest of the file contents
+    """
+    stat = os.stat(csv_path)
+    manifest = _read_manifest(_manifest_path(csv_path, cache_dir))
+
+    if (manifest and manifest.get('version') == CACHE_VERSION
+            and manifest.get('size') == stat.st_size
+            and manifest.get('mtime_ns') == stat.st_mtime_ns):
+        return manifest['sha256']
+
+    return _content_hash(csv_path)
+
+
+@timed('storage.parse_csv')
+def parse_nba_csv(csv_path):
+    """
+    Parses the raw CSV with explicit column types.
+
+    The scraped file stores season types URL-encoded ('Regular%20Season'), so they are
+    decoded here once, and season_start_year is derived from the 'year' label. Appended
+    updates win over earlier rows with the same player, season and season type.
+    """
+    data = pd.read_csv(csv_path, dtype=COLUMN_DTYPES)
+
+    # Decoded before deduplicating, so an appended 'Regular Season' row replaces a 'Regular%20Season' one
+    if 'Season_type' in data.columns:
+        labels = {season_type: unquote(season_type) for season_type in data['Season_type'].unique()}
+        data['Season_type'] = data['Season_type'].map(labels)
+
+    if all(col in data.columns for col in ROW_KEY_COLS):
+        data = data.drop_duplicates(subset=ROW_KEY_COLS, keep='last', ignore_index=True)
+
+    if 'season_start_year' not in data.columns and 'year' in data.columns:
+        data['season_start_year'] = data['year'].str[:4].astype('int32')
+
+    return data
+
+
+def _frame_hash(data):
+    return hashlib.sha256(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes()).hexdigest()[:16]
+
+
+class PartitionedStore:
+    """
+    Season data split into (season_start_year, Season_type) partitions that are loaded lazily.
+
+    On disk every partition is one row group of a single Parquet file (see write_partitions()),
+    so a season can be read without touching the others while a full load stays one file read.
+    Stores built from a frame keep their partitions in memory. Each partition is read at most once.
+    Every partition carries a content hash, so caches keyed by it survive updates to other seasons.
+
+    Parameters:
+    partitions (dict): (season_start_year, Season_type) -> row group number, or DataFrame when in memory
+    hashes (dict): (season_start_year, Season_type) -> content hash of the partition
+    path (str): Parquet file holding the row groups, None for in-memory stores
+    """
+
+    def __init__(self, partitions, hashes, path=None):
+        self._partitions = dict(sorted(partitions.items()))
+        self._hashes = hashes
+        self._path = path
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_parquet(cls, path):
+        metadata = pq.read_schema(path).metadata or {}
+        partitions = json.loads(metadata[PARTITION_METADATA_KEY])
+        keys = [(part['season_start_year'], part['Season_type']) for part in partitions]
+        return cls(
+            {key: part['row_group'] for key, part in zip(keys, partitions)},
+            {key: part['sha256'] for key, part in zip(keys, partitions)},
+            path,
+        )
+
+    @classmethod
+    def from_frame(cls, data):
+        partitions = {key: part.reset_index(drop=True) for key, part in data.groupby(PARTITION_COLS, sort=True)}
+        return cls(partitions, {key: _frame_hash(part) for key, part in partitions.items()})
+
+    @property
+    def path(self):
+        """Parquet file behind the store, None for in-memory stores."""
+        return self._path
+
+    @property
+    def partitions(self):
+        return list(self._partitions)
+
+    @property
+    def seasons(self):
+        return sorted({season for season, _ in self._partitions})
+
+    @property
+    def season_types(self):
+        return sorted({season_type for _, season_type in self._partitions})
+
+    def partition_hash(self, season, season_type):
+        return self._hashes[(season, season_type)]
+
+    def season_hash(self, season):
+        """Content hash over every partition of a season, changes only when that season's rows do."""
+        return hashlib.sha256(''.join(
+            f"{key[1]}:{digest};" for key, digest in self._hashes.items() if key[0] == season
+        ).encode()).hexdigest()[:16]
+
+    def _load(self, keys):
+        with self._lock:
+            missing = [key for key in keys if key not in self._loaded]
+            if missing and self._path is not None:
+                parquet_file = pq.ParquetFile(self._path)
+                for key in missing:
+                    self._loaded[key] = parquet_file.read_row_group(self._partitions[key]).to_pandas()
+            else:
+                for key in missing:
+                    self._loaded[key] = self._partitions[key]
+            return [self._loaded[key] for key in keys]
+
+    @timed('storage.read_partitions')
+    def read(self, season, season_type=None):
+        """Returns the rows of one season, optionally limited to one season type."""
+        keys = [key for key in self._partitions
+                if key[0] == season and (season_type is None or key[1] == season_type)]
+        if not keys:
+            # Empty frame with the usual columns, without loading every partition
+            keys = self.partitions[:1]
+            return pd.concat(self._load(keys), ignore_index=True).iloc[0:0] if keys else pd.DataFrame()
+        return pd.concat(self._load(keys), ignore_index=True)
+
+    def read_all(self):
+        """Returns every partition as one frame, in (season, season type) order."""
+        if self._path is not None:
+            return pq.ParquetFile(self._path).read().to_pandas()
+        return pd.concat(list(self._partitions.values()), ignore_index=True)
+
+
+def write_partitions(data, path):
+    """
+    Writes the data as one Parquet file with a row group per (season_start_year, Season_type).
+
+    The partition -> row group map and each partition's content hash are stored in the
+    file's schema metadata.
+
+    Parameters:
+    data (pandas.DataFrame): Parsed season data
+    path (str): Output Parquet file
+    """
+    groups = list(data.groupby(PARTITION_COLS, sort=True))
+    partitions = [
+        {
+            'season_start_year': int(season),
+            'Season_type': season_type,
+            'row_group': i,
+            'rows': len(part),
+            'sha256': _frame_hash(part),
+        }
+        for i, ((season, season_type), part) in enumerate(groups)
+    ]
+
+    schema = pa.Schema.from_pandas(data, preserve_index=False)
+    schema = schema.with_metadata({**schema.metadata, PARTITION_METADATA_KEY: json.dumps(partitions).encode()})
+
+    with pq.ParquetWriter(path, schema) as writer:
+        for _, part in groups:
+            table = pa.Table.from_pandas(part, schema=schema, preserve_index=False)
+            writer.write_table(table, row_group_size=len(part))
+
+
+@timed('storage.open_partitions')
+def open_partitioned_store(csv_path="nba.csv", cache_dir=CACHE_DIR):
+    """
+    Opens the partitioned Parquet cache for a CSV, keyed by the file's size, mtime and content hash.
+
+    The CSV is only parsed when no cache exists for its current contents, so repeated
+    loads (and every new worker process) read the columnar copy instead. Without pyarrow
+    this falls back to parsing the CSV into an in-memory store each time.
+
+    Parameters:
+    csv_path (str): Path to the CSV file
+    cache_dir (str): Directory holding the Parquet cache and its manifest
+
+    Returns:
+    PartitionedStore: Lazily loaded season partitions
+    """
+    if not HAS_PYARROW:
+        return PartitionedStore.from_frame(parse_nba_csv(csv_path))
+
+    stat = os.stat(csv_path)
+    manifest_path = _manifest_path(csv_path, cache_dir)
+    content_hash = dataset_fingerprint(csv_path, cache_dir)
+
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    cache_file = os.path.join(cache_dir, f"{stem}-v{CACHE_VERSION}-{content_hash[:16]}.parquet")
+
+    store = None
+    if os.path.exists(cache_file):
+        try:
+            store = PartitionedStore.from_parquet(cache_file)
+        except (OSError, ValueError, KeyError):
+            # Corrupt or unreadable cache file, rebuild it below
+            store = None
+
+    if store is None:
+        data = parse_nba_csv(csv_path)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError:
+            return PartitionedStore.from_frame(data)
+        write_atomic(cache_file, lambda p: write_partitions(data, p))
+        if not os.path.exists(cache_file):
+            return PartitionedStore.from_frame(data)
+        store = PartitionedStore.from_parquet(cache_file)
+
+        # Drop caches built from previous versions of the file
+        for name in os.listdir(cache_dir):
+            if name.startswith(f"{stem}-") and name.endswith(".parquet") and name != os.path.basename(cache_file):
+                try:
+                    os.remove(os.path.join(cache_dir, name))
+                except OSError:
+                    pass
+
+    manifest = {
+        'version': CACHE_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': content_hash,
+    }
+    if _read_manifest(manifest_path) != manifest and os.path.isdir(cache_dir):
+        def write_manifest(p):
+            with open(p, 'w') as f:
+                json.dump(manifest, f)
+        write_atomic(manifest_path, write_manifest)
+
+    return store
+
+
+def read_nba_csv(csv_path="nba.csv", cache_dir=CACHE_DIR):
+    """
+    Loads the full NBA dataset through the partitioned Parquet cache.
+
+    Parameters:
+    csv_path (str): Path to the CSV file
+    cache_dir (str): Directory holding the Parquet cache and its manifest
+
+    Returns:
+    pandas.DataFrame: The raw NBA data with explicit dtypes
+    """
+    return open_partitioned_store(csv_path, cache_dir).read_all()
+
+
+def append_csv(source_path, csv_path="nba.csv"):
+    """
+    Appends the rows of another CSV with the same columns to the main data file.
+
+    Rows are copied verbatim (as text) in the target's column order, so nothing is
+    re-encoded. Returns the number of rows appended.
+
+    Parameters:
+    source_path (str): CSV file with new rows
+    csv_path (str): Main data file to append to
+    """
+    target_columns = pd.read_csv(csv_path, nrows=0).columns
+    new_rows = pd.read_csv(source_path, dtype=str, keep_default_na=False)
+
+    missing = set(target_columns) - set(new_rows.columns)
+    if missing:
+        raise ValueError(f"{source_path} is missing columns: {', '.join(sorted(missing))}")
+
+    needs_newline = False
+    with open(csv_path, 'rb') as f:
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+
+    with open(csv_path, 'a', newline='') as f:
+        if needs_newline:
+            f.write('\n')
+        new_rows[list(target_columns)].to_csv(f, header=False, index=False, lineterminator='\n')
+
+    return len(new_rows)
+
+
+class DatasetWatcher:
+    """
+    Polls the main CSV (and an optional drop directory of new CSV files) for changes.
+
+    New *.csv files in the drop directory are appended to the main file and renamed to
+    *.csv.ingested once their size and mtime have stayed the same over two polls, so a file
+    still being copied in is left alone (writers can also copy to another name and rename it
+    to *.csv when done). Files that fail to append are renamed to *.csv.rejected and logged.
+    Whenever the main file's size or mtime changes, on_change() is called from the watcher thread.
+
+    Parameters:
+    csv_path (str): Main data file
+    on_change (callable): Called without arguments after every detected change
+    incoming_dir (str): Optional directory to pick new CSV files up from
+    interval (float): Seconds between polls
+    """
+
+    def __init__(self, csv_path, on_change, incoming_dir=None, interval=5.0):
+        self.csv_path = csv_path
+        self.on_change = on_change
+        self.incoming_dir = incoming_dir
+        self.interval = interval
+        self._signature = self._stat()
+        self._incoming = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.csv_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _ingest_incoming(self):
+        if not self.incoming_dir or not os.path.isdir(self.incoming_dir):
+            return
+        seen = {}
+        for name in sorted(os.listdir(self.incoming_dir)):
+            if not name.endswith('.csv'):
+                continue
+            path = os.path.join(self.incoming_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if self._incoming.get(path) != signature:
+                # New or still growing: wait for the next poll
+                seen[path] = signature
+                continue
+            try:
+                rows = append_csv(path, self.csv_path)
+            except Exception:
+                logger.exception("Rejected %s", path)
+                os.replace(path, f"{path}.rejected")
+                continue
+            os.replace(path, f"{path}.ingested")
+            logger.info("Appended %d rows from %s", rows, path)
+        self._incoming = seen
+
+    def poll(self):
+        """Runs one check, returns True if the data changed."""
+        self._ingest_incoming()
+        signature = self._stat()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        self.on_change()
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Dataset refresh failed")
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="nba-dataset-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,146 @@
+"""
+Team totals and metrics as a dense team x season x season type x metric array.
+
+Counting stats are summed once into the cube with one bincount per column, including an
+extra 'All' position on the season and season type axes for the roll-ups (a team's whole
+history, both season types). Rate metrics (PACE, ORtg, ...) are then computed from the
+summed counts of every cell, roll-ups included, so they are never averages of averages.
+Any slice is a plain index into the array: no filtering, grouping or merging per lookup.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from compute import TEAM_SEASON_METRICS, total_cols
+from metrics import TEAM_METRICS, compute_metrics
+
+# Label of the roll-up position on the season and season type axes
+ALL = 'All'
+
+
+class TeamSeasonCube:
+    """
+    Dense cube of team totals and team metrics per season and season type.
+
+    Cells of a team that didn't play in a season (or season type) hold zero counts and NaN
+    rates, and are left out of slice().
+
+    Parameters:
+    data (pandas.DataFrame): Preprocessed player rows with TEAM, season_start_year and Season_type
+    total_cols (list): Counting stat columns to sum
+    """
+
+    def __init__(self, data, total_cols=total_cols):
+        team_codes, teams = pd.factorize(data['TEAM'], sort=True)
+        season_codes, seasons = pd.factorize(data['season_start_year'], sort=True)
+        type_codes, season_types = pd.factorize(data['Season_type'], sort=True)
+        self.teams = list(teams)
+        self.seasons = [int(season) for season in seasons]
+        self.season_types = list(season_types)
+
+        # Each axis gets one extra position at the end for its roll-up
+        self._teams = {team: i for i, team in enumerate(self.teams)}
+        self._seasons = {season: i for i, season in enumerate(self.seasons)}
+        self._seasons[ALL] = len(self.seasons)
+        self._types = {season_type: i for i, season_type in enumerate(self.season_types)}
+        self._types[ALL] = len(self.season_types)
+        shape = (len(self.teams), len(self.seasons) + 1, len(self.season_types) + 1)
+
+        count_cols = [col for col in total_cols if col in data.columns] + ['GP']
+        cells = np.ravel_multi_index((team_codes, season_codes, type_codes), shape)
+        counts = {}
+        for col in count_cols:
+            summed = np.bincount(cells, weights=data[col].to_numpy(dtype='float64'), minlength=np.prod(shape))
+            summed = summed.reshape(shape)
+            summed[:, :, -1] = summed[:, :, :-1].sum(axis=2)
+            summed[:, -1, :] = summed[:, :-1, :].sum(axis=1)
+            counts[col] = summed.ravel()
+
+        rates = compute_metrics(counts, TEAM_SEASON_METRICS, TEAM_METRICS)
+        self.metrics = count_cols + list(rates)
+        self._metric_index = {metric: i for i, metric in enumerate(self.metrics)}
+        self.values = np.stack([counts[col] for col in count_cols] + list(rates.values()), axis=-1)
+        self.values = self.values.reshape(shape + (len(self.metrics),))
+        self.present = self.values[..., self._metric_index['GP']] > 0
+        self.values.flags.writeable = False
+        self.present.flags.writeable = False
+        self._slices = {}
+        self._lock = threading.Lock()
+
+    def _slice_position(self, season, season_type):
+        try:
+            return self._seasons[season], self._types[season_type]
+        except KeyError:
+            raise KeyError(f"no season slice {season!r}, {season_type!r}") from None
+
+    def _position(self, team, season, season_type):
+        if team not in self._teams:
+            raise KeyError(f"no team {team!r}")
+        return (self._teams[team],) + self._slice_position(season, season_type)
+
+    def cell(self, team, season=ALL, season_type=ALL):
+        """Every metric of one team, season and season type, as a read-only view in self.metrics order."""
+        return self.values[self._position(team, season, season_type)]
+
+    def value(self, metric, team, season=ALL, season_type=ALL):
+        return float(self.cell(team, season, season_type)[self._metric_index[metric]])
+
+    def row(self, team, season=ALL, season_type=ALL):
+        """One team's row of slice() (empty when the team didn't play)."""
+        teams = self.slice(season, season_type)
+        if team not in self._teams:
+            return teams.iloc[0:0]
+        t, s, k = self._position(team, season, season_type)
+        if not self.present[t, s, k]:
+            return teams.iloc[0:0]
+        # Teams that played before this one in the slice give its row position
+        return teams.iloc[[np.count_nonzero(self.present[:t, s, k])]]
+
+    def teams_in(self, season=ALL, season_type=ALL):
+        """Teams that played in a season and season type."""
+        s, k = self._slice_position(season, season_type)
+        return [team for team, played in zip(self.teams, self.present[:, s, k]) if played]
+
+    def slice(self, season=ALL, season_type=ALL):
+        """
+        Every team of one season and season type.
+
+        Built from the cube on first use and kept, callers must treat it as read-only.
+
+        Parameters:
+        season (int): Season start year, or ALL for every season
+        season_type (str): 'Regular Season', 'Playoffs' or ALL for both
+
+        Returns:
+        pandas.DataFrame: TEAM, season_start_year, Season_type and self.metrics, one row per team that played
+        """
+        frame = self._slices.get((season, season_type))
+        if frame is None:
+            s, k = self._slice_position(season, season_type)
+            played = self.present[:, s, k]
+            frame = pd.DataFrame(self.values[played, s, k], columns=self.metrics)
+            frame.insert(0, 'TEAM', np.asarray(self.teams, dtype=object)[played])
+            frame.insert(1, 'season_start_year', season)
+            frame.insert(2, 'Season_type', season_type)
+            with self._lock:
+                self._slices[(season, season_type)] = frame
+        return frame
+
+    def series(self, team, metric, season_type=ALL):
+        """
+        One metric of one team through every season.
+
+        Returns:
+        numpy.ndarray: A value per season of self.seasons, NaN where the team didn't play
+        """
+        t, _, k = self._position(team, ALL, season_type)
+        values = self.values[t, :-1, k, self._metric_index[metric]]
+        return np.where(self.present[t, :-1, k], values, np.nan)
+
+    def max(self, metric, season=ALL, season_type=ALL):
+        """Largest value of a metric over the teams of one season and season type, NaN if there are none."""
+        s, k = self._slice_position(season, season_type)
+        values = self.values[:, s, k, self._metric_index[metric]][self.present[:, s, k]]
+        values = values[np.isfinite(values)]
+        return float(values.max()) if len(values) else np.nan
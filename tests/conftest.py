@@ -0,0 +1,46 @@
+import pytest
+
+SEASON_HEADER = ("year,Season_type,PLAYER_ID,RANK,PLAYER,TEAM_ID,TEAM,GP,MIN,FGM,FGA,FG_PCT,FG3M,FG3A,FG3_PCT,FTM,FTA,"
+                 "FT_PCT,OREB,DREB,REB,AST,STL,BLK,TOV,PF,PTS,EFF,AST_TOV,STL_TOV")
+
+GAMES_HEADER = ("SEASON_YEAR,SEASON_TYPE,PLAYER_ID,PLAYER_NAME,TEAM_ID,TEAM_ABBREVIATION,GAME_NUMBER,MIN,FGM,FGA,FG3M,"
+                "FG3A,FTM,FTA,OREB,DREB,REB,AST,STL,BLK,TOV,PF,PTS")
+
+
+@pytest.fixture
+def season_row():
+    """Builds one nba.csv row (a 2012-13 season line unless told otherwise) with the given season type and points."""
+    def build(season_type, pts, player_id=201142, player="Kevin Durant", season="2012-13", team="OKC"):
+        return (f"{season},{season_type},{player_id},1,{player},1610612760,{team},81,3119,731,1433,0.51,139,334,0.416,"
+                f"679,750,0.905,46,594,640,374,116,105,280,143,{pts},2462,1.34,0.41")
+    return build
+
+
+@pytest.fixture
+def write_csv():
+    """Writes nba.csv rows under the nba.csv header and returns the path as a string."""
+    def write(path, rows):
+        path.write_text("\n".join([SEASON_HEADER] + rows) + "\n")
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def game_row():
+    """Builds one game-log row of a player (30 minutes, fixed box score) with the given points."""
+    def build(player_id, game, pts, season="2012-13", season_type="Regular Season", team="OKC"):
+        return (f"{season},{season_type},{player_id},Player {player_id},1610612760,{team},{game},30,8,16,2,5,3,4,"
+                f"1,5,6,4,1,1,2,2,{pts}")
+    return build
+
+
+@pytest.fixture
+def write_games():
+    """Writes game-log rows under the game-log header, optionally without the GAME_NUMBER column."""
+    def write(path, rows, game_column=True):
+        lines = [GAMES_HEADER] + rows
+        if not game_column:
+            lines = [",".join(line.split(",")[:6] + line.split(",")[7:]) for line in lines]
+        path.write_text("\n".join(lines) + "\n")
+        return str(path)
+    return write
@@ -0,0 +1,117 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pytest
+
+from api import StatsRequestHandler, StatsService, make_server
+
+
+class ChangingService:
+    """Answers /seasons with data newer than the version checked before the build."""
+
+    def version(self, season=None):
+        return "v1"
+
+    def seasons(self):
+        return "v2", pd.DataFrame({'season_start_year': [2023]})
+
+    def team_season_stats(self, season=None, team=None, season_type='Regular Season'):
+        return None
+
+    def per_minute(self, season=None, player_id=None):
+        raise RuntimeError("broken table")
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def serve(service):
+        server = make_server(port=0, service=service)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+
+        def get(path, headers=None):
+            request = urllib.request.Request(f"http://127.0.0.1:{server.server_address[1]}{path}",
+                                             headers=headers or {})
+            try:
+                with urllib.request.urlopen(request) as response:
+                    return response.status, response.headers.get('ETag'), response.read()
+            except urllib.error.HTTPError as e:
+                return e.code, e.headers.get('ETag'), e.read()
+        return get
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def get(serve):
+    return serve(ChangingService())
+
+
+@pytest.fixture
+def dataset(tmp_path, season_row, write_csv):
+    # Kevin Durant's regular season and playoffs, and one other player of the same team
+    csv_path = write_csv(tmp_path / "nba.csv", [season_row("Regular%20Season", 2280), season_row("Playoffs", 430),
+                                                season_row("Regular%20Season", 800, 1, "Player 1")])
+    return StatsService(csv_path, str(tmp_path / "cache"))
+
+
+def test_etag_follows_the_version_the_payload_was_built_from(get):
+    status, etag, body = get('/seasons')
+    assert status == 200
+    assert json.loads(body) == [{'season_start_year': 2023}]
+
+    assert etag == StatsRequestHandler._etag("v2", "/seasons", {}, "json")
+
+
+def test_unknown_season_is_a_404(get):
+    status, _, body = get('/team-season-stats?season=1900')
+    assert status == 404
+    assert json.loads(body) == {'error': 'no season 1900'}
+
+
+def test_unexpected_error_is_a_json_500(get):
+    status, _, body = get('/per-minute?season=2023')
+    assert status == 500
+    assert json.loads(body) == {'error': 'internal error'}
+
+
+def test_team_stats_are_split_by_season_type(serve, dataset):
+    get = serve(dataset)
+
+    status, _, body = get('/team-season-stats?season=2012&team=OKC')
+    assert status == 200
+    [regular] = json.loads(body)
+    assert (regular['Season_type'], regular['PTS']) == ('Regular Season', 3080)
+
+    [playoffs] = json.loads(get('/team-season-stats?team=OKC&season_type=Playoffs')[2])
+    assert playoffs['PTS'] == 430
+    [both] = json.loads(get('/team-season-stats?season=2012&season_type=All')[2])
+    assert both['PTS'] == 3510
+
+    status, _, body = get('/team-season-stats?season_type=Preseason')
+    assert status == 400
+
+
+def test_unknown_team_or_player_is_a_404(serve, dataset):
+    get = serve(dataset)
+
+    status, _, body = get('/team-season-stats?season=2012&team=XYZ')
+    assert status == 404
+    assert json.loads(body) == {'error': 'no team XYZ'}
+    assert get('/per-minute?season=2012&player_id=999')[0] == 404
+    assert get('/per-minute?season=2012&player_id=1')[0] == 200
+
+
+def test_missing_dataset_is_a_404(serve, tmp_path):
+    get = serve(StatsService(str(tmp_path / "nba.csv"), str(tmp_path / "cache")))
+
+    status, _, body = get('/seasons')
+    assert status == 404
+    assert json.loads(body) == {'error': 'no dataset'}
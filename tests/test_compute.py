@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from compute import (MetricDistributions, compact_frame, concat_tables, create_all_season_tables,
+                     create_per_min_stats)
+from storage import open_partitioned_store
+
+
+def player_row(year, season_type, player_id, team, scale):
+    return (f"{year}-{(year + 1) % 100:02d},{season_type},{player_id},1,Player {player_id},{1610612700 + len(team)},"
+            f"{team},{60 + scale},{2000 + 10 * scale},{400 + scale},{900 + 2 * scale},0.45,{80 + scale},"
+            f"{220 + scale},0.36,{150 + scale},{190 + scale},0.79,{40 + scale},{250 + scale},{290 + 2 * scale},"
+            f"{180 + scale},{50 + scale},{20 + scale},{110 + scale},{120 + scale},{1100 + 3 * scale},1500,1.6,0.45")
+
+
+@pytest.fixture
+def store(tmp_path, write_csv):
+    rows = [player_row(year, season_type, player_id, team, year - 2010 + player_id)
+            for year in (2010, 2011, 2012)
+            for season_type in ("Regular%20Season", "Playoffs")
+            for player_id, team in ((1, "BOS"), (2, "BOS"), (3, "LAL"), (4, "MIA"))]
+    return open_partitioned_store(write_csv(tmp_path / "nba.csv", rows), str(tmp_path / "cache"))
+
+
+def test_season_tables_same_for_every_executor(store):
+    serial = create_all_season_tables(store, league_trends=True, executor='serial')
+    assert list(serial) == [2010, 2011, 2012]
+
+    for executor in ('thread', 'process'):
+        pooled = create_all_season_tables(store, league_trends=True, workers=2, executor=executor)
+        assert list(pooled) == list(serial)
+        for season, tables in serial.items():
+            for expected, actual in zip(tables, pooled[season]):
+                pd.testing.assert_frame_equal(actual, expected)
+
+
+def plain_percentile(values, value):
+    # Share of finite values at or below value, as scipy.stats.percentileofscore(kind='weak')
+    finite = [v for v in values if np.isfinite(v)]
+    return 100.0 * sum(v <= value for v in finite) / len(finite)
+
+
+def test_percentile_matches_a_plain_rank_with_ties_and_nan():
+    values = [3.0, 1.0, np.nan, 2.0, 2.0, 5.0, np.inf, 2.0, 4.0]
+    distributions = MetricDistributions(pd.DataFrame({'PTS': values}))
+
+    queries = [0.5, 1.0, 2.0, 2.5, 3.0, 5.0, 9.0]
+    np.testing.assert_allclose(distributions.percentile('PTS', queries),
+                               [plain_percentile(values, q) for q in queries])
+    assert distributions.percentile('PTS', 2.0) == 100 * 4 / 7
+    assert np.isnan(distributions.percentile('PTS', [np.nan, 1.0])[0])
+    assert distributions.max['PTS'] == 5.0
+
+
+def test_percentile_of_an_empty_metric_is_nan():
+    distributions = MetricDistributions(pd.DataFrame({'PTS': [np.nan, np.nan]}))
+
+    assert np.isnan(distributions.percentile('PTS', [1.0, 2.0])).all()
+    assert np.isnan(distributions.max['PTS'])
+
+
+def test_per_min_stats_sum_a_traded_players_rows_and_leave_the_input_alone():
+    cols = ['MIN', 'PTS', 'FGM', 'FGA', 'FG3M', 'FG3A', 'FTM', 'FTA', 'AST', 'TOV']
+    data = pd.DataFrame([
+        # Traded from OKC to HOU during 2012-13
+        (1, "Player 1", "OKC", 2012, 600, 300, 110, 250, 30, 80, 50, 60, 60, 30),
+        (1, "Player 1", "HOU", 2012, 400, 180, 70, 150, 10, 40, 30, 40, 40, 20),
+        (1, "Player 1", "HOU", 2013, 100, 36, 15, 30, 0, 0, 6, 8, 5, 0),
+        # Under 50 minutes: left out
+        (2, "Player 2", "OKC", 2012, 40, 20, 8, 16, 2, 4, 2, 2, 3, 1),
+    ], columns=['PLAYER_ID', 'PLAYER', 'TEAM', 'season_start_year'] + cols)
+    original = data.copy(deep=True)
+
+    per_min = create_per_min_stats(data, cols).set_index(['PLAYER_ID', 'season_start_year'])
+
+    pd.testing.assert_frame_equal(data, original)
+    assert per_min.index.tolist() == [(1, 2012), (1, 2013)]
+    traded = per_min.loc[(1, 2012)]
+    assert traded['year'] == "2012-13"
+    assert traded['MIN'] == 1000
+    assert traded[['PTS', 'FGA', 'AST']].tolist() == pytest.approx([0.48, 0.4, 0.1])
+    assert traded[['FG%', '3PT%', 'FT%', 'FG3A%', 'PTS/FGA', 'FTA/FGA', 'AST_TOV']].tolist() == \
+        pytest.approx([0.45, 1 / 3, 0.8, 0.3, 1.2, 0.25, 2.0])
+    assert traded['TRU%'] == pytest.approx(240 / 447.5)
+    # No three-point attempts: no ratio. No turnovers: a large finite AST_TOV (turnovers counted as 0.001 a minute)
+    assert np.isnan(per_min.loc[(1, 2013), '3PT%'])
+    assert per_min.loc[(1, 2013), 'AST_TOV'] == pytest.approx(0.05 / 0.001)
+
+
+def test_compact_frame_is_lossless_at_the_integer_bounds():
+    frame = pd.DataFrame({
+        'PLAYER_ID': np.array([1, 1630178, 2 ** 40], dtype='int64'),
+        'GP': np.array([-32768, 0, 32767], dtype='int64'),
+        'MIN': np.array([-32769, 0, 32768], dtype='int64'),
+        'RANK': np.array([-2 ** 31, 0, 2 ** 31 - 1], dtype='int64'),
+        'PTS_TOTAL': np.array([-2 ** 31 - 1, 0, 2 ** 31], dtype='int64'),
+        'PTS': [0.1, 1.5, np.nan],
+        'TEAM': ['OKC', 'BOS', 'OKC'],
+    })
+
+    compact = compact_frame(frame)
+
+    assert compact.dtypes.astype(str).to_dict() == {
+        'PLAYER_ID': 'int64', 'GP': 'int16', 'MIN': 'int32', 'RANK': 'int32', 'PTS_TOTAL': 'int64',
+        'PTS': 'float32', 'TEAM': 'category'}
+    for col in ['PLAYER_ID', 'GP', 'MIN', 'RANK', 'PTS_TOTAL']:
+        assert compact[col].tolist() == frame[col].tolist()
+    np.testing.assert_allclose(compact['PTS'], frame['PTS'], rtol=1e-7)
+    assert compact['TEAM'].tolist() == frame['TEAM'].tolist()
+
+
+def test_concat_tables_unions_categories_across_seasons():
+    seasons = [compact_frame(pd.DataFrame({'TEAM': teams, 'GP': gp}))
+               for teams, gp in ((['OKC', 'BOS'], [82, 80]), (['SEA', 'OKC'], [70, 81]), (['NOH'], [60]))]
+
+    combined = concat_tables(seasons)
+
+    assert isinstance(combined['TEAM'].dtype, pd.CategoricalDtype)
+    assert list(combined['TEAM'].cat.categories) == ['BOS', 'NOH', 'OKC', 'SEA']
+    assert combined['TEAM'].tolist() == ['OKC', 'BOS', 'SEA', 'OKC', 'NOH']
+    assert combined['GP'].tolist() == [82, 80, 70, 81, 60]
+    assert combined['GP'].dtype == 'int16'
+    # The season tables themselves keep their own categories
+    assert list(seasons[1]['TEAM'].cat.categories) == ['OKC', 'SEA']
+
+
+def test_shared_tables_are_read_only(store):
+    tables = create_all_season_tables(store, executor='serial')
+    rows, per_min, team_stats = tables[2010]
+    combined = concat_tables(per_min for _, per_min, _ in tables.values())
+
+    for frame, col in ((rows, 'PTS'), (per_min, 'PTS'), (team_stats, 'GP'), (combined, 'MIN'), (combined, 'PLAYER')):
+        with pytest.raises(ValueError, match="read-only"):
+            frame.loc[0, col] = frame.loc[1, col]
+
+    # Derived frames are ordinary, writable frames
+    subset = per_min[per_min['MIN'] > 0]
+    subset.loc[subset.index[0], 'PTS'] = 0.0
+    assert per_min.loc[subset.index[0], 'PTS'] != 0.0
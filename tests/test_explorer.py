@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from explorer import thin_to_grid
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(7)
+    # A dense cloud and a few isolated outliers far from it and from each other
+    x = np.concatenate([rng.normal(0.5, 0.05, 50_000), [0.0, 1.0, 0.0, 1.0]])
+    y = np.concatenate([rng.normal(0.5, 0.05, 50_000), [0.0, 0.0, 1.0, 1.0]])
+    return x, y
+
+
+@pytest.mark.parametrize('budget', [1, 10, 500, 5000])
+def test_kept_points_fit_the_budget_and_stand_for_every_input(points, budget):
+    x, y = points
+
+    keep, counts, size = thin_to_grid(x, y, budget, (0.0, 1.0), (0.0, 1.0))
+
+    assert len(keep) <= budget
+    assert len(keep) == len(counts)
+    assert counts.sum() == len(x)
+    assert (counts >= 1).all()
+    assert len(np.unique(keep)) == len(keep)
+    assert 1 <= size
+
+
+@pytest.mark.parametrize('budget', [100, 5000])
+def test_isolated_outliers_survive_as_singletons(points, budget):
+    x, y = points
+    outliers = np.arange(len(x) - 4, len(x))
+
+    keep, counts, _ = thin_to_grid(x, y, budget, (0.0, 1.0), (0.0, 1.0))
+
+    assert np.isin(outliers, keep).all()
+    assert (counts[np.isin(keep, outliers)] == 1).all()
+    # The dense cloud is what got collapsed
+    assert counts.max() > 1
+
+
+def test_everything_is_kept_when_it_fits(points):
+    x, y = points[0][:300], points[1][:300]
+
+    keep, counts, _ = thin_to_grid(x, y, 1000, (0.0, 1.0), (0.0, 1.0))
+
+    assert len(keep) == 300 and (counts == 1).all()
+
+
+def test_degenerate_range_and_points_outside_it():
+    x = np.array([2.0, 2.0, 2.0, 5.0])
+    y = np.array([-1.0, 0.5, 0.5, 9.0])
+
+    keep, counts, _ = thin_to_grid(x, y, 2, (2.0, 2.0), (0.0, 1.0))
+
+    assert len(keep) <= 2
+    assert counts.sum() == 4
@@ -0,0 +1,58 @@
+import numpy as np
+import plotly.graph_objects as go
+
+from figures import FigureCache
+
+
+def builder(calls, value):
+    def build():
+        calls.append(value)
+        return go.Figure(go.Bar(y=[value]))
+    return build
+
+
+def test_least_recently_used_figure_is_evicted_first():
+    cache = FigureCache(max_entries=2)
+    calls = []
+
+    cache.get_or_build(('bar', 'a'), builder(calls, 1))
+    cache.get_or_build(('bar', 'b'), builder(calls, 2))
+    # A hit makes 'a' the most recently used, so 'b' goes when 'c' comes in
+    cache.get_or_build(('bar', 'a'), builder(calls, 1))
+    cache.get_or_build(('bar', 'c'), builder(calls, 3))
+    assert calls == [1, 2, 3]
+
+    cache.get_or_build(('bar', 'a'), builder(calls, 1))
+    cache.get_or_build(('bar', 'b'), builder(calls, 2))
+    assert calls == [1, 2, 3, 2]
+    assert cache.stats() == {'hits': 2, 'misses': 4, 'hit_rate': 2 / 6, 'entries': 2, 'max_entries': 2}
+
+
+def test_hits_return_independent_copies_of_the_spec():
+    cache = FigureCache()
+    calls = []
+
+    first = cache.get_or_build(('bar', 1), builder(calls, 5))
+    first.update_layout(title="changed by one session")
+    second = cache.get_or_build(('bar', 1), builder(calls, 5))
+
+    assert calls == [5]
+    assert second.layout.title.text is None
+    assert list(second.data[0].y) == [5]
+
+
+def test_equal_keys_from_widgets_share_an_entry():
+    cache = FigureCache()
+    calls = []
+
+    # numpy scalars, ints and equal floats, lists and tuples: one entry
+    for key in [('bar', 2012, [1, 2]), ('bar', np.int64(2012), (1, 2)), ('bar', 2012.0, (np.int32(1), 2.0)),
+                ('bar', np.float64(2012), [1.0, np.int64(2)])]:
+        cache.get_or_build(key, builder(calls, 1))
+    assert calls == [1]
+
+    # Different values or types that don't compare equal are separate entries
+    for key in [('bar', '2012', [1, 2]), ('bar', 2012, [2, 1]), ('bar', 2012, [1, 2, 3]), ('bar', 2012, [[1, 2]])]:
+        cache.get_or_build(key, builder(calls, 2))
+    assert calls == [1, 2, 2, 2, 2]
+    assert cache.stats()['entries'] == 5
@@ -0,0 +1,62 @@
+import pytest
+
+from game_logs import RollingForm, load_game_logs, team_game_logs
+
+
+def test_team_game_logs_sum_teammates_of_each_game(tmp_path, game_row, write_games):
+    games = load_game_logs(write_games(tmp_path / "games.csv", [game_row(1, 1, 20), game_row(2, 1, 10),
+                                                                game_row(1, 2, 30), game_row(2, 2, 5)]))
+    assert games.attrs['game_order'] == 'GAME_NUMBER'
+
+    teams = team_game_logs(games).sort_values('GAME')
+    assert teams['GAME'].tolist() == [1, 2]
+    assert teams['PTS'].tolist() == [30, 35]
+
+
+def test_team_game_logs_need_a_game_identifier(tmp_path, game_row, write_games):
+    games = load_game_logs(write_games(tmp_path / "games.csv", [game_row(1, 1, 20), game_row(2, 1, 10)],
+                                       game_column=False))
+    assert games.attrs['game_order'] is None
+    assert games['GAME'].tolist() == [0, 1]
+
+    with pytest.raises(ValueError, match="GAME_DATE"):
+        team_game_logs(games)
+
+
+def test_rolling_windows_restart_at_season_and_season_type_boundaries(tmp_path, game_row, write_games):
+    # Out of order on purpose: games are ordered by GAME_NUMBER, not by file position
+    rows = [game_row(1, 3, 30), game_row(1, 1, 10), game_row(1, 2, 20),
+            game_row(1, 1, 40, season="2013-14"), game_row(1, 2, 50, season="2013-14"),
+            game_row(1, 1, 60, season_type="Playoffs")]
+    form = RollingForm(load_game_logs(write_games(tmp_path / "games.csv", rows)))
+
+    window = form.window(2).set_index(['season_start_year', 'Season_type', 'GAME'])
+    per36 = 36 / 30
+    assert window.loc[(2012, 'Regular Season', 1), ['GAMES', 'PTS']].tolist() == [1, pytest.approx(10 * per36)]
+    assert window.loc[(2012, 'Regular Season', 3), ['GAMES', 'PTS']].tolist() == [2, pytest.approx(25 * per36)]
+    assert window.loc[(2013, 'Regular Season', 1), ['GAMES', 'PTS']].tolist() == [1, pytest.approx(40 * per36)]
+    assert window.loc[(2012, 'Playoffs', 1), ['GAMES', 'PTS']].tolist() == [1, pytest.approx(60 * per36)]
+
+    trajectory = form.trajectory(1, 2013, windows=(5,))
+    assert trajectory['GAME_NUMBER'].tolist() == [1, 2]
+    assert trajectory['GAMES'].tolist() == [1, 2]
+    assert trajectory['PTS'].tolist() == pytest.approx([40 * per36, 45 * per36])
+    assert sorted(form.seasons_of(1)) == [(2012, 'Playoffs'), (2012, 'Regular Season'), (2013, 'Regular Season')]
+    assert form.trajectory(2, 2012).empty
+
+
+@pytest.mark.parametrize('header', [True, False])
+def test_empty_file_gives_an_empty_frame_with_the_usual_columns(tmp_path, game_row, write_games, header):
+    expected = load_game_logs(write_games(tmp_path / "one.csv", [game_row(1, 1, 20)]))
+    path = tmp_path / "games.csv"
+    if header:
+        write_games(path, [])
+    else:
+        path.write_text("")
+
+    games = load_game_logs(str(path))
+
+    assert len(games) == 0
+    assert games.columns.tolist() == expected.columns.tolist()
+    assert games.dtypes.astype(str).tolist() == expected.dtypes.astype(str).tolist()
+    RollingForm(games)
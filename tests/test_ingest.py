@@ -0,0 +1,29 @@
+from ingest import stream_game_logs, write_season_csv
+from storage import append_csv, parse_nba_csv
+
+
+def test_game_logs_fold_into_one_season_row_per_player(tmp_path, game_row, write_games):
+    games = write_games(tmp_path / "games.csv", [game_row(1, 1, 20), game_row(1, 2, 30), game_row(1, 3, 10, team="HOU"),
+                                                 game_row(2, 1, 5), game_row(1, 1, 7, season_type="Playoffs")])
+
+    # Two rows per chunk, so partial sums are merged several times
+    season_rows, stats = stream_game_logs(games, chunksize=2)
+
+    assert stats['rows'] == 5 and stats['chunks'] == 3
+    player = season_rows[(season_rows['PLAYER_ID'] == 1) & (season_rows['Season_type'] == 'Regular Season')]
+    assert player[['TEAM', 'GP', 'PTS', 'MIN']].values.tolist() == [['OKC', 3, 60, 90]]
+    assert len(season_rows) == 3
+
+
+def test_ingested_rows_replace_the_season_rows_they_update(tmp_path, season_row, write_csv, game_row, write_games):
+    csv_path = write_csv(tmp_path / "nba.csv", [season_row("Regular%20Season", 2280, player_id=1, player="Player 1"),
+                                                season_row("Regular%20Season", 2133, player_id=3, player="Player 3")])
+    games = write_games(tmp_path / "games.csv", [game_row(1, 1, 20), game_row(1, 2, 30)])
+    season_rows, _ = stream_game_logs(games)
+
+    assert append_csv(write_season_csv(season_rows, str(tmp_path / "update.csv")), csv_path) == 1
+    data = parse_nba_csv(csv_path)
+
+    assert sorted(data['PLAYER_ID'].tolist()) == [1, 3]
+    assert data.loc[data['PLAYER_ID'] == 1, ['PTS', 'GP']].values.tolist() == [[50, 2]]
+    assert data['Season_type'].unique().tolist() == ['Regular Season']
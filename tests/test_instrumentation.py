@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from instrumentation import StageTimings
+
+
+@pytest.fixture
+def timings():
+    timings = StageTimings(samples=100)
+    # 1 ms to 100 ms, recorded out of order
+    for ms in list(range(100, 50, -1)) + list(range(1, 51)):
+        timings.record('load', ms / 1000)
+    timings.record('render', 0.5)
+    timings.count('season_tables', hit=True)
+    timings.count('season_tables', hit=True)
+    timings.count('season_tables', hit=False)
+    return timings
+
+
+def test_percentiles_of_fixed_samples(timings):
+    load, render = timings.stage_summary()
+
+    assert load['stage'] == 'load' and load['count'] == 100
+    assert load['total_s'] == pytest.approx(5.05)
+    assert load['mean_ms'] == pytest.approx(50.5)
+    # Linear interpolation between the closest ranks
+    assert load['p50_ms'] == pytest.approx(50.5)
+    assert load['p95_ms'] == pytest.approx(95.05)
+    assert load['p99_ms'] == pytest.approx(99.01)
+    assert load['max_ms'] == pytest.approx(100)
+    assert render['p50_ms'] == render['p99_ms'] == render['max_ms'] == pytest.approx(500)
+
+
+def test_percentiles_cover_recent_samples_and_totals_cover_everything():
+    timings = StageTimings(samples=10)
+    for ms in range(1, 101):
+        timings.record('load', ms / 1000)
+
+    [load] = timings.stage_summary()
+    assert load['count'] == 100
+    assert load['total_s'] == pytest.approx(5.05)
+    assert load['p50_ms'] == pytest.approx(95.5)
+    assert load['max_ms'] == pytest.approx(100)
+
+
+def test_jsonl_has_one_object_per_stage_and_cache(timings):
+    lines = timings.to_jsonl().splitlines()
+
+    records = [json.loads(line) for line in lines]
+    assert [(r['type'], r.get('stage', r.get('cache'))) for r in records] == [
+        ('stage', 'load'), ('stage', 'render'), ('cache', 'season_tables')]
+    assert len({r['time'] for r in records}) == 1
+    assert records[0]['p95_ms'] == pytest.approx(95.05)
+    assert (records[2]['hits'], records[2]['misses']) == (2, 1)
+    assert records[2]['hit_rate'] == pytest.approx(2 / 3)
+    assert StageTimings().to_jsonl() == ""
+
+
+def test_prometheus_exposition(timings):
+    lines = timings.to_prometheus(prefix="nba").splitlines()
+
+    assert lines[:2] == ["# HELP nba_stage_seconds Time spent in each dashboard stage.",
+                         "# TYPE nba_stage_seconds summary"]
+    assert 'nba_stage_seconds{stage="load",quantile="0.5"} 0.0505' in lines
+    assert 'nba_stage_seconds{stage="load",quantile="0.95"} 0.09505' in lines
+    assert 'nba_stage_seconds{stage="load",quantile="0.99"} 0.09901' in lines
+    assert 'nba_stage_seconds_sum{stage="load"} 5.05' in lines
+    assert 'nba_stage_seconds_count{stage="load"} 100' in lines
+    assert "# TYPE nba_cache_hits_total counter" in lines
+    assert 'nba_cache_hits_total{cache="season_tables"} 2' in lines
+    assert 'nba_cache_misses_total{cache="season_tables"} 1' in lines
+    # Every sample line is `name{labels} value`
+    for line in lines:
+        if not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            float(value)
+            assert name.startswith('nba_') and name.endswith('}')
+
+
+def test_prometheus_label_values_are_escaped():
+    timings = StageTimings()
+    timings.record('page "Leaders"\\n\nnext', 0.25)
+    timings.count('cache\\"x', hit=True)
+
+    text = timings.to_prometheus()
+
+    assert 'nba_stage_seconds_count{stage="page \\"Leaders\\"\\\\n\\nnext"} 1\n' in text
+    assert 'nba_cache_hits_total{cache="cache\\\\\\"x"} 1\n' in text
+    assert 'nba_cache_misses_total{cache="cache\\\\\\"x"} 0\n' in text
+    # The raw newline never reaches the output
+    assert all(line.startswith(('#', 'nba_')) for line in text.splitlines())
+
+
+def test_prometheus_prefix_is_a_valid_metric_name(timings):
+    text = timings.to_prometheus(prefix="2nba-dash.v1")
+
+    assert '# TYPE _2nba_dash_v1_stage_seconds summary\n' in text
+    assert '_2nba_dash_v1_cache_hits_total{cache="season_tables"} 2\n' in text
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from leaderboard import SeasonLeaderboard
+
+
+@pytest.fixture
+def season_per_min():
+    rng = np.random.default_rng(3)
+    n = 120
+    frame = pd.DataFrame({
+        'PLAYER_ID': np.arange(n),
+        'PLAYER': [f"Player {i:03d}" for i in range(n)],
+        'MIN': rng.integers(50, 3000, n).astype('float64'),
+        # Few distinct values, so there are many ties
+        'PTS': rng.integers(5, 15, n) / 36,
+        'AST': rng.normal(0.1, 0.04, n),
+        '3PT%': rng.normal(0.35, 0.05, n),
+    })
+    frame.loc[[4, 40, 77], '3PT%'] = np.nan
+    return frame
+
+
+def expected_order(leaderboard, metric, ascending):
+    frame = pd.DataFrame({'value': leaderboard.column(metric)})
+    return frame.sort_values('value', ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+
+
+@pytest.mark.parametrize('metric', ['PTS', 'AST', '3PT%'])
+@pytest.mark.parametrize('ascending', [False, True])
+def test_cached_order_matches_sort_values(season_per_min, metric, ascending):
+    leaderboard = SeasonLeaderboard(season_per_min)
+
+    np.testing.assert_array_equal(leaderboard.order(metric, ascending), expected_order(leaderboard, metric, ascending))
+    # Second call comes from the cache
+    assert leaderboard.order(metric, ascending) is leaderboard.order(metric, ascending)
+
+
+@pytest.mark.parametrize('ascending', [False, True])
+def test_missing_values_sort_last_in_both_directions(season_per_min, ascending):
+    leaderboard = SeasonLeaderboard(season_per_min)
+
+    assert leaderboard.order('3PT%', ascending)[-3:].tolist() == [4, 40, 77]
+    rows, total = leaderboard.page('3PT%', page=2, page_size=50, ascending=ascending)
+    assert total == len(season_per_min)
+    assert rows['3PT%'].tail(3).isna().all()
+
+
+def test_min_minutes_filter_is_applied_before_paging(season_per_min):
+    leaderboard = SeasonLeaderboard(season_per_min)
+    qualified = season_per_min['MIN'] >= 1500
+    expected = [i for i in expected_order(leaderboard, 'AST', False) if qualified[i]]
+
+    first, total = leaderboard.page('AST', page=0, page_size=10, min_minutes=1500, columns=[])
+    second, _ = leaderboard.page('AST', page=1, page_size=10, min_minutes=1500, columns=[])
+
+    assert total == int(qualified.sum())
+    assert first['PLAYER_ID'].tolist() + second['PLAYER_ID'].tolist() == expected[:20]
+    assert second['RANK'].tolist() == list(range(11, 21))
+    assert (second['MIN'] >= 1500).all()
+
+
+@pytest.mark.parametrize('k', [1, 5, 13, 40, 200])
+def test_top_agrees_with_the_full_sort_at_ties(season_per_min, k):
+    leaderboard = SeasonLeaderboard(season_per_min)
+
+    for metric in ('PTS', '3PT%'):
+        top = leaderboard.top(metric, k=k, columns=[metric])
+        assert top['PLAYER_ID'].tolist() == expected_order(leaderboard, metric, False)[:k].tolist()
+
+
+def test_per36_and_ratio_columns(season_per_min):
+    leaderboard = SeasonLeaderboard(season_per_min)
+
+    np.testing.assert_allclose(leaderboard.column('PTS'), season_per_min['PTS'] * 36, rtol=1e-6)
+    np.testing.assert_allclose(leaderboard.column('3PT%'), season_per_min['3PT%'], rtol=1e-6)
+    assert 'PTS' in leaderboard.per36_metrics and '3PT%' not in leaderboard.per36_metrics
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from metrics import PLAYER_METRICS, MetricRegistry, MetricTable, compute_metrics, safe_divide
+
+
+def test_safe_divide_gives_nan_for_zero_or_missing_denominators():
+    result = safe_divide([1, 2, 3, 4], [2, 0, np.nan, -4])
+    np.testing.assert_array_equal(result, [0.5, np.nan, np.nan, -1.0])
+    assert result.dtype == np.float64
+    assert np.isnan(safe_divide(0, 0))
+
+
+def chain_registry():
+    registry = MetricRegistry()
+    registry.register('C', ['B', 'A'])(lambda s: s['B'] + s['A'])
+    registry.register('B', ['A', 'x'])(lambda s: s['A'] * s['x'])
+    registry.register('A', ['x'])(lambda s: s['x'] + 1)
+    return registry
+
+
+def test_plan_puts_dependencies_first_and_skips_available_columns():
+    registry = chain_registry()
+    assert registry.plan(['C'], {'x'}) == ['A', 'B', 'C']
+    assert registry.plan(['C'], {'x', 'A'}) == ['B', 'C']
+    assert registry.plan(['A', 'C'], {'x'}) == ['A', 'B', 'C']
+
+
+def test_plan_rejects_unknown_names_and_cycles():
+    registry = chain_registry()
+    with pytest.raises(KeyError):
+        registry.plan(['missing'], {'x'})
+
+    registry.register('P', ['Q'])(lambda s: s['Q'])
+    registry.register('Q', ['P'])(lambda s: s['P'])
+    with pytest.raises(ValueError):
+        registry.plan(['P'], set())
+
+
+def test_compute_metrics_returns_only_computable_requested_names():
+    values = compute_metrics({'x': np.array([1.0, 2.0])}, ['C', 'nope'], chain_registry())
+    assert list(values) == ['C']
+    np.testing.assert_array_equal(values['C'], [2 * 1 + 2, 3 * 2 + 3])
+
+
+def test_available_is_planned_once_per_set_of_columns(monkeypatch):
+    parent = chain_registry()
+    registry = MetricRegistry(parent)
+    calls = []
+    plan = registry.plan
+    monkeypatch.setattr(registry, 'plan', lambda *args: calls.append(args) or plan(*args))
+
+    for _ in range(3):
+        compute_metrics({'x': np.array([1.0])}, ['C'], registry)
+    assert registry.available(['x']) == ['C', 'B', 'A']
+    # One plan per metric for the first available(), then compute_metrics' own plan on each call
+    assert len(calls) == 3 + 3
+    calls.clear()
+
+    assert registry.available(['A']) == ['A']
+    # A metric registered later, here or in the parent, is picked up
+    parent.register('D', ['x'])(lambda s: s['x'] * 2)
+    assert 'D' in registry.available(['x'])
+    registry.register('E', ['D'])(lambda s: s['D'])
+    assert registry.available(['x'])[-1] == 'E'
+
+
+def test_metric_table_reads_base_columns_first_and_memoizes():
+    frame = pd.DataFrame({'FGM': [5, 0], 'FGA': [10, 0], 'FG%': [0.25, 0.0]})
+    table = MetricTable(frame, PLAYER_METRICS)
+    np.testing.assert_array_equal(table.values('FG%'), [0.25, 0.0])
+
+    table = MetricTable(frame.drop(columns='FG%'), PLAYER_METRICS)
+    np.testing.assert_array_equal(table.values('FG%'), [0.5, np.nan])
+    assert table.values('FG%') is table.values('FG%')
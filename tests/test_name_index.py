@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+
+from name_index import PlayerNameIndex, name_trigrams, normalize_name
+
+PLAYERS = [
+    (1, "Stephen Curry", 2012, 3000),
+    (1, "Stephen Curry", 2013, 2800),
+    (2, "Seth Curry", 2013, 1200),
+    (3, "Nikola Jokić", 2013, 2500),
+    (4, "D'Angelo Russell", 2012, 2000),
+    (5, "Curry Stephens", 2012, 100),
+    (6, "Nikola Vučević", 2012, 2600),
+    (7, "Seth Curryman", 2012, 900),
+    (8, "Tony Mitchell", 2012, 500),
+    (9, "Tony Mitchell", 2013, 1500),
+]
+
+
+@pytest.fixture
+def index():
+    frame = pd.DataFrame(PLAYERS, columns=['PLAYER_ID', 'PLAYER', 'season_start_year', 'MIN'])
+    return PlayerNameIndex(frame)
+
+
+def test_names_are_normalized_without_accents_case_or_punctuation():
+    assert normalize_name("Nikola Jokić") == "nikola jokic"
+    assert normalize_name("D'Angelo  RUSSELL") == "dangelo russell"
+    assert normalize_name("P.J. Tucker") == "pj tucker"
+    assert name_trigrams("al") == {"  a", " al", "al "}
+
+
+def test_prefix_search_starts_at_any_word(index):
+    assert index.search("steph") == [1, 5]
+    assert set(index.search("cur")) == {1, 2, 5, 7}
+    assert index.search("russ") == [4]
+
+
+def test_accents_and_case_are_ignored(index):
+    assert index.search("JOKIC")[0] == 3
+    assert index.search("jokić")[0] == 3
+    assert index.search("vucevic")[0] == 6
+    assert index.search("dangelo")[0] == 4
+
+
+def test_exact_name_ranks_above_prefix_above_fuzzy(index):
+    # Exact name, then a longer name it is a prefix of, then a fuzzy match with more minutes
+    assert index.search("seth curry") == [2, 7, 1]
+    assert index.search("curry s") == [5, 2]
+
+
+def test_typos_fall_back_to_trigram_matches(index):
+    assert index.search("nikola jokci") == [3, 6]
+    assert index.search("stephen cury")[0] == 1
+
+
+def test_equal_matches_go_to_more_minutes(index):
+    assert index.search("tony mitchell") == [9, 8]
+
+
+def test_empty_and_one_character_queries(index):
+    assert index.search("") == []
+    assert index.search("  ") == []
+    assert index.search("'.") == []
+    assert set(index.search("s")) == {1, 2, 5, 7}
+    assert index.search("z") == []
+
+
+def test_season_filter_and_top_players(index):
+    assert sorted(index.search("curry", season=2013)) == [1, 2]
+    assert index.search("curry", season=1999) == []
+    assert index.top_players(2012, limit=2) == [1, 6]
+    assert index.top_players(2013, limit=2) == [1, 3]
+    assert index.seasons_played(1) == [2012, 2013]
+    assert index.label(2) == "Seth Curry (2013-14 to 2013-14)"
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from player_index import SEASON_BITS, TYPE_BITS, PlayerSeasonIndex, encode_keys
+
+
+def decode_keys(keys):
+    return (keys >> (SEASON_BITS + TYPE_BITS), (keys >> TYPE_BITS) & ((1 << SEASON_BITS) - 1),
+            keys & ((1 << TYPE_BITS) - 1))
+
+
+def test_keys_round_trip_and_sort_like_the_triples():
+    player_ids = np.array([1630178, 2544, 2544, 201142, 2544])
+    seasons = np.array([2023, 2012, 2023, 2012, 2012])
+    type_codes = np.array([0, 1, 0, 0, 0])
+    keys = encode_keys(player_ids, seasons, type_codes)
+
+    assert keys.dtype == np.int64
+    for decoded, expected in zip(decode_keys(keys), (player_ids, seasons, type_codes)):
+        np.testing.assert_array_equal(decoded, expected)
+    assert np.argsort(keys).tolist() == np.lexsort((type_codes, seasons, player_ids)).tolist()
+
+
+def test_season_and_type_fields_do_not_overlap():
+    # The largest season and type code of one player stay below the next player's first key
+    assert encode_keys(7, (1 << SEASON_BITS) - 1, (1 << TYPE_BITS) - 1) + 1 == encode_keys(8, 0, 0)
+
+
+def test_lookups_return_contiguous_slices():
+    rows = pd.DataFrame({
+        'PLAYER_ID': [2544, 201142, 2544, 2544, 201142],
+        'PLAYER': ['LeBron James', 'Kevin Durant', 'LeBron James', 'LeBron James', 'Kevin Durant'],
+        'season_start_year': [2013, 2012, 2012, 2012, 2013],
+        'Season_type': ['Regular Season', 'Regular Season', 'Playoffs', 'Regular Season', 'Regular Season'],
+        'PTS': [1, 2, 3, 4, 5],
+    })
+    index = PlayerSeasonIndex(rows)
+
+    assert index.get_player_career(2544)['PTS'].tolist() == [3, 4, 1]
+    assert index.get_player_season(2544, 2012)['PTS'].tolist() == [3, 4]
+    assert index.get_player_season(2544, 2012, 'Regular Season')['PTS'].tolist() == [4]
+    assert index.get_player_season(2544, 2012, 'Summer League').empty
+    assert index.players_in_season(2012, 'Regular Season')['PLAYER'].tolist() == ['Kevin Durant', 'LeBron James']
+    assert index.seasons == [2012, 2013]
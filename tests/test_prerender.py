@@ -0,0 +1,52 @@
+import json
+import os
+
+import pytest
+
+from prerender import MANIFEST_NAME, prerender
+
+
+@pytest.fixture
+def csv_path(tmp_path, season_row, write_csv):
+    return write_csv(tmp_path / "nba.csv", [season_row("Regular%20Season", 2280),
+                                            season_row("Regular%20Season", 2133, 977, "Kobe Bryant", team="LAL"),
+                                            season_row("Playoffs", 430)])
+
+
+def run(tmp_path, csv_path, **options):
+    return prerender(str(tmp_path / "reports"), csv_path, str(tmp_path / "cache"), fmt="json", workers=1,
+                     log=lambda message: None, **options)
+
+
+def test_current_season_is_skipped_and_interrupted_one_redone(tmp_path, csv_path):
+    season_dir = tmp_path / "reports" / "2012"
+
+    first = run(tmp_path, csv_path)
+    assert first['rendered'] == [2012] and first['reports'] == 1
+    manifest = json.loads((season_dir / MANIFEST_NAME).read_text())
+    assert manifest['reports'] == ["LAL-OKC.json"]
+    assert (manifest['season_type'], manifest['format']) == ("Regular Season", "json")
+    assert json.loads((season_dir / "LAL-OKC.json").read_text())
+
+    # Same season hash, renderer version and options
+    second = run(tmp_path, csv_path)
+    assert second['skipped'] == [2012] and second['reports'] == 0
+
+    # A run stopped after its reports but before the manifest
+    os.remove(season_dir / MANIFEST_NAME)
+    assert run(tmp_path, csv_path)['rendered'] == [2012]
+    assert (season_dir / MANIFEST_NAME).exists()
+
+
+def test_other_options_or_data_render_again(tmp_path, csv_path, season_row):
+    run(tmp_path, csv_path)
+
+    # Only OKC played in the playoffs: no pair to render, but the manifest records the options
+    playoffs = run(tmp_path, csv_path, season_type="Playoffs")
+    assert playoffs['rendered'] == [2012] and playoffs['reports'] == 0
+    assert run(tmp_path, csv_path, season_type="Playoffs")['skipped'] == [2012]
+
+    with open(csv_path, "a") as f:
+        f.write(season_row("Regular%20Season", 800, 1, "Player 1", team="LAL") + "\n")
+    assert run(tmp_path, csv_path, season_type="Playoffs")['rendered'] == [2012]
+    assert run(tmp_path, csv_path, force=True)['rendered'] == [2012]
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from similarity import PlayerSimilarityIndex
+
+FEATURES = ['PTS', 'AST', 'REB', '3PT%']
+
+
+@pytest.fixture
+def per_min():
+    rng = np.random.default_rng(11)
+    n = 200
+    frame = pd.DataFrame({
+        'PLAYER_ID': np.repeat(np.arange(1, n // 2 + 1), 2),
+        'season_start_year': np.tile([2012, 2013], n // 2),
+        'MIN': rng.integers(100, 3000, n),
+        'PTS': rng.normal(0.5, 0.15, n),
+        'AST': rng.normal(0.12, 0.05, n),
+        'REB': rng.normal(0.2, 0.08, n),
+        '3PT%': rng.normal(0.35, 0.05, n),
+    })
+    # No three-point attempts
+    frame.loc[7, '3PT%'] = np.nan
+    return frame
+
+
+def brute_force(per_min, position):
+    values = per_min[FEATURES].to_numpy(dtype='float64')
+    standardized = (values - np.nanmean(values, axis=0)) / np.nanstd(values, axis=0)
+    standardized = np.nan_to_num(standardized, nan=0.0)
+    return np.sqrt(((standardized - standardized[position]) ** 2).sum(axis=1))
+
+
+def test_features_are_standardized_into_float32(per_min):
+    index = PlayerSimilarityIndex(per_min, FEATURES)
+
+    assert index.matrix.dtype == np.float32 and index.matrix.flags['C_CONTIGUOUS']
+    complete = per_min[FEATURES].notna().all(axis=1).to_numpy()
+    np.testing.assert_allclose(index.matrix[complete].mean(axis=0), 0, atol=0.02)
+    np.testing.assert_allclose(index.matrix.std(axis=0)[:3], 1, rtol=1e-5)
+    np.testing.assert_allclose(index.norms, (index.matrix.astype('float64') ** 2).sum(axis=1), rtol=1e-5)
+
+
+def test_neighbours_are_in_brute_force_distance_order(per_min):
+    index = PlayerSimilarityIndex(per_min, FEATURES)
+    position = 10
+    player_id, season = per_min.loc[position, ['PLAYER_ID', 'season_start_year']]
+
+    similar = index.similar_players(player_id, season, k=15, exclude_self=False)
+
+    distances = brute_force(per_min, position)
+    distances[position] = np.inf
+    expected = np.argsort(distances, kind='stable')[:15]
+    assert similar.index.tolist() == expected.tolist()
+    np.testing.assert_allclose(similar['distance'], distances[expected], rtol=1e-4)
+
+
+def test_min_minutes_and_exclude_self(per_min):
+    # Make the player's other season its closest match
+    per_min.loc[11, FEATURES] = per_min.loc[10, FEATURES]
+    index = PlayerSimilarityIndex(per_min, FEATURES)
+
+    kept = index.similar_players(6, 2012, k=5, exclude_self=False)
+    assert kept.index[0] == 11
+    assert kept['distance'].iloc[0] == pytest.approx(0, abs=1e-3)
+    assert 10 not in kept.index
+
+    others = index.similar_players(6, 2012, k=5)
+    assert 6 not in others['PLAYER_ID'].tolist()
+    assert len(others) == 5
+
+    regulars = index.similar_players(6, 2012, k=len(per_min), min_minutes=1500)
+    assert (regulars['MIN'] >= 1500).all()
+    assert len(regulars) == int(((per_min['MIN'] >= 1500) & (per_min['PLAYER_ID'] != 6)).sum())
+
+
+def test_missing_stat_counts_as_league_mean(per_min):
+    index = PlayerSimilarityIndex(per_min, FEATURES)
+
+    assert index.matrix[7, FEATURES.index('3PT%')] == 0
+    similar = index.similar_players(4, 2013, k=10, exclude_self=False)
+    assert np.isfinite(similar['distance']).all()
+    distances = brute_force(per_min, 7)
+    distances[7] = np.inf
+    assert similar.index.tolist() == np.argsort(distances, kind='stable')[:10].tolist()
+
+
+def test_unknown_player_season_returns_no_rows(per_min):
+    index = PlayerSimilarityIndex(per_min, FEATURES)
+
+    assert index.similar_players(6, 1990).empty
+    assert 'distance' in index.similar_players(999, 2012).columns
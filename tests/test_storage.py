@@ -0,0 +1,98 @@
+import pandas as pd
+
+from storage import append_csv, parse_nba_csv
+
+
+def test_appended_decoded_row_replaces_encoded_row(tmp_path, season_row, write_csv):
+    csv_path = write_csv(tmp_path / "nba.csv", [season_row("Regular%20Season", 2280),
+                                                season_row("Playoffs", 430),
+                                                season_row("Regular%20Season", 2133, 977, "Kobe Bryant")])
+    update = write_csv(tmp_path / "update.csv", [season_row("Regular Season", 9999)])
+
+    assert append_csv(update, csv_path) == 1
+    data = parse_nba_csv(csv_path)
+
+    assert len(data) == 3
+    durant = data[(data['PLAYER_ID'] == 201142) & (data['Season_type'] == 'Regular Season')]
+    assert durant['PTS'].tolist() == [9999]
+    assert sorted(data['Season_type'].unique()) == ['Playoffs', 'Regular Season']
+
+
+def test_append_keeps_distinct_rows(tmp_path, season_row, write_csv):
+    csv_path = write_csv(tmp_path / "nba.csv", [season_row("Regular%20Season", 2280)])
+    update = write_csv(tmp_path / "update.csv", [season_row("Regular%20Season", 2133, 977, "Kobe Bryant")])
+
+    append_csv(update, csv_path)
+
+    assert sorted(parse_nba_csv(csv_path)['PTS'].tolist()) == [2133, 2280]
+
+
+def test_season_start_year_derived(tmp_path, season_row, write_csv):
+    data = parse_nba_csv(write_csv(tmp_path / "nba.csv", [season_row("Regular%20Season", 2280)]))
+    assert data['season_start_year'].tolist() == [2012]
+    assert pd.api.types.is_integer_dtype(data['season_start_year'])
+
+
+def test_watcher_waits_for_stable_file_and_rejects_bad_ones(tmp_path, season_row, write_csv):
+    from storage import DatasetWatcher
+
+    csv_path = write_csv(tmp_path / "nba.csv", [season_row("Regular%20Season", 2280)])
+    incoming = tmp_path / "incoming"
+    incoming.mkdir()
+    (incoming / "a_bad.csv").write_text("PLAYER_ID,PTS\n1,2\n")
+    write_csv(incoming / "b_good.csv", [season_row("Regular Season", 2133, 977, "Kobe Bryant")])
+    changes = []
+    watcher = DatasetWatcher(csv_path, on_change=lambda: changes.append(1), incoming_dir=str(incoming))
+
+    # First sight of a file only records its size and mtime
+    assert not watcher.poll()
+    assert len(parse_nba_csv(csv_path)) == 1
+
+    assert watcher.poll()
+    assert sorted(p.name for p in incoming.iterdir()) == ["a_bad.csv.rejected", "b_good.csv.ingested"]
+    assert len(parse_nba_csv(csv_path)) == 2
+    assert changes == [1]
+
+
+def test_watcher_skips_file_that_is_still_growing(tmp_path, season_row, write_csv):
+    import os
+
+    from storage import DatasetWatcher
+
+    csv_path = write_csv(tmp_path / "nba.csv", [season_row("Regular%20Season", 2280)])
+    incoming = tmp_path / "incoming"
+    incoming.mkdir()
+    partial = incoming / "update.csv"
+    write_csv(partial, [])
+    watcher = DatasetWatcher(csv_path, on_change=lambda: None, incoming_dir=str(incoming))
+
+    watcher.poll()
+    with open(partial, "a") as f:
+        f.write(season_row("Regular Season", 2133, 977, "Kobe Bryant") + "\n")
+    os.utime(partial, ns=(0, os.stat(partial).st_mtime_ns + 1))
+    watcher.poll()
+    assert partial.exists()
+
+    watcher.poll()
+    assert not partial.exists()
+    assert len(parse_nba_csv(csv_path)) == 2
+
+
+def test_appending_to_one_season_keeps_the_other_seasons_cached(tmp_path, season_row, write_csv):
+    from api import StatsService
+
+    csv_path = write_csv(tmp_path / "nba.csv", [season_row("Regular%20Season", 2280),
+                                                season_row("Regular%20Season", 2000, season="2013-14")])
+    service = StatsService(csv_path, str(tmp_path / "cache"), refresh_interval=0)
+    store, _ = service.snapshot()
+    hashes = {season: store.season_hash(season) for season in store.seasons}
+    tables = {season: service.season_tables(season) for season in store.seasons}
+
+    update = write_csv(tmp_path / "update.csv", [season_row("Regular Season", 1500, 977, "Kobe Bryant", "2013-14")])
+    assert append_csv(update, csv_path) == 1
+    store, _ = service.snapshot()
+
+    assert store.season_hash(2012) == hashes[2012]
+    assert store.season_hash(2013) != hashes[2013]
+    assert service.season_tables(2012) is tables[2012]
+    assert len(service.season_tables(2013)[0]) == 2
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from compute import total_cols
+from team_cube import ALL, TeamSeasonCube
+
+
+@pytest.fixture
+def rows():
+    rng = np.random.default_rng(7)
+    keys = [('BOS', 2012, 'Regular Season'), ('BOS', 2012, 'Regular Season'), ('BOS', 2012, 'Playoffs'),
+            ('BOS', 2013, 'Regular Season'), ('LAL', 2012, 'Regular Season'), ('LAL', 2013, 'Regular Season'),
+            ('LAL', 2013, 'Playoffs')]
+    frame = pd.DataFrame(keys, columns=['TEAM', 'season_start_year', 'Season_type'])
+    for col in total_cols + ['GP']:
+        frame[col] = rng.integers(1, 500, len(frame)).astype('float64')
+    return frame
+
+
+def test_roll_ups_sum_the_counts_of_their_cells(rows):
+    cube = TeamSeasonCube(rows)
+    bos = rows[rows['TEAM'] == 'BOS']
+
+    assert cube.value('PTS', 'BOS') == bos['PTS'].sum()
+    assert cube.value('PTS', 'BOS', 2012) == bos.loc[bos['season_start_year'] == 2012, 'PTS'].sum()
+    assert cube.value('PTS', 'BOS', ALL, 'Playoffs') == bos.loc[bos['Season_type'] == 'Playoffs', 'PTS'].sum()
+    assert cube.value('GP', 'LAL', 2013, 'Regular Season') == rows['GP'].iloc[5]
+
+
+def test_roll_up_rates_come_from_summed_counts(rows):
+    cube = TeamSeasonCube(rows)
+    bos = rows[rows['TEAM'] == 'BOS']
+
+    assert cube.value('FG_PCT', 'BOS') == pytest.approx(bos['FGM'].sum() / bos['FGA'].sum())
+    possessions = bos['FGA'].sum() - bos['OREB'].sum() + bos['TOV'].sum() + 0.44 * bos['FTA'].sum()
+    assert cube.value('ORtg', 'BOS') == pytest.approx(bos['PTS'].sum() / possessions * 100)
+
+
+def test_slices_leave_out_teams_that_did_not_play(rows):
+    cube = TeamSeasonCube(rows)
+
+    assert cube.teams_in(2012, 'Playoffs') == ['BOS']
+    playoffs = cube.slice(2012, 'Playoffs')
+    assert playoffs['TEAM'].tolist() == ['BOS']
+    assert playoffs['PTS'].tolist() == [rows['PTS'].iloc[2]]
+    assert cube.row('LAL', 2012, 'Playoffs').empty
+    assert cube.row('LAL', 2013)['PTS'].tolist() == [rows['PTS'].iloc[5:7].sum()]
+
+    series = cube.series('BOS', 'PTS', 'Playoffs')
+    assert series[0] == rows['PTS'].iloc[2]
+    assert np.isnan(series[1])
+    with pytest.raises(KeyError):
+        cube.slice(1999, ALL)